@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+#
+#  cli.py
+"""
+Benchmark the ``formate`` command line interface end-to-end, including starting the interpreter.
+
+The corpora from ``corpora.py`` are written to a temporary directory
+and reformatted with the same configuration as ``hooks.py``.
+The files are written back to their original contents before every run,
+except for the ``cached`` benchmark which measures running ``formate`` again on files it has already reformatted.
+
+Run with ``python benchmarks/cli.py``. Pass ``--help`` for the options.
+"""
+
+# stdlib
+import argparse
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+# 3rd party
+import dom_toml
+from corpora import get_corpora  # type: ignore[import-not-found]
+from domdf_python_tools.paths import PathPlus
+from hooks import config, repo_root  # type: ignore[import-not-found]
+
+# The arguments for each benchmark, in addition to the filenames.
+scenarios: Dict[str, List[str]] = {
+		"serial": ["--jobs", '1', "--no-cache"],
+		"parallel": ["--no-cache"],
+		"check": ["--check", "--no-cache"],
+		"cached": ["--cache-dir", ".formate-cache"],
+		}
+
+
+def main() -> None:  # noqa: D103
+	parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+	parser.add_argument("--number", type=int, default=3, help="The number of times to run each benchmark.")
+	parser.add_argument("--corpus", action="append", dest="corpora", help="Only use the given corpus (corpora).")
+	args = parser.parse_args()
+
+	corpora = get_corpora()
+
+	if args.corpora:
+		corpora = {name: corpora[name] for name in args.corpora}
+
+	with tempfile.TemporaryDirectory() as tmpdir:
+		directory = PathPlus(tmpdir)
+		(directory / "formate.toml").write_clean(dom_toml.dumps(config))
+		shutil.copy2(repo_root / ".style.yapf", directory / ".style.yapf")
+
+		print(f"{'Time (ms)':<10}  " + "  ".join(f"{name:>10}" for name in corpora))
+
+		for scenario, options in scenarios.items():
+			times = []
+
+			for corpus_name, files in corpora.items():
+				filenames = []
+				for filename, _ in files:
+					filenames.append(f"{corpus_name}/{filename}")
+					(directory / filenames[-1]).parent.maybe_make(parents=True)
+
+				def run(restore: bool = True) -> float:
+					if restore:
+						for name, (_, source) in zip(filenames, files):
+							(directory / name).write_text(source)
+
+					start = time.perf_counter()
+					subprocess.run(
+							[sys.executable, "-m", "formate", *options, *filenames],
+							cwd=directory,
+							stdout=subprocess.DEVNULL,
+							stderr=subprocess.DEVNULL,
+							)
+					return time.perf_counter() - start
+
+				if scenario == "cached":
+					# The first run reformats the files and the second records them as unchanged.
+					run()
+					run(restore=False)
+					total = sum(run(restore=False) for _ in range(args.number))
+				else:
+					total = sum(run() for _ in range(args.number))
+
+				times.append(f"{total / args.number * 1000:.2f}")
+
+			print(f"{scenario:<10}  " + "  ".join(f"{t:>10}" for t in times))
+
+
+if __name__ == "__main__":
+	main()
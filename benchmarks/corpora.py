@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+#
+#  corpora.py
+"""
+Source files for the benchmarks.
+
+Every corpus is built from the ``formate`` source tree or generated on the fly,
+so the benchmarks can be run offline and give the same results each time.
+"""
+
+# stdlib
+import os
+from typing import Dict, List, Tuple
+
+# 3rd party
+from domdf_python_tools.paths import PathPlus
+
+# this package
+import formate
+
+__all__ = ["make_generated", "make_stub", "get_corpora"]
+
+#: The directory containing the ``formate`` package, used as the real-world corpus.
+package_dir = PathPlus(formate.__file__).parent
+
+# A module exercising every built-in hook.
+_generated_chunk = """\
+from collections import Iterable, Mapping
+from typing import Dict, List, Optional, Tuple, Union
+
+
+class Class{idx}(object):
+
+	def __init__(self, values: List[Tuple[int, str]], mapping: Dict[str, Union[int, float, str, List[str]]]):
+		self.values = values
+		self.mapping = mapping
+
+	def method(self, key: str = 'default') -> Optional[Dict[str, List[Tuple[int, Mapping]]]]:
+		...
+
+	def other(self) -> str:
+		value = str(
+				object=
+				'a string with "double quotes"',
+				)
+		print('hello world')  # noqa T201
+		return value
+
+
+def function_{idx}(
+		argument: Dict[str, Union[int, float, str, List[str]]],
+		other: Tuple[int, int, int, int, int, int, int, int, int, int, int, int, int, int, int] = (),
+		) -> Iterable:
+	pass
+
+"""
+
+_stub_chunk = """\
+from typing import Dict, List, Optional, Tuple, Union, overload
+
+class Class{idx}:
+	values: List[Tuple[int, str]]
+	def __init__(self, values: List[Tuple[int, str]]) -> None: ...
+	@overload
+	def method(self, key: str) -> str: ...
+	@overload
+	def method(self, key: int) -> int: ...
+	def other(self) -> Optional[Dict[str, Union[int, str]]]:
+		...
+
+def function_{idx}(argument: Dict[str, Union[int, float, str, List[str]]]) -> None: ...
+"""
+
+
+def make_generated(chunks: int) -> str:
+	"""
+	Returns generated source containing ``chunks`` copies of a block of code which every built-in hook changes.
+
+	:param chunks:
+	"""
+
+	return '\n'.join(_generated_chunk.format(idx=idx) for idx in range(chunks))
+
+
+def make_stub(chunks: int) -> str:
+	"""
+	Returns the source of a generated type stub containing ``chunks`` classes and functions.
+
+	:param chunks:
+	"""
+
+	return '\n'.join(_stub_chunk.format(idx=idx) for idx in range(chunks))
+
+
+def get_corpora() -> Dict[str, List[Tuple[str, str]]]:
+	"""
+	Returns a mapping of corpus names to lists of ``(filename, source)`` pairs.
+
+	* ``small`` -- a few short generated files.
+	* ``generated`` -- a single generated file of around a thousand lines.
+	* ``stub`` -- a single generated type stub of around a thousand lines.
+	* ``real-world`` -- the modules of the ``formate`` package itself.
+	* ``huge`` -- a single file made up of every ``formate`` module, repeated twice.
+	"""
+
+	real_world = [(os.path.relpath(filename, package_dir), filename.read_text())
+					for filename in sorted(package_dir.glob("*.py"))]
+
+	return {
+			"small": [(f"small_{idx}.py", make_generated(1)) for idx in range(5)],
+			"generated": [("generated.py", make_generated(40))],
+			"stub": [("stub.pyi", make_stub(80))],
+			"real-world": real_world,
+			"huge": [("huge.py", '\n'.join(source for _, source in real_world) * 2)],
+			}
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+#
+#  hooks.py
+"""
+Benchmark each built-in hook, and the full pipeline, against the corpora in ``corpora.py``.
+
+Each hook is called directly, so the :deco:`~formate.config.applies_if` checks are not applied,
+while the pipeline goes through :func:`formate.call_hooks` as the command line interface does.
+
+Run with ``python benchmarks/hooks.py``. Pass ``--help`` for the options.
+"""
+
+# stdlib
+import argparse
+import timeit
+from typing import Callable, Dict, List, Tuple
+
+# 3rd party
+from corpora import get_corpora  # type: ignore[import-not-found]
+from domdf_python_tools.paths import PathPlus, in_directory
+
+# this package
+from formate import call_hooks
+from formate.pipeline import Pipeline
+
+repo_root = PathPlus(__file__).parent.parent
+
+# The same configuration as formate.toml, without the hooks provided by other packages.
+config = {
+		"hooks": {
+				"dynamic_quotes": 10,
+				"collections-import-rewrite": 20,
+				"yapf": {"priority": 30, "kwargs": {"yapf_style": ".style.yapf"}},
+				"reformat-generics": 40,
+				"isort": {
+						"priority": 50,
+						"kwargs": {
+								"indent": "\t\t",
+								"multi_line_output": 8,
+								"import_heading_stdlib": "stdlib",
+								"import_heading_thirdparty": "3rd party",
+								"import_heading_firstparty": "this package",
+								"import_heading_localfolder": "this package",
+								"balanced_wrapping": False,
+								"lines_between_types": 0,
+								"use_parentheses": True,
+								"remove_redundant_aliases": True,
+								"default_section": "THIRDPARTY",
+								"known_first_party": ["formate"],
+								},
+						},
+				"noqa-reformat": 60,
+				"ellipsis-reformat": 70,
+				"squish_stubs": 80,
+				"newline_after_equals": 90,
+				},
+		"config": {"indent": '\t', "line_length": 115},
+		}
+
+
+def time_call(func: Callable[[str, str], str], files: List[Tuple[str, str]], number: int) -> str:
+	"""
+	Returns the mean time, in milliseconds, taken to reformat all the files with ``func``.
+
+	:param func: A function taking the source and filename and returning the reformatted source.
+	:param files: A list of ``(filename, source)`` pairs.
+	:param number: The number of times to reformat the files.
+	"""
+
+	if not files:
+		return '-'
+
+	def run() -> None:
+		for filename, source in files:
+			func(source, filename)
+
+	run()  # warm up any caches, such as the isort and yapf configuration
+	return f"{timeit.timeit(run, number=number) / number * 1000:.2f}"
+
+
+def main() -> None:  # noqa: D103
+	parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+	parser.add_argument("--number", type=int, default=3, help="The number of times to run each benchmark.")
+	parser.add_argument("--hook", action="append", dest="hooks", help="Only benchmark the given hook(s).")
+	parser.add_argument("--corpus", action="append", dest="corpora", help="Only use the given corpus (corpora).")
+	args = parser.parse_args()
+
+	pipeline = Pipeline.from_config(config)
+	corpora = get_corpora()
+
+	if args.corpora:
+		corpora = {name: corpora[name] for name in args.corpora}
+
+	results: Dict[str, Dict[str, str]] = {}
+
+	with in_directory(repo_root):
+		for hook in pipeline.hooks:
+			if args.hooks and hook.name not in args.hooks:
+				continue
+
+			results[hook.name] = {}
+			for corpus_name, files in corpora.items():
+				files = [(f, s) for f, s in files if PathPlus(f).suffix in hook.supported_filetypes]
+				results[hook.name][corpus_name] = time_call(hook, files, args.number)
+
+		if not args.hooks:
+
+			def call_pipeline(source: str, filename: str) -> str:
+				return call_hooks(pipeline.get_hooks_for_filetype(PathPlus(filename).suffix), source, filename)
+
+			results["(pipeline)"] = {
+					corpus_name: time_call(call_pipeline, files, args.number)
+					for corpus_name,
+					files in corpora.items()
+					}
+
+	name_width = max(len(name) for name in results)
+	print(f"{'Time (ms)':<{name_width}}  " + "  ".join(f"{name:>10}" for name in corpora))
+	for name, times in results.items():
+		print(f"{name:<{name_width}}  " + "  ".join(f"{times[corpus]:>10}" for corpus in corpora))
+
+
+if __name__ == "__main__":
+	main()
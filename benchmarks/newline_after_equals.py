@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+#
+#  newline_after_equals.py
+"""
+Benchmark the ``newline_after_equals`` hook.
+
+Compares the single pass over the standard library's tokenizer with the previous approach,
+which copied every token from :mod:`tokenize_rt` into a new list and rebuilt the source from it.
+
+Requires ``tokenize-rt``, which ``formate`` itself no longer depends on.
+
+Run with ``python benchmarks/newline_after_equals.py``.
+"""
+
+# stdlib
+import timeit
+from collections import deque
+from typing import List
+
+# 3rd party
+import tokenize_rt  # type: ignore[import-untyped]
+
+# this package
+from formate.mini_hooks import newline_after_equals
+
+
+def _old_newline_after_equals(source: str) -> str:
+	# The implementation used by formate 1.2.
+	original_tokens = deque(tokenize_rt.src_to_tokens(source))
+	tokens = []
+
+	while original_tokens:
+		token = original_tokens.popleft()
+
+		if token.name == "OP" and token.src == '=':
+			next_token = original_tokens.popleft()
+
+			if next_token.name == "NL":
+				while True:
+					next_token = original_tokens.popleft()
+					if next_token.name not in {"UNIMPORTANT_WS", "NL"}:
+						break
+
+			tokens.append(token)
+			tokens.append(next_token)
+
+		else:
+			tokens.append(token)
+
+	return tokenize_rt.tokens_to_src(tokens)
+
+
+def make_source(functions: int, broken: int) -> str:
+	"""
+	Returns source containing ``functions`` functions, each calling another with keyword arguments.
+
+	The first ``broken`` functions have a newline after each equals sign.
+
+	:param functions:
+	:param broken:
+	"""
+
+	lines: List[str] = []
+
+	for idx in range(functions):
+		separator = "=\n\t\t\t" if idx < broken else '='
+		lines.append(f"def function_{idx}(value: int = {idx}) -> str:")
+		lines.append(f'\t"""Returns the {idx}th value."""')
+		lines.append(f"\treturn format_value(\n\t\t\tvalue,\n\t\t\tprefix{separator}'value_{idx}',")
+		lines.append(f"\t\t\tsuffix{separator}str(value * {idx}),\n\t\t\t)")
+		lines.append('')
+
+	return '\n'.join(lines)
+
+
+def main() -> None:  # noqa: D103
+	for functions, broken in [(100, 1), (100, 100), (5000, 1), (5000, 5000)]:
+		source = make_source(functions, broken)
+		assert newline_after_equals(source) == _old_newline_after_equals(source)
+
+		number = 5
+		old = timeit.timeit(lambda: _old_newline_after_equals(source), number=number) / number
+		new = timeit.timeit(lambda: newline_after_equals(source), number=number) / number
+		print(f"functions={functions:<5} broken={broken:<5} old={old * 1000:8.2f}ms new={new * 1000:8.2f}ms")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+#
+#  yapf_nested_fixup.py
+"""
+Benchmark the fixup for commas between closing brackets which yapf collapses onto one line.
+
+Compares the single-pass fixup with the previous approach,
+which searched the whole output again after each round of replacements.
+
+Run with ``python benchmarks/yapf_nested_fixup.py``.
+"""
+
+# stdlib
+import re
+import timeit
+
+# this package
+from formate import _fix_yapf_nested_commas
+
+# The pattern and loop used by formate 1.2.
+_old_pattern = re.compile(r"(\n[ \t]*)([)}\]]*)([)}\]], )([)}\]])")
+
+
+def _old_fix_yapf_nested_commas(reformatted_code: str) -> str:
+	while True:
+		matches = _old_pattern.findall(reformatted_code)
+		if not matches:
+			break
+
+		for match in matches:
+			bad_pattern = match[0] + match[1] + match[2] + match[3]
+			good_pattern = match[0] + match[1] + match[2][0] + match[3]
+			reformatted_code = reformatted_code.replace(bad_pattern, good_pattern)
+
+	return reformatted_code
+
+
+def make_source(depth: int, repeats: int) -> str:
+	"""
+	Returns source containing ``repeats`` calls nested ``depth`` deep, as output by yapf.
+
+	Each call ends with a line of closing brackets separated by commas.
+
+	:param depth:
+	:param repeats:
+	"""
+
+	lines = []
+
+	for idx in range(repeats):
+		lines.append(f"value_{idx} = " + "foo(" * depth + "bar,")
+		lines.append("\t\t" + ", ".join(')' * depth))
+
+	return '\n'.join(lines) + '\n'
+
+
+def main() -> None:  # noqa: D103
+	for depth, repeats in [(5, 100), (50, 100), (200, 100)]:
+		source = make_source(depth, repeats)
+		assert _fix_yapf_nested_commas(source) == _old_fix_yapf_nested_commas(source)
+
+		number = 5
+		old = timeit.timeit(lambda: _old_fix_yapf_nested_commas(source), number=number) / number
+		new = timeit.timeit(lambda: _fix_yapf_nested_commas(source), number=number) / number
+		print(f"depth={depth:<4} repeats={repeats:<5} old={old * 1000:9.2f}ms new={new * 1000:7.2f}ms")
+
+
+if __name__ == "__main__":
+	main()
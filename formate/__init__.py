@@ -27,25 +27,41 @@ Python formatting mate.
 #
 
 # stdlib
+import difflib
+import json
+import os
 import re
+import threading
 from configparser import ConfigParser
-from typing import Iterable, Mapping, Optional, Sequence
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Type
 
 # 3rd party
-import click
-import isort
-from consolekit.terminal_colours import ColourTrilean, resolve_color_default
-from consolekit.utils import coloured_diff
-from domdf_python_tools.paths import PathPlus, TemporaryPathPlus
+from domdf_python_tools.paths import PathPlus
 from domdf_python_tools.stringlist import StringList
 from domdf_python_tools.typing import PathLike
 from domdf_python_tools.words import TAB
-from isort.exceptions import FileSkipComment
 
 # this package
 from formate.classes import FormateConfigDict, Hook
-from formate.config import get_hooks_for_filetype, parse_hooks, wants_filename, wants_global_config
-from formate.utils import _find_from_parents, syntaxerror_for_file
+from formate.config import parse_hooks, wants_filename, wants_global_config, wants_lines
+from formate.exceptions import NotIdempotentError
+from formate.pipeline import Pipeline
+from formate.profiling import _active_profiler
+from formate.utils import (
+		FusedRewriter,
+		Rewriter,
+		_find_from_parents,
+		_parse_cache,
+		atomic_write,
+		parse_cache,
+		parse_source,
+		syntaxerror_for_file
+		)
+
+if TYPE_CHECKING:
+	# 3rd party
+	import isort
+	from consolekit.terminal_colours import ColourTrilean
 
 __author__: str = "Dominic Davis-Foster"
 __copyright__: str = "2020-2021 Dominic Davis-Foster"
@@ -53,7 +69,7 @@ __license__: str = "MIT License"
 __version__: str = "1.2.1"
 __email__: str = "dominic@davis-foster.co.uk"
 
-__all__ = ("call_hooks", "reformat_file", "Reformatter", "isort_hook", "yapf_hook")
+__all__ = ("call_hooks", "format_source", "reformat_file", "Reformatter", "isort_hook", "yapf_hook")
 
 # TODO: Ideas for hooks
 # * https://github.com/asottile/add-trailing-comma
@@ -65,25 +81,173 @@ __all__ = ("call_hooks", "reformat_file", "Reformatter", "isort_hook", "yapf_hoo
 # * replace `exit()` with `sys.exit()` and add import if required
 
 
-def call_hooks(hooks: Iterable[Hook], source: str, filename: PathLike) -> str:
+def call_hooks(
+		hooks: Iterable[Hook],
+		source: str,
+		filename: PathLike,
+		lines: Optional[Sequence[Tuple[int, int]]] = None,
+		) -> str:
 	"""
 	Given a list of hooks (in order), call them in turn to reformat the source.
 
 	:param hooks:
 	:param source: The source to reformat.
 	:param filename: The name of the source file.
+	:param lines: The ranges of lines to reformat, for hooks which support it.
+		:py:obj:`None` reformats the whole file.
 
 	:returns: The reformatted source.
 
 	.. versionchanged:: 0.4.3  Added the ``filename`` argument.
+	.. versionchanged:: 1.3.0  Hooks which leave the source unchanged share the parsed source with the next hook.
+	.. versionchanged:: 1.3.0  Consecutive hooks which use a :class:`~.Rewriter` are applied in a single pass.
+	.. versionchanged:: 1.3.0  Added the ``lines`` argument.
+	.. versionchanged:: 1.3.0  The calls are recorded if a :func:`~.profile_hooks` block is active.
+	.. versionchanged:: 1.3.0  Hooks are skipped if their :deco:`~formate.config.applies_if` check fails.
+	.. versionchanged:: 1.3.0  The ``lines`` are moved to follow lines added or removed by earlier hooks.
 	"""
 
-	for hook in hooks:
-		source = hook(source, filename)
+	# Consecutive hooks which can be applied together with a FusedRewriter, and their Rewriter classes.
+	fusable_hooks: List[Tuple[Hook, Type[Rewriter]]] = []
+
+	def move_lines(source: str, reformatted_source: str) -> str:
+		# Hooks which don't reformat by line may still add or remove lines (e.g. isort's import headings),
+		# so the ranges are moved to where those lines now are for the hooks which come after.
+		nonlocal lines
+
+		if lines and reformatted_source != source:
+			lines = _remap_lines(lines, source, reformatted_source)
+
+		return reformatted_source
+
+	def call_fusable_hooks(source: str) -> str:
+		original_source = source
+
+		if len(fusable_hooks) == 1:
+			source = fusable_hooks[0][0](source, filename)
+		elif fusable_hooks:
+			rewriters = [rewriter for _, rewriter in fusable_hooks]
+			profiler = _active_profiler.get()
+
+			if profiler is None:
+				source = FusedRewriter(source, rewriters).rewrite()
+			else:
+				name = '+'.join(hook.name for hook, _ in fusable_hooks)
+				source = profiler.call(name, filename, lambda s: FusedRewriter(s, rewriters).rewrite(), source)
+
+		fusable_hooks.clear()
+		return move_lines(original_source, source)
+
+	with parse_cache():
+		for hook in hooks:
+			rewriter = _get_rewriter(hook)
+
+			if rewriter is not None:
+				# Hooks which will be fused are checked against the source the FusedRewriter will be given.
+				if hook.is_applicable(source):
+					fusable_hooks.append((hook, rewriter))
+				continue
+
+			# Other hooks are checked against the output of the hooks before them.
+			source = call_fusable_hooks(source)
+
+			if hook.is_applicable(source):
+				source = move_lines(source, hook(source, filename, lines))
+
+		source = call_fusable_hooks(source)
 
 	return source
 
 
+def _remap_lines(
+		lines: Sequence[Tuple[int, int]],
+		source: str,
+		reformatted_source: str,
+		) -> List[Tuple[int, int]]:
+	# Returns the ranges of lines in reformatted_source which correspond to the given ranges in source.
+	# Lines inserted within a range, or replacing lines in a range, are included in it.
+	# Ranges whose lines were all removed are dropped.
+
+	matcher = difflib.SequenceMatcher(None, source.splitlines(), reformatted_source.splitlines(), autojunk=False)
+	opcodes = matcher.get_opcodes()
+	remapped = []
+
+	for start, end in lines:
+		# Zero-based, half-open range of lines in the original source.
+		first, last = start - 1, end
+		new_lines: List[int] = []
+
+		for tag, i1, i2, j1, j2 in opcodes:
+			if tag == "equal":
+				if i1 < last and i2 > first:
+					new_lines.append(j1 + max(first, i1) - i1)
+					new_lines.append(j1 + min(last, i2) - i1 - 1)
+			elif tag == "insert":
+				if first < i1 < last:
+					new_lines.extend((j1, j2 - 1))
+			elif tag == "replace":
+				if i1 < last and i2 > first:
+					new_lines.extend((j1, j2 - 1))
+
+		if new_lines:
+			remapped.append((min(new_lines) + 1, max(new_lines) + 1))
+
+	return remapped
+
+
+def format_source(
+		source: str,
+		filename: PathLike,
+		pipeline: Pipeline,
+		lines: Optional[Sequence[Tuple[int, int]]] = None,
+		) -> Tuple[str, bool]:
+	"""
+	Reformat the given source without reading from or writing to the filesystem.
+
+	.. versionadded:: 1.3.0
+
+	:param source: The source to reformat.
+	:param filename: The name of the source file, which need not exist.
+		This determines which hooks are run, and is passed to hooks which request it.
+	:param pipeline: The hooks to run.
+		The same :class:`~.Pipeline` should be reused when reformatting many sources.
+	:param lines: The ranges of lines to reformat, for hooks which support it.
+		:py:obj:`None` reformats the whole file.
+
+	:returns: The reformatted source, and whether it differs from ``source``.
+
+	:raises: :exc:`~.NoSupportedHooksError` if no hooks support the filetype.
+	:raises: :exc:`SyntaxError` if ``filename`` is a Python file and ``source`` isn't valid Python.
+	"""
+
+	path = PathPlus(filename)
+	hooks = pipeline.get_hooks_for_filetype(path.suffix)
+
+	with syntaxerror_for_file(filename), parse_cache():
+		reformatted_source = StringList(call_hooks(hooks, source, path.as_posix(), lines))
+
+		if path.suffix in {".py", ".pyi"} and not _parse_cache.get():
+			# None of the hooks parsed the source (e.g. as their applies_if checks failed),
+			# but syntax errors are still reported.
+			parse_source(source)
+
+	reformatted_source.blankline(ensure_single=True)
+
+	return str(reformatted_source), str(reformatted_source) != source
+
+
+def _get_rewriter(hook: Hook) -> Optional[Type[Rewriter]]:
+	# Returns the Rewriter subclass used by the hook, if it declares one and takes no arguments.
+
+	if hook.entry_point is None or hook.args or hook.kwargs:
+		return None
+
+	if getattr(hook.entry_point.obj, "wants_lines", False):
+		return None
+
+	return getattr(hook.entry_point.obj, "rewriter", None)
+
+
 isort_string_or_sequence = {
 		"skip",
 		"skip_glob",
@@ -112,29 +276,46 @@ isort_string_or_sequence = {
 		}
 # TODO: known_other, dict
 
+# isort configurations, keyed on the arguments to :func:`~.isort_hook` and whether the file is a stub.
+_isort_configs: Dict[str, "isort.Config"] = {}
 
-@wants_filename
-@wants_global_config
-def isort_hook(
-		source: str,
-		formate_filename: PathLike,
-		formate_global_config: Optional[Mapping] = None,
-		**kwargs,
-		) -> str:
-	r"""
-	Call `isort <https://pypi.org/project/isort/>`_, using the given keyword arguments as its configuration.
 
-	:param source: The source to reformat.
-	:param formate_filename: The path to the file being reformatted.
-	:param formate_global_config: The global configuration dictionary. Optional.
-	:param \*\*kwargs:
+def _get_isort_config(
+		formate_global_config: Optional[Mapping],
+		kwargs: Dict[str, Any],
+		stub: bool,
+		) -> "isort.Config":
+	# Returns the isort configuration, which is only constructed once for each set of arguments.
 
-	:returns: The reformatted source.
-	"""
+	# 3rd party
+	import isort
+
+	key: Dict[str, Any] = {"kwargs": kwargs, "global_config": dict(formate_global_config or {}), "stub": stub}
 
 	if "isort_config_file" in kwargs:
+		# Pick up changes to the settings file.
+		settings_file = os.path.abspath(kwargs["isort_config_file"])
+		try:
+			key["isort_config_file"] = [settings_file, os.stat(settings_file).st_mtime_ns]
+		except OSError:
+			key["isort_config_file"] = [settings_file, None]
+
+	cache_key = json.dumps(key, sort_keys=True, default=str)
+
+	if cache_key in _isort_configs:
+		return _isort_configs[cache_key]
+
+	if stub:
+		isort_config = isort.Config(
+				config=_get_isort_config(formate_global_config, kwargs, stub=False),
+				remove_redundant_aliases=False,
+				)
+
+	elif "isort_config_file" in kwargs:
 		isort_config = isort.Config(settings_file=str(kwargs["isort_config_file"]))
 	else:
+		kwargs = dict(kwargs)
+
 		if "line_length" not in kwargs and formate_global_config:
 			if "line_length" in (formate_global_config or {}):
 				kwargs["line_length"] = formate_global_config["line_length"]
@@ -162,8 +343,41 @@ def isort_hook(
 
 		isort_config = isort.Config(import_headings=import_headings, **parsed_kwargs)
 
-	if PathPlus(formate_filename).suffix == ".pyi":
-		object.__setattr__(isort_config, "remove_redundant_aliases", False)
+	_isort_configs[cache_key] = isort_config
+
+	return isort_config
+
+
+@wants_filename
+@wants_global_config
+def isort_hook(
+		source: str,
+		formate_filename: PathLike,
+		formate_global_config: Optional[Mapping] = None,
+		**kwargs,
+		) -> str:
+	r"""
+	Call `isort <https://pypi.org/project/isort/>`_, using the given keyword arguments as its configuration.
+
+	:param source: The source to reformat.
+	:param formate_filename: The path to the file being reformatted.
+	:param formate_global_config: The global configuration dictionary. Optional.
+	:param \*\*kwargs:
+
+	:returns: The reformatted source.
+
+	.. versionchanged:: 1.3.0
+
+		The :class:`isort.Config` is constructed once for each set of arguments.
+		The settings file is only read again if it is modified.
+	"""
+
+	# 3rd party
+	import isort
+	from isort.exceptions import FileSkipComment
+
+	stub = PathPlus(formate_filename).suffix == ".pyi"
+	isort_config = _get_isort_config(formate_global_config, kwargs, stub=stub)
 
 	try:
 		return isort.code(source, config=isort_config)
@@ -171,78 +385,137 @@ def isort_hook(
 		return source
 
 
+# A run of closing brackets at the start of a line, possibly separated by commas.
 # e.g. " )⸴ )" or " )))), )"
-yapf_nested_fixup_pattern = re.compile(r"(\n[ \t]*)([)}\]]*)([)}\]], )([)}\]])")
+yapf_nested_fixup_pattern = re.compile(r"(\n[ \t]*)([)}\]](?:(?:, )?[)}\]])*)")
+
+
+def _fix_yapf_nested_commas(reformatted_code: str) -> str:
+	# Yapf can collapse nested calls onto one line but does nothing about the commas.
+	# Every comma in a run of closing brackets at the start of a line is removed, in a single pass.
+
+	def remove_commas(match: "re.Match[str]") -> str:
+		return match.group(1) + match.group(2).replace(", ", '')
+
+	return yapf_nested_fixup_pattern.sub(remove_commas, reformatted_code)
+
+
+# The resolved paths of yapf style files, keyed on the working directory and the ``yapf_style`` argument.
+_yapf_style_files: Dict[Tuple[str, str], PathPlus] = {}
+
+# The options for yapf's style, keyed on the arguments to :func:`~.yapf_hook`.
+_yapf_styles: Dict[str, Dict[str, str]] = {}
+
+# yapf keeps the style in a global variable while it reformats, so only one thread can use it at a time.
+_yapf_lock = threading.Lock()
+
+
+def _get_yapf_style(formate_global_config: Optional[Mapping], kwargs: Dict[str, Any]) -> Dict[str, str]:
+	# Returns the options for yapf's style, which are only computed once for each configuration.
+	# The result must not be modified.
+
+	key: Dict[str, Any] = {"kwargs": kwargs, "global_config": dict(formate_global_config or {})}
+
+	if "yapf_style" in kwargs:
+		style_file_key = (os.getcwd(), str(kwargs["yapf_style"]))
+
+		if style_file_key not in _yapf_style_files:
+			# yapf_style may be a filename or the name of a style
+			# If `yapf_style` is a filename (or the name of a style, as opposed to a path), look in CWD and parent directories
+			_yapf_style_files[style_file_key] = _find_from_parents(PathPlus(kwargs["yapf_style"])).abspath()
+
+		yapf_style = _yapf_style_files[style_file_key]
 
+		# Pick up changes to the style file.
+		key["yapf_style"] = [yapf_style.as_posix(), yapf_style.stat().st_mtime_ns]
 
+	cache_key = json.dumps(key, sort_keys=True, default=str)
+
+	if cache_key in _yapf_styles:
+		return _yapf_styles[cache_key]
+
+	config = ConfigParser()
+
+	if "yapf_style" in kwargs:
+		with yapf_style.open() as fp:
+			config.read_file(fp)
+
+		if "use_tabs" not in config["style"] and formate_global_config:
+			if "indent" in (formate_global_config or {}):
+				config["style"]["use_tabs"] = str(formate_global_config["indent"] == TAB)
+
+		if "column_limit" not in config["style"] and formate_global_config:
+			if "line_length" in (formate_global_config or {}):
+				config["style"]["column_limit"] = str(formate_global_config["line_length"])
+
+	else:
+		kwargs = dict(kwargs)
+
+		if "use_tabs" not in kwargs and formate_global_config:
+			if "indent" in (formate_global_config or {}):
+				kwargs["use_tabs"] = formate_global_config["indent"] == TAB
+
+		if "column_limit" not in kwargs and formate_global_config:
+			if "line_length" in (formate_global_config or {}):
+				kwargs["column_limit"] = formate_global_config["line_length"]
+
+		config.read_dict({"style": kwargs})
+
+	_yapf_styles[cache_key] = dict(config["style"])
+
+	return _yapf_styles[cache_key]
+
+
+@wants_lines
 @wants_global_config
-def yapf_hook(source: str, formate_global_config: Optional[Mapping] = None, **kwargs) -> str:
+def yapf_hook(
+		source: str,
+		formate_global_config: Optional[Mapping] = None,
+		formate_lines: Optional[Sequence[Tuple[int, int]]] = None,
+		**kwargs,
+		) -> str:
 	r"""
 	Call `yapf <https://github.com/google/yapf>`_, using the given keyword arguments as its configuration.
 
 	:param source: The source to reformat.
 	:param formate_global_config: The global configuration dictionary. Optional.
+	:param formate_lines: The ranges of lines to reformat. If :py:obj:`None` the whole source is reformatted.
 	:param \*\*kwargs:
 
 	If ``yapf_style`` is given as a keyword argument, use that style.
 	If a filename is given as the style it is searched for in the current and parent directories, and the style taken from the configuration in that file.
 
 	:returns: The reformatted source.
-	"""
-
-	# 3rd party
-	from yapf.pytree.pytree_utils import ParseCodeToTree  # type: ignore[import-untyped]
-	from yapf.yapflib.yapf_api import FormatTree  # type: ignore[import-untyped]
 
-	with TemporaryPathPlus() as tmpdir:
-		config_file = tmpdir / ".style.yapf"
-		config = ConfigParser()
+	.. versionchanged:: 1.3.0
 
-		if "yapf_style" in kwargs:
-			# yapf_style may be a filename or the name of a style
-			# If `yapf_style` is a filename (or the name of a style, as opposed to a path), look in CWD and parent directories
-			yapf_style = _find_from_parents(PathPlus(kwargs["yapf_style"]))
-
-			with yapf_style.open() as fp:
-				config.read_file(fp)
+		The style is computed once for each configuration and passed to yapf directly,
+		rather than through a temporary file.
+		The style file is only read again if it is modified.
+		The commas in nested brackets which yapf collapses onto one line are fixed in a single pass.
 
-			if "use_tabs" not in config["style"] and formate_global_config:
-				if "indent" in (formate_global_config or {}):
-					config["style"]["use_tabs"] = str(formate_global_config["indent"] == TAB)
+	.. versionchanged:: 1.3.0  Added the ``formate_lines`` argument.
+	.. versionchanged:: 1.3.0
 
-			if "column_limit" not in config["style"] and formate_global_config:
-				if "line_length" in (formate_global_config or {}):
-					config["style"]["column_limit"] = str(formate_global_config["line_length"])
-
-		else:
-			if "use_tabs" not in kwargs and formate_global_config:
-				if "indent" in (formate_global_config or {}):
-					kwargs["use_tabs"] = formate_global_config["indent"] == TAB
+		Calls from different threads are run one at a time, as yapf's style is shared between threads.
+		Use a :class:`~concurrent.futures.ProcessPoolExecutor` to reformat several files with yapf in parallel.
+	"""
 
-			if "column_limit" not in kwargs and formate_global_config:
-				if "line_length" in (formate_global_config or {}):
-					kwargs["column_limit"] = formate_global_config["line_length"]
+	# 3rd party
+	from yapf.pytree.pytree_utils import ParseCodeToTree  # type: ignore[import-untyped]
+	from yapf.yapflib.yapf_api import FormatTree  # type: ignore[import-untyped]
 
-			config.read_dict({"style": kwargs})
+	if formate_lines is not None and not formate_lines:
+		# yapf treats an empty list as meaning every line.
+		return source
 
-		with config_file.open('w') as fp:
-			config.write(fp)
+	style_config = _get_yapf_style(formate_global_config, kwargs)
 
+	with _yapf_lock:
 		tree = ParseCodeToTree(source)
-		reformatted_code: str = FormatTree(tree, style_config=str(config_file))
-
-		# Yapf can collapse nested calls onto one line but does nothing about the commas.
-		while True:
-			matches = yapf_nested_fixup_pattern.findall(reformatted_code)
-			if not matches:
-				break
+		reformatted_code: str = FormatTree(tree, style_config=style_config, lines=formate_lines)
 
-			for match in matches:
-				bad_pattern = match[0] + match[1] + match[2] + match[3]
-				good_pattern = match[0] + match[1] + match[2][0] + match[3]
-				reformatted_code = reformatted_code.replace(bad_pattern, good_pattern)
-
-		return reformatted_code
+	return _fix_yapf_nested_commas(reformatted_code)
 
 
 class Reformatter:
@@ -251,6 +524,12 @@ class Reformatter:
 
 	:param filename: The filename to reformat.
 	:param config: The ``formate`` configuration, parsed from a TOML file (or similar).
+	:param pipeline: The hooks to run. If not given they are resolved from ``config`` when :meth:`~.run` is called.
+	:param source: The source to reformat. If not given it is read from ``filename``.
+	:param lines: The ranges of lines to reformat, for hooks which support it.
+		:py:obj:`None` reformats the whole file.
+
+	.. versionchanged:: 1.3.0  Added the ``pipeline``, ``source`` and ``lines`` arguments.
 
 	.. autosummary-widths:: 5/16
 	"""
@@ -267,29 +546,80 @@ class Reformatter:
 	#: The ``formate`` configuration, parsed from a TOML file (or similar).
 	config: FormateConfigDict
 
-	def __init__(self, filename: PathLike, config: FormateConfigDict):
+	#: The hooks to run.
+	pipeline: Optional[Pipeline]
+
+	#: The ranges of lines to reformat, or :py:obj:`None` to reformat the whole file.
+	lines: Optional[Sequence[Tuple[int, int]]]
+
+	def __init__(
+			self,
+			filename: PathLike,
+			config: FormateConfigDict,
+			pipeline: Optional[Pipeline] = None,
+			source: Optional[str] = None,
+			lines: Optional[Sequence[Tuple[int, int]]] = None,
+			):
 		self.file_to_format = PathPlus(filename)
 		self.filename = self.file_to_format.as_posix()
 		self.filetype = self.file_to_format.suffix
 		self.config = config
-		self._unformatted_source = self.file_to_format.read_text()
+		self.pipeline = pipeline
+		self.lines = lines
+
+		if source is None:
+			source = self.file_to_format.read_text()
+
+		self._unformatted_source = source
 		self._reformatted_source: Optional[str] = None
 
-	def run(self) -> bool:
+	def run(self, verify_idempotent: bool = False) -> bool:
 		"""
 		Run the reformatter.
 
+		:param verify_idempotent: Whether to reformat the reformatted source again,
+			to check the hooks leave it unchanged.
+
 		:return: Whether the file was changed.
+
+		:raises: :exc:`~.NotIdempotentError` if ``verify_idempotent`` is :py:obj:`True`
+			and reformatting the source again changes it.
+			The source from the first pass is still available from :meth:`~.to_string`.
+
+		.. versionchanged:: 1.3.0  Added the ``verify_idempotent`` argument.
 		"""
 
-		hooks = parse_hooks(self.config)
-		hooks = get_hooks_for_filetype(self.filetype, hooks)
-		reformatted_source = StringList(call_hooks(hooks, self._unformatted_source, self.filename))
-		reformatted_source.blankline(ensure_single=True)
+		if self.pipeline is None:
+			self.pipeline = Pipeline(parse_hooks(self.config))
+
+		source = self._unformatted_source
+		self._reformatted_source, changed = format_source(source, self.filename, self.pipeline, self.lines)
+
+		# A source the hooks left unchanged is already known to be stable.
+		if verify_idempotent and changed:
+			self._verify_idempotent()
+
+		return changed
+
+	def _verify_idempotent(self) -> None:
+		assert self.pipeline is not None
+
+		source = self.to_string()
+		if not format_source(source, self.filename, self.pipeline, self.lines)[1]:
+			return
+
+		# Run the hooks one at a time to find which one changed the source.
+		for hook in self.pipeline.get_hooks_for_filetype(self.filetype):
+			with syntaxerror_for_file(self.filename):
+				reformatted_source = StringList(call_hooks([hook], source, self.filename, self.lines))
 
-		self._reformatted_source = str(reformatted_source)
+			reformatted_source.blankline(ensure_single=True)
 
-		return self._reformatted_source != self._unformatted_source
+			if str(reformatted_source) != source:
+				raise NotIdempotentError(self.filename, hook.name)
+
+		# Only the hooks together change the source.
+		raise NotIdempotentError(self.filename, None)
 
 	def get_diff(self) -> str:
 		"""
@@ -299,6 +629,9 @@ class Reformatter:
 		# Based on yapf
 		# Apache 2.0 License
 
+		# 3rd party
+		from consolekit.utils import coloured_diff
+
 		after = self.to_string().split('\n')
 		before = self._unformatted_source.split('\n')
 		return coloured_diff(
@@ -325,18 +658,32 @@ class Reformatter:
 
 		return self._reformatted_source
 
-	def to_file(self) -> None:
+	def to_file(self, fsync: bool = False) -> bool:
 		"""
 		Write the reformatted source to the original file.
+
+		The file is replaced atomically, and is left untouched (keeping its modification time)
+		if its content is already the same as the reformatted source.
+
+		:param fsync: Whether to flush the file to disk before replacing the original.
+
+		:returns: Whether the file was written to.
+
+		.. versionchanged:: 1.3.0
+
+			* The file is replaced atomically, and only if its content differs.
+			* Added the ``fsync`` argument.
+			* Returns whether the file was written to.
 		"""
 
-		self.file_to_format.write_text(self.to_string())
+		return atomic_write(self.file_to_format, self.to_string().encode("UTF-8"), fsync=fsync)
 
 
 def reformat_file(
 		filename: PathLike,
 		config: FormateConfigDict,
-		colour: ColourTrilean = None,
+		colour: "ColourTrilean" = None,
+		pipeline: Optional[Pipeline] = None,
 		) -> int:
 	"""
 	Reformat the given file, and show the diff if changes were made.
@@ -344,11 +691,18 @@ def reformat_file(
 	:param filename: The filename to reformat.
 	:param config: The ``formate`` configuration, parsed from a TOML file (or similar).
 	:param colour: Whether to force coloured output on (:py:obj:`True`) or off (:py:obj:`False`).
+	:param pipeline: The hooks to run. If not given they are resolved from ``config``.
+
+	.. versionchanged:: 1.3.0  Added the ``pipeline`` argument.
 
 	.. latex:clearpage::
 	"""
 
-	r = Reformatter(filename, config)
+	# 3rd party
+	import click
+	from consolekit.terminal_colours import resolve_color_default
+
+	r = Reformatter(filename, config, pipeline=pipeline)
 
 	with syntaxerror_for_file(filename):
 		ret = r.run()
@@ -27,8 +27,26 @@ CLI entry point.
 #
 
 # stdlib
+import collections
+import itertools
+import os
 import sys
-from typing import Iterable, List, Optional
+from contextlib import ExitStack
+from typing import (
+		TYPE_CHECKING,
+		Any,
+		Callable,
+		Deque,
+		Dict,
+		Generator,
+		Iterable,
+		Iterator,
+		List,
+		Mapping,
+		Optional,
+		Sequence,
+		Tuple
+		)
 
 # 3rd party
 import click
@@ -39,10 +57,27 @@ from consolekit.tracebacks import handle_tracebacks, traceback_option
 from domdf_python_tools.typing import PathLike
 
 # this package
+from formate._reformat import reformat_path
 from formate.config import NoSupportedHooksError
+from formate.exceptions import NotIdempotentError
+
+if TYPE_CHECKING:
+	# stdlib
+	from concurrent.futures import Future
+
+	# 3rd party
+	from domdf_python_tools.paths import PathPlus
+
+	# this package
+	from formate.cache import Cache
+	from formate.classes import FormateConfigDict
+	from formate.pipeline import Pipeline
 
 __all__ = ("main", "version_callback")
 
+# The status of a file, the diff of the changes, and any error message, as returned by :func:`~.reformat_path`.
+_Outcome = Tuple[str, Optional[str], Optional[str]]
+
 
 def version_callback(ctx: click.Context, param: click.Option, value: int) -> None:  # noqa: PRM002
 	"""
@@ -64,18 +99,412 @@ def version_callback(ctx: click.Context, param: click.Option, value: int) -> Non
 	ctx.exit()
 
 
+def _reformat_stdin(
+		filename: str,
+		config: "FormateConfigDict",
+		show_traceback: bool,
+		show_diff: bool = False,
+		check: bool = False,
+		verify_idempotent: bool = False,
+		colour: "ColourTrilean" = None,
+		) -> int:
+	"""
+	Reformat the source read from standard input, and write the result to standard output.
+
+	The source is written unchanged if no hooks support the filetype.
+	If ``show_diff`` is :py:obj:`True` the diff of the changes is written instead,
+	and if ``check`` is :py:obj:`True` the source is not written at all.
+
+	:param filename: The filename to give to the hooks.
+	:param config: The ``formate`` configuration, parsed from a TOML file (or similar).
+	:param show_traceback: Whether to show the complete traceback on error.
+	:param show_diff: Whether to write a diff of the changes made rather than the reformatted source.
+	:param check: Only check whether the source needs reformatting.
+	:param verify_idempotent: Whether to reformat the source a second time, to check the output is stable.
+	:param colour: Whether to use coloured output for the diff.
+
+	:returns: The exit code. This is 1 if ``check`` is :py:obj:`True` and the source needs reformatting,
+		or if the output is not stable.
+	"""
+
+	# this package
+	from formate import Reformatter
+	from formate.pipeline import Pipeline
+	from formate.utils import SyntaxTracebackHandler
+
+	source = sys.stdin.read()
+	changed, unstable_message = False, None
+
+	with handle_tracebacks(show_traceback, cls=SyntaxTracebackHandler):
+		r = Reformatter(filename, config, Pipeline.from_config(config), source=source)
+
+		try:
+			changed = r.run(verify_idempotent=True) if verify_idempotent else r.run()
+		except NoSupportedHooksError:
+			pass
+		except NotIdempotentError as e:
+			changed, unstable_message = True, str(e)
+
+	if show_diff:
+		if changed:
+			click.echo(r.get_diff(), color=resolve_color_default(colour))
+	elif not check:
+		click.echo(r.to_string() if changed else source, nl=False)
+
+	if unstable_message is not None:
+		click.echo(unstable_message, err=True)
+		return 1
+
+	return int(check and changed)
+
+
+# The configuration, hooks and cache used by worker processes, set by :func:`~._init_worker`.
+_worker_config: Optional["FormateConfigDict"] = None
+_worker_pipeline: Optional["Pipeline"] = None
+_worker_cache: Optional["Cache"] = None
+
+
+def _init_worker(config: "FormateConfigDict", cache: Optional["Cache"]) -> None:
+	# this package
+	from formate.pipeline import Pipeline
+
+	global _worker_config, _worker_pipeline, _worker_cache
+	_worker_config = config
+	_worker_pipeline = Pipeline.from_config(config)
+	_worker_cache = cache
+
+
+def _reformat_path_in_worker(
+		path: PathLike,
+		show_diff: bool,
+		lines: Optional[Sequence[Tuple[int, int]]] = None,
+		check: bool = False,
+		verify_idempotent: bool = False,
+		) -> _Outcome:
+	assert _worker_config is not None
+	assert _worker_pipeline is not None
+	return reformat_path(
+			path,
+			_worker_config,
+			_worker_pipeline,
+			show_diff,
+			_worker_cache,
+			lines,
+			check,
+			verify_idempotent,
+			)
+
+
+def _serve(socket_path: Optional[PathLike], verbose: int, show_traceback: bool) -> None:
+	"""
+	Run the ``formate`` daemon until it is interrupted or terminated.
+
+	:param socket_path: The socket to listen on. Defaults to :func:`formate.daemon.get_default_socket_path`.
+	:param verbose: The verbosity level.
+	:param show_traceback: Whether to show the complete traceback on error.
+	"""
+
+	# stdlib
+	import signal
+
+	# this package
+	from formate.daemon import FormateDaemon, get_default_socket_path
+	from formate.utils import SyntaxTracebackHandler
+
+	with handle_tracebacks(show_traceback, cls=SyntaxTracebackHandler):
+		server = FormateDaemon(socket_path or get_default_socket_path())
+
+	if verbose:
+		click.echo(f"Listening on {server.socket_path.as_posix()}")
+
+	# Exit cleanly (removing the socket) when terminated.
+	signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+	with server:
+		try:
+			server.serve_forever()
+		except KeyboardInterrupt:
+			pass
+
+
+def _collect_paths(
+		filenames: Iterable[PathLike],
+		exclude: Iterable[str],
+		get_pipeline: Callable[[], "Pipeline"],
+		) -> List[Tuple["PathPlus", Optional[str]]]:
+	"""
+	Returns the files to reformat, searching directories for files supported by the hooks.
+
+	Each file is paired with the reason it is being skipped, or :py:obj:`None` if it is to be reformatted.
+
+	:param filenames: The files and directories given on the command line.
+	:param exclude: Patterns for files and directories to exclude.
+	:param get_pipeline: Returns the hooks to run, which determine the files found in directories.
+	"""
+
+	# 3rd party
+	from domdf_python_tools.paths import PathPlus
+
+	# this package
+	from formate.git import get_ignored_paths
+	from formate.utils import compile_exclude_patterns, is_excluded, iter_files
+
+	exclude_pattern = compile_exclude_patterns(exclude)
+	paths: List[Tuple[PathPlus, Optional[str]]] = []
+
+	for path in filenames:
+		if is_excluded(path, exclude_pattern):
+			continue
+
+		path = PathPlus(path)
+
+		if path.is_dir():  # pylint: disable=loop-invariant-statement
+			files = iter_files(path, get_pipeline().filetypes, exclude_pattern, get_ignored_paths(path))
+			paths.extend((file, None) for file in files)
+		elif not path.exists():  # pylint: disable=loop-invariant-statement
+			paths.append((path, f"Skipping {path} as it doesn't exist"))
+		else:
+			paths.append((path, None))
+
+	return paths
+
+
+def _lines_for(
+		changed_lines: Optional[Mapping[str, Optional[List[Tuple[int, int]]]]],
+		path: PathLike,
+		) -> Optional[List[Tuple[int, int]]]:
+	# Returns the lines to reformat in the file, or None to reformat all of it.
+
+	if changed_lines is None:
+		return None
+
+	# Files which were given explicitly but haven't changed have no lines to reformat.
+	return changed_lines.get(os.path.abspath(path), [])
+
+
+class _FileReformatter:
+	"""
+	Reformats the files for :func:`~.main`, either in this process, in worker processes, or with the daemon.
+
+	:meth:`~.get_outcome` must be called for each file in ``to_reformat`` in turn.
+
+	:param stack: Closes the daemon's responses or the worker processes when :func:`~.main` is finished.
+	:param to_reformat: The files to reformat.
+	:param config: The ``formate`` configuration, parsed from a TOML file (or similar).
+	:param pipeline: The hooks to run. Unused with the daemon.
+	:param cache: The cache of files known to be unchanged. Unused with the daemon.
+	:param daemon_responses: The responses from the daemon, if it is reformatting the files.
+	:param jobs: The number of worker processes.
+	:param changed_lines: The lines to reformat in each file, or :py:obj:`None` to reformat them in full.
+	:param show_diff: Whether to generate a diff of the changes made.
+	:param check: Only check whether the files need reformatting, without writing to them.
+	:param verify_idempotent: Whether to reformat changed files a second time, to check the output is stable.
+	"""
+
+	#: Reformat the given file, returning the status, diff and message from :func:`~.reformat_path`.
+	get_outcome: Callable[["PathPlus"], _Outcome]
+
+	def __init__(
+			self,
+			stack: ExitStack,
+			to_reformat: Sequence["PathPlus"],
+			config: "FormateConfigDict",
+			pipeline: Optional["Pipeline"],
+			cache: Optional["Cache"],
+			daemon_responses: Optional[Generator[Dict[str, Any], None, None]],
+			jobs: int,
+			changed_lines: Optional[Mapping[str, Optional[List[Tuple[int, int]]]]],
+			show_diff: bool,
+			check: bool,
+			verify_idempotent: bool,
+			):
+		self.config = config
+		self.pipeline = pipeline
+		self.cache = cache
+		self.jobs = jobs
+		self.changed_lines = changed_lines
+		self.show_diff = show_diff
+		self.check = check
+		self.verify_idempotent = verify_idempotent
+
+		# The files which have been submitted to the worker processes, and haven't been reported yet.
+		self._in_flight: Deque[Tuple["PathPlus", "Future[_Outcome]"]] = collections.deque()
+
+		if daemon_responses is not None:
+			stack.callback(daemon_responses.close)
+			self._daemon_responses = daemon_responses
+			self.get_outcome = self._get_daemon_outcome
+		elif jobs > 1 and len(to_reformat) > 1:
+			# stdlib
+			from concurrent.futures import ProcessPoolExecutor
+
+			self._executor = stack.enter_context(
+					ProcessPoolExecutor(
+							min(jobs, len(to_reformat)),
+							initializer=_init_worker,
+							initargs=(config, cache),
+							)
+					)
+			self._to_submit = iter(to_reformat)
+			self.get_outcome = self._get_worker_outcome
+		else:
+			self.get_outcome = self._get_local_outcome
+
+	def _get_local_outcome(self, path: "PathPlus") -> _Outcome:
+		assert self.pipeline is not None
+
+		return reformat_path(
+				path,
+				self.config,
+				self.pipeline,
+				self.show_diff,
+				self.cache,
+				_lines_for(self.changed_lines, path),
+				self.check,
+				self.verify_idempotent,
+				)
+
+	def _get_daemon_outcome(self, path: "PathPlus") -> _Outcome:
+		# this package
+		from formate.daemon import error_from_response
+
+		# The daemon responds in the order the files were given.
+		response = next(self._daemon_responses)
+
+		if "error" in response:
+			raise error_from_response(response)
+
+		return response["status"], response["diff"], response["message"]
+
+	def _get_worker_outcome(self, path: "PathPlus") -> _Outcome:
+		# Only around one file per worker is submitted at a time, and the next ones are only submitted
+		# once the previous result has been reported, so none are started after one fails with --fail-fast.
+		for next_path in itertools.islice(self._to_submit, self.jobs - len(self._in_flight)):
+			lines = _lines_for(self.changed_lines, next_path)
+			args = (next_path, self.show_diff, lines, self.check, self.verify_idempotent)
+			self._in_flight.append((next_path, self._executor.submit(_reformat_path_in_worker, *args)))
+
+		submitted_path, future = self._in_flight.popleft()
+		assert submitted_path == path
+
+		return future.result()
+
+	def get_unfinished(self) -> Iterator[Tuple["PathPlus", Callable[[], _Outcome]]]:
+		"""
+		Returns the files which the worker processes had already started on, and a function to wait for each outcome.
+
+		The files which haven't been started yet are cancelled.
+		"""
+
+		for path, future in self._in_flight:
+			if not future.cancel():
+				yield path, future.result
+
+
 @version_option(version_callback)
+@flag_option(
+		"--fail-fast",
+		"fail_fast",
+		help="Stop as soon as a file is found which needs reformatting. Files already being reformatted are finished.",
+		)
+@flag_option(
+		"--verify-idempotent",
+		"verify_idempotent",
+		help=(
+				"Reformat each changed file a second time, and report any hooks which change it again. "
+				"Files which are stable are skipped by later runs."
+				),
+		)
+@flag_option(
+		"--fsync",
+		"fsync",
+		help="Flush the reformatted files to disk before exiting, rather than leaving it to the operating system.",
+		)
+@flag_option(
+		"--check",
+		"check",
+		help="Don't write the reformatted files back to disk. The exit code is 1 if any files need reformatting.",
+		)
 @flag_option("--diff", "show_diff", help="Show a diff of changes made")
+@flag_option("--no-cache", "no_cache", help="Don't skip files which were unchanged on a previous run.")
+@click.option(
+		"--cache-dir",
+		type=click.STRING,
+		envvar="FORMATE_CACHE_DIR",
+		help="The directory to store the cache of unchanged files in. Defaults to ~/.cache/formate",
+		)
+@flag_option(
+		"--daemon",
+		"daemon",
+		help="Run as a server which reformats files for other invocations of formate, keeping the hooks loaded.",
+		)
+@click.option(
+		"--socket",
+		"socket_path",
+		type=click.STRING,
+		envvar="FORMATE_SOCKET",
+		help=(
+				"The Unix socket of the formate daemon. "
+				"If given without --daemon, files are reformatted by the daemon listening on this socket."
+				),
+		)
+@click.option(
+		"--profile-dir",
+		metavar="DIR",
+		type=click.STRING,
+		help=(
+				"Like --profile, but also write the time taken by each call to a hook to DIR/hooks.json, "
+				"and the cProfile statistics for each hook to DIR/<hook>.pstats"
+				),
+		)
+@flag_option(
+		"--profile",
+		"profile",
+		help=(
+				"Show the time taken by each hook. "
+				"Files are reformatted one at a time, without the cache or the daemon."
+				),
+		)
 @traceback_option()
 @colour_option()
 @verbose_option()
+@flag_option(
+		"--lines",
+		"changed_lines_only",
+		help="Only reformat the lines which have changed. Requires --changed-since.",
+		)
+@click.option(
+		"--changed-since",
+		metavar="REV",
+		type=click.STRING,
+		help="Reformat the files which have changed since the given git revision, in addition to FILENAME.",
+		)
 @click.option(
 		"-e",
 		"--exclude",
 		metavar="PATTERN",
 		type=click.STRING,
 		cls=MultiValueOption,
-		help="Patterns for files to exclude from formatting.",
+		help=(
+				"Patterns for files and directories to exclude from formatting. "
+				"A pattern may match either the whole path or its final component."
+				),
+		)
+@click.option(
+		"-j",
+		"--jobs",
+		metavar='N',
+		type=click.INT,
+		default=None,
+		help="The number of files to reformat in parallel. Defaults to the number of CPUs.",
+		)
+@click.option(
+		"--stdin-filename",
+		type=click.STRING,
+		help=(
+				"The filename to use for the source read from standard input when FILENAME is '-', "
+				"which determines the hooks that are run. Defaults to <stdin>.py"
+				),
 		)
 @click.option(
 		"-c",
@@ -94,26 +523,49 @@ def main(
 		filename: Iterable[PathLike],
 		config_file: PathLike,
 		exclude: "Optional[List[str]]",
+		jobs: Optional[int] = None,
 		colour: "ColourTrilean" = None,
 		verbose: bool = False,
 		show_traceback: bool = False,
 		show_diff: bool = False,
+		cache_dir: Optional[PathLike] = None,
+		no_cache: bool = False,
+		daemon: bool = False,
+		socket_path: Optional[PathLike] = None,
+		stdin_filename: Optional[str] = None,
+		changed_since: Optional[str] = None,
+		changed_lines_only: bool = False,
+		profile: bool = False,
+		profile_dir: Optional[PathLike] = None,
+		check: bool = False,
+		fail_fast: bool = False,
+		fsync: bool = False,
+		verify_idempotent: bool = False,
 		) -> None:
 	"""
 	Reformat the given Python source files.
+
+	Directories are searched recursively for files supported by the configured hooks,
+	skipping any files and directories which are ignored by git.
+
+	If FILENAME is '-' the source is read from standard input and the reformatted source written to standard output,
+	or the diff with --diff. With --check nothing is written.
 	"""
 
 	# stdlib
-	import fnmatch
-	import re
+	import functools
+	import socket
+	from contextlib import nullcontext
 
 	# 3rd party
 	from domdf_python_tools.paths import PathPlus
 
 	# this package
-	from formate import Reformatter
+	from formate.cache import Cache, get_default_cache_dir, get_fingerprint
 	from formate.config import load_toml
-	from formate.utils import SyntaxTracebackHandler, _find_from_parents, syntaxerror_for_file
+	from formate.pipeline import Pipeline
+	from formate.profiling import HookProfiler, profile_hooks
+	from formate.utils import SyntaxTracebackHandler, _find_from_parents, fsync_paths, syntaxerror_for_file
 
 	def verbose_echo(msg: str, level: int = 1):
 		if verbose >= level:
@@ -121,6 +573,13 @@ def main(
 
 	retv = 0
 
+	if (daemon or socket_path is not None) and not hasattr(socket, "AF_UNIX"):
+		raise click.UsageError("The formate daemon is not supported on this platform.")
+
+	if daemon:
+		_serve(socket_path, verbose, show_traceback)
+		sys.exit(0)
+
 	# If `config_file` is a filename (rather than a path), look in CWD and parent directories
 	config_file = _find_from_parents(PathPlus(config_file))
 
@@ -129,47 +588,189 @@ def main(
 	except FileNotFoundError:
 		raise click.UsageError(f"Config file '{config_file}' not found")
 
-	for path in filename:
-		for pattern in exclude or []:
-			if re.match(fnmatch.translate(pattern), str(path)):  # pylint: disable=loop-invariant-statement
-				continue
-
-		path = PathPlus(path)
+	if changed_lines_only and changed_since is None:
+		raise click.UsageError("--lines can only be used with --changed-since.")
 
-		if path.is_dir():  # pylint: disable=loop-invariant-statement
-			verbose_echo(f"Skipping directory {path}", 2)
-			continue
+	# The changed lines in each file, if only those lines are to be reformatted.
+	changed_lines: Optional[Dict[str, Optional[List[Tuple[int, int]]]]] = None
 
-		if not path.exists():  # pylint: disable=loop-invariant-statement
-			verbose_echo(f"Skipping {path} as it doesn't exist", 2)
-			continue
+	if changed_since is not None:
+		# this package
+		from formate.git import get_changed_files
 
 		try:
-			r = Reformatter(path, config=config)
-		except UnicodeDecodeError as e:
-			verbose_echo(f"Skipping {path} due to incorrect encoding: {e}", 2)
-			continue
+			changed_files = get_changed_files(changed_since)
+		except (ValueError, OSError) as e:
+			raise click.UsageError(f"Unable to find the files changed since {changed_since!r}: {e}")
+
+		given_files = {os.path.abspath(path) for path in filename}
+		new_files = (os.path.relpath(path) for path in changed_files if os.fspath(path) not in given_files)
+		filename = [*filename, *new_files]
+
+		if changed_lines_only:
+			changed_lines = {os.fspath(path): lines for path, lines in changed_files.items()}
+
+	profiler: Optional[HookProfiler] = None
+
+	if profile or profile_dir is not None:
+		profiler = HookProfiler(cprofile=profile_dir is not None)
+
+		# The hooks must be called in this process, and for every file, to be measured.
+		jobs = 1
+		socket_path = None
+		no_cache = True
+
+	def report_profile() -> None:
+		if profiler is None:
+			return
 
-		with handle_tracebacks(show_traceback, cls=SyntaxTracebackHandler):
-			with syntaxerror_for_file(path):
-				try:
-					ret_for_file = r.run()
-				except NoSupportedHooksError:
-					verbose_echo(f"Skipping {path} as no hooks support this filetype.", 2)
-					continue
+		click.echo(profiler.format_summary(), err=True)
+
+		if profile_dir is not None:
+			profiler.dump(profile_dir)
+
+	if '-' in filename:
+		if len(tuple(filename)) > 1:
+			raise click.UsageError("Standard input ('-') cannot be reformatted together with other files.")
+
+		with nullcontext() if profiler is None else profile_hooks(profiler):
+			retv = _reformat_stdin(
+					stdin_filename or "<stdin>.py",
+					config,
+					show_traceback,
+					show_diff,
+					check,
+					verify_idempotent,
+					colour,
+					)
+
+		report_profile()
+		sys.exit(retv)
+
+	pipeline: Optional[Pipeline] = None
+
+	def get_pipeline() -> Pipeline:
+		# Resolve the hooks once, rather than for every file.
+		nonlocal pipeline
+
+		if pipeline is None:
+			with handle_tracebacks(show_traceback, cls=SyntaxTracebackHandler):
+				pipeline = Pipeline.from_config(config)
+
+		return pipeline
+
+	paths = _collect_paths(filename, exclude or (), get_pipeline)
+	to_reformat = [path for path, skip_reason in paths if skip_reason is None]
+
+	if changed_lines is not None:
+		# The cache doesn't know which lines were checked.
+		no_cache = True
+
+	cache: Optional[Cache] = None
+	daemon_responses: Optional[Generator[Dict[str, Any], None, None]] = None
+
+	if to_reformat and socket_path is not None:
+		# this package
+		from formate.daemon import send_request
+
+		request = {
+				"cwd": os.getcwd(),
+				"config_file": os.path.abspath(config_file),
+				"files": list(map(os.fspath, to_reformat)),
+				"show_diff": show_diff,
+				"cache_dir": None if no_cache else os.fspath(cache_dir or get_default_cache_dir()),
+				"check": check,
+				"fail_fast": fail_fast,
+				"verify_idempotent": verify_idempotent,
+				}
+
+		if changed_lines is not None:
+			request["lines"] = {os.fspath(path): _lines_for(changed_lines, path) for path in to_reformat}
+
+		try:
+			daemon_responses = send_request(socket_path, request)
+		except OSError as e:
+			verbose_echo(f"Unable to connect to the formate daemon ({e}); reformatting files directly.", 2)
+
+	if to_reformat and daemon_responses is None:
+		pipeline = get_pipeline()
+
+		if not no_cache:
+			cache = Cache(cache_dir or get_default_cache_dir(), get_fingerprint(config, pipeline.hooks))
+
+	if jobs is None:
+		jobs = os.cpu_count() or 1
+
+	# The files which have been written to, which are flushed to disk together at the end.
+	written: List[PathPlus] = []
+
+	with ExitStack() as stack:
+		if profiler is not None:
+			stack.enter_context(profile_hooks(profiler))
+
+		reformatter = _FileReformatter(
+				stack,
+				to_reformat,
+				config,
+				pipeline,
+				cache,
+				daemon_responses,
+				jobs,
+				changed_lines,
+				show_diff,
+				check,
+				verify_idempotent,
+				)
+
+		def report(path: PathPlus, get_outcome: Callable[[], _Outcome]) -> bool:
+			# Reports the outcome for the file, and returns whether it needed reformatting.
+
+			with handle_tracebacks(show_traceback, cls=SyntaxTracebackHandler):
+				with syntaxerror_for_file(path):
+					status, diff, message = get_outcome()
+
+			if status == "encoding":
+				verbose_echo(f"Skipping {path} due to incorrect encoding: {message}", 2)
+			elif status == "unsupported":
+				verbose_echo(f"Skipping {path} as no hooks support this filetype.", 2)
+			elif status in {"reformatted", "unstable"}:
+				verbose_echo(f"Would reformat {path}" if check else f"Reformatting {path}")
+				if diff is not None:
+					click.echo(diff, color=resolve_color_default(colour))
+				if message is not None:
+					click.echo(message, err=True)
+
+				if not check:
+					written.append(path)
+
+				return True
+
+			elif verbose >= 2:
+				click.echo(f"Checking {path}")
+
+			return False
+
+		# Results are reported in the order the files were given, regardless of the order they finish in.
+		for path, skip_reason in paths:
+			if skip_reason is not None:
+				verbose_echo(skip_reason, 2)
+				continue
 
-		if ret_for_file:
-			verbose_echo(f"Reformatting {path}")
-			if show_diff:
-				click.echo(r.get_diff(), color=resolve_color_default(colour))
+			if report(path, functools.partial(reformatter.get_outcome, path)):
+				retv = 1
 
-			r.to_file()
+				if fail_fast:
+					break
 
-		elif verbose >= 2:
-			click.echo(f"Checking {path}")
+		# With --fail-fast, the files the workers had already started on can't be stopped,
+		# so they are reported (and flushed to disk) along with the one which failed.
+		for path, get_outcome in reformatter.get_unfinished():
+			report(path, get_outcome)
 
-		retv |= ret_for_file
+	if fsync and written:
+		fsync_paths(written)
 
+	report_profile()
 	sys.exit(retv)
 
 
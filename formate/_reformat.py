@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+#
+#  _reformat.py
+"""
+Reformatting of files on disk, for the command line interface, the daemon and :mod:`formate.aio`.
+"""
+#
+#  Copyright © 2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+# stdlib
+from typing import TYPE_CHECKING, Optional, Sequence, Tuple
+
+# 3rd party
+from domdf_python_tools.paths import PathPlus
+from domdf_python_tools.typing import PathLike
+
+# this package
+from formate import Reformatter
+from formate.classes import FormateConfigDict
+from formate.config import NoSupportedHooksError
+from formate.exceptions import NotIdempotentError
+from formate.pipeline import Pipeline
+from formate.utils import syntaxerror_for_file
+
+if TYPE_CHECKING:
+	# this package
+	from formate.cache import Cache
+
+__all__ = ("reformat_path", )
+
+
+def reformat_path(
+		path: PathLike,
+		config: FormateConfigDict,
+		pipeline: Pipeline,
+		show_diff: bool,
+		cache: Optional["Cache"] = None,
+		lines: Optional[Sequence[Tuple[int, int]]] = None,
+		check: bool = False,
+		verify_idempotent: bool = False,
+		) -> Tuple[str, Optional[str], Optional[str]]:
+	"""
+	Reformat the given file, writing any changes back to disk unless ``check`` is :py:obj:`True`.
+
+	Returns a tuple of ``(status, diff, message)``, where ``status`` is one of
+	``"reformatted"``, ``"unstable"``, ``"unchanged"``, ``"unsupported"`` or ``"encoding"``.
+	``diff`` is the diff for reformatted and unstable files, if ``show_diff`` is :py:obj:`True`.
+	``message`` is the error message for unstable files and files with an incorrect encoding.
+	In check mode ``"reformatted"`` means the file would have been reformatted.
+
+	``"unstable"`` files are those which ``verify_idempotent`` found would be changed
+	by reformatting them a second time. They are still written to, with the result of the first pass.
+
+	:param path:
+	:param config: The ``formate`` configuration, parsed from a TOML file (or similar).
+	:param pipeline: The hooks to run.
+	:param show_diff: Whether to generate a diff of the changes made.
+	:param cache: The cache of files known to be unchanged.
+	:param lines: The lines to reformat, as a list of 1-based, inclusive ``(first, last)`` tuples.
+		If :py:obj:`None` the whole file is reformatted.
+	:param check: Only check whether the file needs reformatting, without writing to it.
+	:param verify_idempotent: Whether to reformat changed files a second time, to check the output is stable.
+		Files which are stable are recorded in the cache, so they are skipped by later runs.
+	"""
+
+	if cache is not None:
+		content = PathPlus(path).read_bytes()
+		if cache.is_unchanged(path, content):
+			return "unchanged", None, None
+
+	try:
+		r = Reformatter(path, config=config, pipeline=pipeline, lines=lines)
+	except UnicodeDecodeError as e:
+		return "encoding", None, str(e)
+
+	unstable_message: Optional[str] = None
+
+	with syntaxerror_for_file(path):
+		try:
+			# Only passed when needed, so subclasses which override run() keep working.
+			ret_for_file = r.run(verify_idempotent=True) if verify_idempotent else r.run()
+		except NoSupportedHooksError:
+			return "unsupported", None, None
+		except NotIdempotentError as e:
+			ret_for_file, unstable_message = True, str(e)
+
+	if not ret_for_file:
+		if cache is not None:
+			cache.mark_unchanged(path, content)
+
+		return "unchanged", None, None
+
+	diff = r.get_diff() if show_diff else None
+
+	if not check:
+		r.to_file()
+
+		# The reformatted file is known to be left unchanged by the next run.
+		if cache is not None and verify_idempotent and unstable_message is None:
+			cache.mark_unchanged(path, r.to_string().encode("UTF-8"))
+
+	if unstable_message is not None:
+		return "unstable", diff, unstable_message
+
+	return "reformatted", diff, None
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+#
+#  _tracebacks.py
+"""
+Handling of exceptions for the command line interface.
+"""
+#
+#  Copyright © 2020-2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+# stdlib
+import sys
+from typing import TYPE_CHECKING
+
+# 3rd party
+import click
+from consolekit import terminal_colours
+from consolekit.tracebacks import TracebackHandler
+
+# this package
+from formate.exceptions import HookNotFoundError
+
+if TYPE_CHECKING:
+	# stdlib
+	from typing import NoReturn
+
+__all__ = ("SyntaxTracebackHandler", )
+
+
+class SyntaxTracebackHandler(TracebackHandler):
+	"""
+	Subclass of :class:`consolekit.tracebacks.TracebackHandler` to additionally handle :exc:`SyntaxError`.
+	"""
+
+	# Documented, and imported by users, as part of formate.utils.
+	__module__ = "formate.utils"
+
+	@staticmethod
+	def handle_SyntaxError(e: SyntaxError) -> "NoReturn":  # noqa: D102
+		click.echo(terminal_colours.Fore.RED(f"Fatal: {e.__class__.__name__}: {e}"), err=True)
+		sys.exit(126)
+
+	@staticmethod
+	def handle_HookNotFoundError(e: HookNotFoundError) -> "NoReturn":  # noqa: D102
+		click.echo(terminal_colours.Fore.RED(f"Fatal: Hook not found: {e}"), err=True)
+		sys.exit(126)
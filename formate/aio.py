@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+#
+#  aio.py
+"""
+Reformat files from :mod:`asyncio` code without blocking the event loop.
+
+.. versionadded:: 1.3.0
+"""
+#
+#  Copyright © 2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+# stdlib
+import asyncio
+import json
+import os
+from concurrent.futures import Executor
+from typing import AsyncGenerator, Dict, Iterable, Optional, Set, Tuple
+
+# 3rd party
+import attrs
+from domdf_python_tools.typing import PathLike
+
+# this package
+from formate._reformat import reformat_path
+from formate.classes import FormateConfigDict
+from formate.pipeline import Pipeline
+
+__all__ = ("FormatResult", "format_files")
+
+
+@attrs.define
+class FormatResult:
+	"""
+	The outcome of reformatting a single file with :func:`~.format_files`.
+	"""
+
+	#: The name of the file, as given to :func:`~.format_files`.
+	filename: str
+
+	#: One of ``"reformatted"``, ``"unchanged"``, ``"unsupported"`` (no hooks support the filetype)
+	#: or ``"encoding"`` (the file isn't valid UTF-8).
+	#: With ``check=True`` ``"reformatted"`` means the file would have been reformatted.
+	status: str
+
+	#: The diff for reformatted files if ``show_diff`` was :py:obj:`True`,
+	#: coloured with ANSI escape codes (which :func:`consolekit.terminal_colours.strip_ansi` can remove),
+	#: or the error message for files with an incorrect encoding.
+	detail: Optional[str] = None
+
+
+# The hooks for each configuration, so they are only loaded once by each thread or worker process.
+_pipelines: Dict[str, Pipeline] = {}
+
+
+def _format_file(
+		filename: str,
+		config: FormateConfigDict,
+		show_diff: bool,
+		check: bool,
+		) -> Tuple[str, Optional[str]]:
+	# Reads, reformats and writes back the file, in the executor.
+
+	key = json.dumps(config, sort_keys=True, default=repr)
+	if key not in _pipelines:
+		_pipelines[key] = Pipeline.from_config(config)
+
+	status, diff, message = reformat_path(filename, config, _pipelines[key], show_diff, check=check)
+	return status, diff if message is None else message
+
+
+async def format_files(
+		filenames: Iterable[PathLike],
+		config: FormateConfigDict,
+		executor: Optional[Executor] = None,
+		max_concurrency: Optional[int] = None,
+		show_diff: bool = False,
+		check: bool = False,
+		) -> AsyncGenerator[FormatResult, None]:
+	"""
+	Reformat the given files, yielding the results in the order the files are finished.
+
+	Each file is read, reformatted and written back to disk by ``executor``,
+	so neither the hooks nor the file operations block the event loop.
+	Files are written with :func:`~formate.utils.atomic_write`, and only if they have changed.
+
+	.. code-block:: python
+
+		with ProcessPoolExecutor() as executor:
+			async for result in format_files(filenames, config, executor):
+				print(result.filename, result.status)
+
+	If reformatting a file raises an exception (such as a :exc:`SyntaxError`) it is raised by the iterator,
+	and the files which haven't been started yet are cancelled.
+	The same happens if the iterator is closed with :meth:`~agen.aclose` before all the files are finished.
+	Files which are already being reformatted are always finished,
+	as the executor has no way to interrupt them.
+
+	:param filenames:
+	:param config: The ``formate`` configuration, parsed from a TOML file (or similar).
+	:param executor: The :class:`concurrent.futures.Executor` to reformat the files with.
+		A :class:`~concurrent.futures.ProcessPoolExecutor` allows several files to be reformatted in parallel.
+		If :py:obj:`None` the event loop's default executor, usually a thread pool, is used.
+		yapf's style is shared between threads, so with a thread pool
+		only one file at a time is reformatted by the ``yapf`` hook.
+	:param max_concurrency: The maximum number of files submitted to the executor at once.
+		Defaults to the number of CPUs.
+	:param show_diff: Whether to include a diff of the changes in the results.
+	:param check: Only check whether the files need reformatting, without writing to them.
+
+	:raises: :exc:`~.HookNotFoundError` if any of the configured hooks can't be found.
+		This is raised before any files are reformatted.
+	"""
+
+	# Raise any errors with the configuration before starting.
+	Pipeline.from_config(config)
+
+	if max_concurrency is None:
+		max_concurrency = os.cpu_count() or 1
+
+	if max_concurrency < 1:
+		raise ValueError("'max_concurrency' must be at least 1.")
+
+	loop = asyncio.get_running_loop()
+	remaining_files = iter(filenames)
+	pending: Set["asyncio.Future[Tuple[str, Optional[str]]]"] = set()
+	filename_for_future: Dict["asyncio.Future[Tuple[str, Optional[str]]]", str] = {}
+
+	def submit_next() -> bool:
+		filename = next(remaining_files, None)
+		if filename is None:
+			return False
+
+		future = loop.run_in_executor(executor, _format_file, os.fspath(filename), config, show_diff, check)
+		pending.add(future)
+		filename_for_future[future] = os.fspath(filename)
+		return True
+
+	try:
+		while len(pending) < max_concurrency and submit_next():
+			pass
+
+		while pending:
+			done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+			for future in done:
+				pending.remove(future)
+				status, detail = future.result()
+				yield FormatResult(filename_for_future.pop(future), status, detail)
+
+				submit_next()
+
+	finally:
+		# Files which haven't been started are removed from the executor's queue.
+		for future in pending:
+			future.cancel()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+#
+#  cache.py
+"""
+Persistent cache of files which are known to be unchanged by ``formate``.
+
+.. versionadded:: 1.3.0
+"""
+#
+#  Copyright © 2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+# stdlib
+import functools
+import hashlib
+import json
+import os
+import platform
+import sys
+from typing import Dict, Iterable, Mapping, Optional
+
+# 3rd party
+from domdf_python_tools.compat import importlib_metadata
+from domdf_python_tools.paths import PathPlus
+from domdf_python_tools.typing import PathLike
+
+# this package
+from formate.classes import Hook
+from formate.utils import _find_from_parents
+
+__all__ = ("Cache", "get_default_cache_dir", "get_fingerprint")
+
+# Hooks which delegate to a third-party tool, and the name of that tool's distribution.
+_hook_dependencies = {"isort": "isort", "yapf": "yapf"}
+
+
+def get_default_cache_dir() -> PathPlus:
+	"""
+	Returns the default directory for the ``formate`` cache.
+
+	This is :file:`$XDG_CACHE_HOME/formate` if the :envvar:`XDG_CACHE_HOME` environment variable is set,
+	otherwise :file:`~/.cache/formate`.
+	"""
+
+	if os.environ.get("XDG_CACHE_HOME"):
+		return PathPlus(os.environ["XDG_CACHE_HOME"]) / "formate"
+	else:
+		return PathPlus.home() / ".cache" / "formate"
+
+
+@functools.lru_cache()
+def _get_version(distribution: str) -> str:
+	# Cached as the modules which have already been imported won't change.
+
+	try:
+		return importlib_metadata.version(distribution)
+	except importlib_metadata.PackageNotFoundError:
+		return getattr(sys.modules.get(distribution), "__version__", '')
+
+
+def _hash_file(filename: PathLike) -> Optional[str]:
+	try:
+		return hashlib.sha256(PathPlus(filename).read_bytes()).hexdigest()
+	except OSError:
+		return None
+
+
+def _get_config_files(hooks: Iterable[Hook]) -> Dict[str, Optional[str]]:
+	# Returns the configuration files read by the hooks, and a hash of their content.
+	# The files are found in the same way as by ``_get_yapf_style`` and ``_get_isort_config``.
+
+	config_files: Dict[str, Optional[str]] = {}
+
+	for hook in hooks:
+		if hook.name == "yapf" and "yapf_style" in hook.kwargs:
+			# yapf_style may also be the name of a style, in which case there is no file to hash.
+			filename = _find_from_parents(PathPlus(hook.kwargs["yapf_style"])).abspath()
+		elif hook.name == "isort" and "isort_config_file" in hook.kwargs:
+			filename = PathPlus(os.path.abspath(hook.kwargs["isort_config_file"]))
+		else:
+			continue
+
+		config_files[filename.as_posix()] = _hash_file(filename)
+
+	return config_files
+
+
+def get_fingerprint(config: Mapping, hooks: Iterable[Hook]) -> str:
+	"""
+	Returns a fingerprint of the configuration, the hooks, and the versions of the software providing them.
+
+	If any of these change then the results of previous runs can no longer be trusted.
+	This includes the content of the configuration files read by the ``yapf`` and ``isort`` hooks.
+
+	:param config: The ``formate`` configuration, parsed from a TOML file (or similar).
+	:param hooks: The hooks which will be run.
+	"""
+
+	# this package
+	from formate import __version__
+
+	versions: Dict[str, str] = {}
+
+	for hook in hooks:
+		if hook.entry_point is not None:
+			top_level_module = hook.entry_point.obj.__module__.split('.')[0]
+			versions[top_level_module] = _get_version(top_level_module)
+
+		if hook.name in _hook_dependencies:
+			dependency = _hook_dependencies[hook.name]
+			versions[dependency] = _get_version(dependency)
+
+	versions["formate"] = __version__
+	versions["python"] = f"{platform.python_implementation()} {platform.python_version()}"
+
+	fingerprint_data = json.dumps(
+			{"config": config, "versions": versions, "config_files": _get_config_files(hooks)},
+			sort_keys=True,
+			default=str,
+			)
+
+	return hashlib.sha256(fingerprint_data.encode("UTF-8")).hexdigest()
+
+
+class Cache:
+	"""
+	An on-disk record of files which ``formate`` left unchanged.
+
+	Files are identified by a hash of their absolute path and content.
+	Each entry is stored as an empty file, so the cache can safely be shared between
+	multiple processes (including concurrent invocations of ``formate``) without any locking.
+
+	:param cache_dir: The directory to store the cache in.
+	:param fingerprint: The fingerprint of the configuration, as returned by :func:`~.get_fingerprint`.
+	"""
+
+	#: The directory containing the cache entries for the current configuration.
+	directory: PathPlus
+
+	def __init__(self, cache_dir: PathLike, fingerprint: str):
+		self.directory = PathPlus(cache_dir) / fingerprint[:32]
+
+	def __repr__(self) -> str:
+		return f"<{self.__class__.__name__}({self.directory.as_posix()!r})>"
+
+	@staticmethod
+	def _get_key(filename: PathLike, content: bytes) -> str:
+		file_hash = hashlib.sha256(os.path.abspath(filename).encode("UTF-8"))
+		file_hash.update(b'\0')
+		file_hash.update(content)
+		return file_hash.hexdigest()
+
+	def _get_entry(self, filename: PathLike, content: bytes) -> PathPlus:
+		key = self._get_key(filename, content)
+		return self.directory / key[:2] / key
+
+	def is_unchanged(self, filename: PathLike, content: bytes) -> bool:
+		"""
+		Returns whether the file is known to be left unchanged by ``formate``.
+
+		:param filename: The name of the file.
+		:param content: The content of the file.
+		"""
+
+		return self._get_entry(filename, content).is_file()
+
+	def mark_unchanged(self, filename: PathLike, content: bytes) -> None:
+		"""
+		Record that the file was left unchanged by ``formate``.
+
+		Errors writing to the cache are ignored.
+
+		:param filename: The name of the file.
+		:param content: The content of the file.
+		"""
+
+		entry = self._get_entry(filename, content)
+
+		try:
+			entry.parent.mkdir(parents=True, exist_ok=True)
+			entry.touch(exist_ok=True)
+		except OSError:  # pragma: no cover
+			pass
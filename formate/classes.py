@@ -27,7 +27,7 @@ Core classes.
 #
 
 # stdlib
-from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Set, Union
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Set, Tuple, Union
 
 # 3rd party
 import attrs
@@ -36,6 +36,9 @@ from attr_utils.serialise import serde
 from domdf_python_tools.typing import PathLike
 from typing_extensions import TypedDict
 
+# this package
+from formate.profiling import _active_profiler
+
 __all__ = ("FormateConfigDict", "ExpandedHookDict", "HooksMapping", "EntryPoint", "Hook")
 
 #: Type hint for the ``hooks`` key of the ``formate`` configuration mapping.
@@ -118,6 +121,21 @@ class Hook:
 
 		return getattr(self.entry_point.obj, "supported_filetypes", {".py", ".pyi"})  # type: ignore[union-attr]
 
+	def is_applicable(self, source: str) -> bool:
+		"""
+		Returns whether the hook may change the given source.
+
+		This is :py:obj:`True` unless the hook was decorated with :deco:`~formate.config.applies_if`
+		and the check fails for ``source``.
+
+		.. versionadded:: 1.3.0
+
+		:param source:
+		"""
+
+		check = getattr(self.entry_point.obj, "applies_if", None)  # type: ignore[union-attr]
+		return check is None or check(source)
+
 	@classmethod
 	def parse(cls, data: HooksMapping) -> Iterator["Hook"]:
 		r"""
@@ -132,18 +150,27 @@ class Hook:
 			else:
 				yield cls(hook, **hook_config)
 
-	def __call__(self, source: str, filename: PathLike) -> str:
+	def __call__(
+			self,
+			source: str,
+			filename: PathLike,
+			lines: Optional[Sequence[Tuple[int, int]]] = None,
+			) -> str:
 		"""
 		Call the hook.
 
 		:param source: The source to reformat.
 		:param filename: The name of the source file.
+		:param lines: The ranges of lines to reformat, for hooks which support it.
+			:py:obj:`None` reformats the whole file.
 
 		:return: The reformatted source.
 
 		:raises: :exc:`TypeError` if ``entry_point`` has not been set.
 
 		.. versionchanged:: 0.2.0  Added the ``filename`` argument.
+		.. versionchanged:: 1.3.0  Added the ``lines`` argument.
+		.. versionchanged:: 1.3.0  The call is recorded if a :func:`~.profile_hooks` block is active.
 		"""
 
 		if self.entry_point is None:
@@ -157,8 +184,15 @@ class Hook:
 			kwargs["formate_global_config"] = self.global_config
 		if getattr(hook_func, "wants_filename", False):
 			kwargs["formate_filename"] = filename
+		if getattr(hook_func, "wants_lines", False):
+			kwargs["formate_lines"] = lines
+
+		profiler = _active_profiler.get()
 
-		return hook_func(source, *self.args, **kwargs)
+		if profiler is None:
+			return hook_func(source, *self.args, **kwargs)
+		else:
+			return profiler.call(self.name, filename, lambda s: hook_func(s, *self.args, **kwargs), source)
 
 
 @serde
@@ -29,7 +29,7 @@ Read and parse formate configuration.
 # stdlib
 from operator import attrgetter
 from types import MappingProxyType
-from typing import Callable, List, Mapping, TypeVar
+from typing import TYPE_CHECKING, Callable, List, Mapping, Type, TypeVar
 
 # 3rd party
 import dom_toml
@@ -39,17 +39,24 @@ from domdf_python_tools.typing import PathLike
 from formate.classes import FormateConfigDict, Hook
 from formate.utils import import_entry_points
 
+if TYPE_CHECKING:
+	# this package
+	from formate.utils import Rewriter
+
 __all__ = (
 		"parse_hooks",
 		"parse_global_config",
 		"load_toml",
 		"wants_global_config",
 		"wants_filename",
+		"wants_lines",
 		"_C_str",
 		"HookConfigError",
 		"NoHooksError",
 		"NoSupportedHooksError",
 		"formats_filetypes",
+		"uses_rewriter",
+		"applies_if",
 		"get_hooks_for_filetype",
 		)
 
@@ -190,6 +197,26 @@ def wants_filename(func: _C_str) -> _C_str:
 	return func
 
 
+def wants_lines(func: _C_str) -> _C_str:
+	"""
+	Decorator to indicate to ``formate`` that the hook can limit its changes to certain lines.
+
+	The lines will be provided as the ``formate_lines`` keyword argument,
+	either a sequence of ``(first, last)`` tuples of 1-based, inclusive line numbers,
+	or :py:obj:`None` if the whole file should be reformatted.
+
+	The line numbers refer to the source as it was read from the file,
+	so they may be shifted if a hook which runs earlier adds or removes lines.
+
+	.. versionadded:: 1.3.0
+
+	:param func:
+	"""
+
+	func.wants_lines = True  # type: ignore[attr-defined]
+	return func
+
+
 def formats_filetypes(*filetypes) -> Callable[[_C_str], _C_str]:
 	r"""
 	Decorator to indicate to ``formate`` that the hook formats the specified filetypes (as extensions, e.g. ``".js"``.
@@ -204,3 +231,45 @@ def formats_filetypes(*filetypes) -> Callable[[_C_str], _C_str]:
 		return func
 
 	return deco
+
+
+def uses_rewriter(rewriter: Type["Rewriter"]) -> Callable[[_C_str], _C_str]:
+	"""
+	Decorator to indicate to ``formate`` that the hook is equivalent to ``rewriter(source).rewrite()``.
+
+	Consecutive hooks using rewriters are applied together by :class:`~.FusedRewriter`,
+	which parses the source and traverses the tree only once.
+	The hook must not take any arguments other than the source.
+
+	.. versionadded:: 1.3.0
+
+	:param rewriter: The :class:`~.Rewriter` subclass used by the hook.
+	"""
+
+	def deco(func: _C_str) -> _C_str:
+		func.rewriter = rewriter  # type: ignore[attr-defined]
+		return func
+
+	return deco
+
+
+def applies_if(check: Callable[[str], bool]) -> Callable[[_C_str], _C_str]:
+	"""
+	Decorator to indicate to ``formate`` that the hook only needs to be called if ``check`` returns :py:obj:`True`.
+
+	:func:`formate.call_hooks` calls ``check`` with the source before calling the hook,
+	and skips the hook if it returns :py:obj:`False`.
+	This allows hooks which would otherwise have to parse the source to skip it with a cheap test,
+	such as looking for a substring.
+	``check`` must never return :py:obj:`False` for a source the hook would change.
+
+	.. versionadded:: 1.3.0
+
+	:param check: A function which takes the source and returns whether the hook may change it.
+	"""
+
+	def deco(func: _C_str) -> _C_str:
+		func.applies_if = check  # type: ignore[attr-defined]
+		return func
+
+	return deco
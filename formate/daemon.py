@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+#
+#  daemon.py
+"""
+Server which keeps the configuration and hooks loaded between invocations of ``formate``.
+
+The server listens on a Unix socket. Each request is a single line of JSON with the following keys:
+
+* ``cwd`` -- the working directory of the client.
+* ``config_file`` -- the path to the configuration file.
+* ``files`` -- the files to reformat.
+* ``show_diff`` -- whether to return a diff of the changes made.
+* ``cache_dir`` -- the directory of the cache of unchanged files, or :py:obj:`None` to disable the cache.
+* ``lines`` -- optional. A mapping of files to the lines to reformat in them,
+  as a list of 1-based, inclusive ``[first, last]`` pairs.
+  Files which are missing from the mapping, or map to :py:obj:`None`, are reformatted in full.
+* ``check`` -- optional. If :py:obj:`True` the files are not written to.
+* ``fail_fast`` -- optional. If :py:obj:`True` no more files are reformatted after the first which changes.
+* ``verify_idempotent`` -- optional. If :py:obj:`True` changed files are reformatted a second time,
+  to check the output is stable.
+
+The server responds with one line of JSON per file, in the order the files were given,
+with the keys ``status``, ``diff`` and ``message``.
+``diff`` is the diff for reformatted files if ``show_diff`` was :py:obj:`True`,
+and ``message`` the error message for unstable files and files with an incorrect encoding.
+If an error occurs the final line instead has the keys ``error`` and ``message``.
+
+.. versionadded:: 1.3.0
+"""
+#
+#  Copyright © 2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+# stdlib
+import json
+import os
+import socket
+import socketserver
+from contextlib import closing
+from typing import Any, Dict, Generator, Mapping, Optional, Tuple
+
+# 3rd party
+from domdf_python_tools.paths import PathPlus
+from domdf_python_tools.typing import PathLike
+
+# this package
+from formate._reformat import reformat_path
+from formate.cache import Cache, get_default_cache_dir, get_fingerprint
+from formate.classes import FormateConfigDict, Hook
+from formate.config import load_toml
+from formate.exceptions import HookNotFoundError
+from formate.pipeline import Pipeline
+
+__all__ = ("FormateDaemon", "get_default_socket_path", "send_request", "error_from_response")
+
+
+def get_default_socket_path() -> PathPlus:
+	"""
+	Returns the default path of the socket for the ``formate`` daemon.
+
+	This is :file:`$XDG_RUNTIME_DIR/formate.sock` if the :envvar:`XDG_RUNTIME_DIR` environment variable is set,
+	otherwise :file:`daemon.sock` in the cache directory.
+	"""
+
+	if os.environ.get("XDG_RUNTIME_DIR"):
+		return PathPlus(os.environ["XDG_RUNTIME_DIR"]) / "formate.sock"
+	else:
+		return get_default_cache_dir() / "daemon.sock"
+
+
+def _connect(socket_path: PathLike) -> socket.socket:
+	sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)  # type: ignore[attr-defined,unused-ignore]
+
+	try:
+		sock.connect(os.fspath(socket_path))
+	except OSError:
+		sock.close()
+		raise
+
+	return sock
+
+
+def _iter_responses(sock: socket.socket, request: Mapping[str, Any]) -> Generator[Dict[str, Any], None, None]:
+	with sock, sock.makefile("rwb") as fp:
+		fp.write(json.dumps(request).encode("UTF-8") + b'\n')
+		fp.flush()
+
+		for line in fp:
+			yield json.loads(line)
+
+
+def send_request(socket_path: PathLike, request: Mapping[str, Any]) -> Generator[Dict[str, Any], None, None]:
+	"""
+	Send a request to the ``formate`` daemon, and return an iterator over the responses.
+
+	:param socket_path: The path to the daemon's socket.
+	:param request: The request. See the module documentation for the format.
+
+	:raises: :exc:`OSError` if the daemon cannot be reached.
+	"""
+
+	# Connect now so failures are reported immediately, rather than when iteration starts.
+	return _iter_responses(_connect(socket_path), request)
+
+
+def error_from_response(response: Mapping[str, Any]) -> Exception:
+	"""
+	Recreate the exception described by an error response from the daemon.
+
+	:param response:
+	"""
+
+	if response["error"] == "SyntaxError":
+		return SyntaxError(response["message"])
+	elif response["error"] == "HookNotFoundError":
+		return HookNotFoundError(Hook(response["hook"]))
+	else:
+		return RuntimeError(response["message"])
+
+
+class _DaemonRequestHandler(socketserver.StreamRequestHandler):
+
+	server: "FormateDaemon"
+
+	def handle(self) -> None:
+		line = self.rfile.readline()
+
+		if not line.strip():
+			# e.g. another server checking whether this one is still running.
+			return
+
+		request = json.loads(line)
+
+		try:
+			# Closing the responses restores the server's working directory.
+			with closing(self.server.handle_formate_request(request)) as responses:
+				for response in responses:
+					self.wfile.write(json.dumps(response).encode("UTF-8") + b'\n')
+					self.wfile.flush()
+		except (BrokenPipeError, ConnectionResetError):
+			# The client stopped early, e.g. with --fail-fast.
+			pass
+
+
+class FormateDaemon(socketserver.UnixStreamServer):  # type: ignore[name-defined,misc,unused-ignore]
+	"""
+	Server which reformats files on behalf of ``formate`` clients.
+
+	The configuration and hooks are loaded once for each configuration file,
+	and are only reloaded when the file's modification time changes.
+	Requests are handled one at a time.
+
+	:param socket_path: The path of the Unix socket to listen on.
+
+	:raises: :exc:`FileExistsError` if another server is already listening on the socket.
+	"""
+
+	#: The path of the Unix socket the server is listening on.
+	socket_path: PathPlus
+
+	def __init__(self, socket_path: PathLike):
+		self.socket_path = PathPlus(socket_path)
+
+		# mapping of configuration file to (mtime, config, pipeline)
+		self._configs: Dict[str, Tuple[int, FormateConfigDict, Pipeline]] = {}
+
+		if self.socket_path.exists():
+			try:
+				_connect(self.socket_path).close()
+			except OSError:
+				# Left over from a server which didn't shut down cleanly.
+				self.socket_path.unlink()
+			else:
+				raise FileExistsError(f"A formate daemon is already listening on {self.socket_path.as_posix()}")
+
+		self.socket_path.parent.maybe_make(parents=True)
+
+		super().__init__(os.fspath(self.socket_path), _DaemonRequestHandler)
+
+	def server_close(self) -> None:  # noqa: D102
+		super().server_close()
+
+		if self.socket_path.exists():
+			self.socket_path.unlink()
+
+	def load_config(self, config_file: PathLike) -> Tuple[FormateConfigDict, Pipeline, str]:
+		"""
+		Returns the configuration, hooks, and cache fingerprint for the given configuration file.
+
+		The file is only parsed again if it has been modified since it was last loaded.
+
+		:param config_file:
+		"""
+
+		config_file = os.path.abspath(config_file)
+		mtime = os.stat(config_file).st_mtime_ns
+
+		if config_file not in self._configs or self._configs[config_file][0] != mtime:
+			config = load_toml(config_file)
+			pipeline = Pipeline.from_config(config)
+			self._configs[config_file] = (mtime, config, pipeline)
+
+		_, config, pipeline = self._configs[config_file]
+
+		# The fingerprint also depends on the files read by the hooks, which may have changed.
+		return config, pipeline, get_fingerprint(config, pipeline.hooks)
+
+	def handle_formate_request(self, request: Mapping[str, Any]) -> Generator[Dict[str, Any], None, None]:
+		"""
+		Reformat the files given in the request, and return an iterator over the responses.
+
+		:param request: See the module documentation for the format.
+		"""
+
+		cwd = os.getcwd()
+		os.chdir(request["cwd"])
+
+		try:
+			config, pipeline, fingerprint = self.load_config(request["config_file"])
+
+			cache: Optional[Cache] = None
+			if request.get("cache_dir") is not None:
+				cache = Cache(request["cache_dir"], fingerprint)
+
+			lines_for_files = request.get("lines") or {}
+			show_diff, check = request["show_diff"], request.get("check", False)
+			verify = request.get("verify_idempotent", False)
+
+			for filename in request["files"]:
+				lines = lines_for_files.get(filename)
+				if lines is not None:
+					lines = [tuple(line_range) for line_range in lines]
+
+				status, diff, message = reformat_path(filename, config, pipeline, show_diff, cache, lines, check, verify)
+				yield {"status": status, "diff": diff, "message": message}
+
+				if status in {"reformatted", "unstable"} and request.get("fail_fast", False):
+					break
+
+		except Exception as e:
+			response = {"error": e.__class__.__name__, "message": str(e)}
+			if isinstance(e, HookNotFoundError):
+				response["hook"] = e.hook.name
+
+			yield response
+
+		finally:
+			os.chdir(cwd)
@@ -42,6 +42,7 @@ from typing import Mapping, Union
 from domdf_python_tools.utils import double_repr_string
 
 # this package
+from formate.config import applies_if, uses_rewriter
 from formate.utils import Rewriter
 
 __all__ = ("dynamic_quotes", )
@@ -129,6 +130,8 @@ class QuoteRewriter(Rewriter):
 						)
 
 
+@applies_if(lambda source: '"' in source or "'" in source)
+@uses_rewriter(QuoteRewriter)
 def dynamic_quotes(source: str) -> str:
 	"""
 	Reformats quotes in the given source, and returns the reformatted source.
@@ -46,6 +46,7 @@ import sys
 from typing import Union
 
 # this package
+from formate.config import applies_if, uses_rewriter
 from formate.utils import Rewriter
 
 __all__ = ("EllipsisRewriter", "ellipsis_reformat")
@@ -115,6 +116,8 @@ class EllipsisRewriter(Rewriter):
 		self.generic_visit(node)
 
 
+@applies_if(lambda source: "..." in source)
+@uses_rewriter(EllipsisRewriter)
 def ellipsis_reformat(source: str) -> str:
 	"""
 	Move ellipses (``...``) for type stubs onto the end of the stub definition.
@@ -26,10 +26,13 @@ Exception classes.
 #  OR OTHER DEALINGS IN THE SOFTWARE.
 #
 
+# stdlib
+from typing import Optional, Tuple
+
 # this package
 from formate.classes import Hook
 
-__all__ = ("HookNotFoundError", )
+__all__ = ("HookNotFoundError", "NotIdempotentError", "OverlappingReplacementsError")
 
 
 class HookNotFoundError(ValueError):
@@ -45,3 +48,65 @@ class HookNotFoundError(ValueError):
 	def __init__(self, hook: Hook):
 		super().__init__(f"No such hook {hook.name!r}. Is it installed?")
 		self.hook = hook
+
+	def __reduce__(self):  # noqa: MAN002
+		# Allows the exception to be passed back from worker processes.
+		return self.__class__, (self.hook, )
+
+
+class OverlappingReplacementsError(ValueError):
+	"""
+	Exception to indicate a :class:`~.Rewriter` recorded replacements for overlapping regions of the source.
+
+	.. versionadded:: 1.3.0
+
+	:param first: The first region, as a tuple of ``(start char, end char)``.
+	:param second: The region which overlaps with ``first``.
+	"""
+
+	#: The first region.
+	first: Tuple[int, int]
+
+	#: The region which overlaps with :attr:`~.first`.
+	second: Tuple[int, int]
+
+	def __init__(self, first: Tuple[int, int], second: Tuple[int, int]):
+		super().__init__(
+				f"Cannot replace characters {second[0]}-{second[1]} "
+				f"as they overlap with the replacement for characters {first[0]}-{first[1]}."
+				)
+		self.first = first
+		self.second = second
+
+	def __reduce__(self):  # noqa: MAN002
+		return self.__class__, (self.first, self.second)
+
+
+class NotIdempotentError(ValueError):
+	"""
+	Exception to indicate reformatting a file again changed the already-reformatted source.
+
+	.. versionadded:: 1.3.0
+
+	:param filename: The name of the file.
+	:param hook: The name of the first hook which changed the reformatted source,
+		or :py:obj:`None` if no single hook changes it on its own.
+	"""
+
+	#: The name of the file.
+	filename: str
+
+	#: The name of the first hook which changed the reformatted source.
+	hook: Optional[str]
+
+	def __init__(self, filename: str, hook: Optional[str]):
+		if hook is None:
+			super().__init__(f"{filename} is not stable: reformatting it again changed the output.")
+		else:
+			super().__init__(f"{filename} is not stable: the {hook!r} hook changed the output when run again.")
+
+		self.filename = filename
+		self.hook = hook
+
+	def __reduce__(self):  # noqa: MAN002
+		return self.__class__, (self.filename, self.hook)
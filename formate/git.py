@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+#
+#  git.py
+"""
+Find the files and lines which have changed in a git repository, and the files which are ignored.
+
+.. versionadded:: 1.3.0
+"""
+#
+#  Copyright © 2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+# stdlib
+import codecs
+import os
+import re
+import subprocess  # nosec: B404
+from typing import Dict, List, Optional, Set, Tuple, cast
+
+# 3rd party
+from domdf_python_tools.paths import PathPlus
+from domdf_python_tools.typing import PathLike
+
+__all__ = ("get_changed_files", "get_ignored_paths")
+
+_hunk_header_pattern = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+
+
+def _git(*args: str, cwd: Optional[PathLike] = None) -> str:
+	process = subprocess.run(  # nosec: B603,B607
+		["git", *args],
+		cwd=cwd,
+		stdout=subprocess.PIPE,
+		stderr=subprocess.PIPE,
+		)
+
+	if process.returncode:
+		raise ValueError(process.stderr.decode("UTF-8", errors="replace").strip())
+
+	# The output can include the content of files which aren't UTF-8.
+	return process.stdout.decode("UTF-8", errors="surrogateescape")
+
+
+def _unquote_path(path: str) -> str:
+	# git quotes filenames containing special characters C-style.
+	if path.startswith('"') and path.endswith('"'):
+		quoted = path[1:-1].encode("UTF-8", errors="surrogateescape")
+		# typeshed has the wrong return type for escape_decode, which returns bytes.
+		unquoted = cast(bytes, codecs.escape_decode(quoted)[0])
+		return unquoted.decode("UTF-8", errors="surrogateescape")
+
+	return path
+
+
+def get_changed_files(
+		revision: str,
+		cwd: Optional[PathLike] = None,
+		) -> Dict[PathPlus, Optional[List[Tuple[int, int]]]]:
+	"""
+	Returns the files in the git repository which have changed since the given revision.
+
+	Files which have been deleted are excluded, and files which are not tracked by git
+	(and aren't ignored) are included.
+
+	:param revision: The git revision to compare the working tree to, e.g. ``HEAD`` or ``origin/master``.
+	:param cwd: A directory within the git repository. Defaults to the current working directory.
+
+	:returns: A mapping of absolute paths to the changed lines in each file.
+		The lines are given as a list of 1-based, inclusive ``(first, last)`` tuples,
+		or :py:obj:`None` for untracked files, where the whole file is new.
+
+	:raises: :exc:`ValueError` if ``git`` fails, e.g. if the revision doesn't exist.
+	"""
+
+	root = PathPlus(_git("rev-parse", "--show-toplevel", cwd=cwd).strip())
+
+	diff = _git(
+			"-c",
+			"core.quotePath=false",
+			"diff",
+			"--no-color",
+			"--no-ext-diff",
+			"--unified=0",
+			"--src-prefix=a/",
+			"--dst-prefix=b/",
+			"--diff-filter=d",
+			revision,
+			"--",
+			cwd=root,
+			)
+
+	changed_files: Dict[PathPlus, Optional[List[Tuple[int, int]]]] = {}
+	current_file: Optional[List[Tuple[int, int]]] = None
+	in_header = False
+
+	# Not splitlines(), which also splits on characters such as form feeds within the changed lines.
+	for line in diff.split('\n'):
+		if line.startswith("diff --git "):
+			in_header = True
+			current_file = None
+		elif in_header and line.startswith("+++ "):
+			in_header = False
+			name = _unquote_path(line[4:])
+			if name != "/dev/null":
+				current_file = changed_files.setdefault(root / name[2:], [])
+		elif current_file is not None and line.startswith("@@ "):
+			match = _hunk_header_pattern.match(line)
+			if match:
+				first = int(match.group(1))
+				length = 1 if match.group(2) is None else int(match.group(2))
+
+				# Hunks which only remove lines have no lines in the new file.
+				if length:
+					current_file.append((first, first + length - 1))
+
+	for name in _git("ls-files", "-z", "--others", "--exclude-standard", cwd=root).split('\x00'):
+		if name:
+			changed_files[root / name] = None
+
+	return {PathPlus(os.path.normpath(path)): lines for path, lines in changed_files.items()}
+
+
+def get_ignored_paths(directory: PathLike) -> Set[str]:
+	"""
+	Returns the files and directories within ``directory`` which are ignored by git,
+	e.g. through a :file:`.gitignore` file.
+
+	Ignored directories are given as a whole, rather than listing each of the files within them.
+
+	:param directory:
+
+	:returns: The normalised paths, which start with ``directory``.
+		The set is empty if ``directory`` is not in a git repository, or if git is not installed.
+	"""  # noqa: D400
+
+	try:
+		output = _git(
+				"ls-files",
+				"-z",
+				"--others",
+				"--ignored",
+				"--exclude-standard",
+				"--directory",
+				cwd=directory,
+				)
+	except (ValueError, OSError):
+		return set()
+
+	return {os.path.normpath(os.path.join(directory, name)) for name in output.split('\x00') if name}
@@ -35,6 +35,7 @@ import re
 from domdf_python_tools.stringlist import DelimitedList
 
 # this package
+from formate.config import applies_if, uses_rewriter
 from formate.utils import Rewriter
 
 __all__ = ("CollectionsABCRewriter", "rewrite_collections_abc_imports")
@@ -83,6 +84,8 @@ class CollectionsABCRewriter(Rewriter):
 		self.record_replacement(text_range, '\n'.join(rewritten_imports))
 
 
+@applies_if(lambda source: "collections" in source)
+@uses_rewriter(CollectionsABCRewriter)
 def rewrite_collections_abc_imports(source: str) -> str:
 	"""
 	Identify deprecated :file:`from collections import {<abc>}` imports,
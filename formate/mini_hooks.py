@@ -29,31 +29,59 @@ Small but mighty hooks.
 # stdlib
 import ast
 import re
-from collections import deque
-from typing import List
+from typing import List, Optional, Sequence, Tuple
 
 # 3rd party
-import tokenize_rt  # type: ignore[import-untyped]
 from domdf_python_tools.paths import PathPlus
 from domdf_python_tools.stringlist import StringList
 from domdf_python_tools.typing import PathLike
 
 # this package
-from formate.config import formats_filetypes, wants_filename
+from formate.config import applies_if, formats_filetypes, wants_filename, wants_lines
+from formate.utils import _apply_replacements
 
 __all__ = ("check_ast", "newline_after_equals", "noqa_reformat", "squish_stubs")
 
 
-def noqa_reformat(source: str) -> str:
+def _overlaps_lines(lines: Optional[Sequence[Tuple[int, int]]], first: int, last: int) -> bool:
+	# Returns whether any of the lines from ``first`` to ``last`` (inclusive) are to be reformatted.
+
+	if lines is None:
+		return True
+
+	return any(start <= last and first <= end for start, end in lines)
+
+
+_noqa_pattern = re.compile(r'"""[\n\s]+#\s+noqa')
+
+
+@applies_if(lambda source: "noqa" in source)
+@wants_lines
+def noqa_reformat(source: str, formate_lines: Optional[Sequence[Tuple[int, int]]] = None) -> str:
 	"""
 	Pull ``# noqa: ...`` comments that immediately follow docstrings back up to the end of the correct line.
 
 	:param source: The source to reformat.
+	:param formate_lines: The ranges of lines to reformat. If :py:obj:`None` the whole source is reformatted.
 
 	:return: The reformatted source.
+
+	.. versionchanged:: 1.3.0  Added the ``formate_lines`` argument.
 	"""
 
-	return re.sub(r'"""[\n\s]+#\s+noqa', '"""  # noqa', source)
+	if formate_lines is None:
+		return _noqa_pattern.sub('"""  # noqa', source)
+
+	def replace(match: "re.Match[str]") -> str:
+		first = source.count('\n', 0, match.start()) + 1
+		last = first + match.group().count('\n')
+
+		if _overlaps_lines(formate_lines, first, last):
+			return '"""  # noqa'
+		else:
+			return match.group()
+
+	return _noqa_pattern.sub(replace, source)
 
 
 def check_ast(source: str) -> str:
@@ -251,40 +279,62 @@ def _reformat_blocks(blocks: List[List[str]]) -> StringList:
 	return output
 
 
-def newline_after_equals(source: str) -> str:
+# An equals sign followed by a newline, possibly with whitespace in between.
+_newline_after_equals_pattern = re.compile(r"=[ \t]*\r?\n")
+
+
+@applies_if(lambda source: _newline_after_equals_pattern.search(source) is not None)
+@wants_lines
+def newline_after_equals(source: str, formate_lines: Optional[Sequence[Tuple[int, int]]] = None) -> str:
 	"""
 	Removes newlines immediately after equals signs.
 
+	If the equals sign has whitespace before it (such as for an argument with a type annotation)
+	a single space is left after it, otherwise the value is moved up to directly after the equals sign.
+
 	.. versionadded:: 1.1.0
+	.. versionchanged:: 1.3.0  Added the ``formate_lines`` argument.
+	.. versionchanged:: 1.3.0  Whitespace before the equals sign is matched by a space after it.
 
 	:param source: The source to check.
+	:param formate_lines: The ranges of lines to reformat. If :py:obj:`None` the whole source is reformatted.
 
 	:return: The reformatted source.
 	"""
 
-	original_tokens = deque(tokenize_rt.src_to_tokens(source))
-	tokens = []
+	# stdlib
+	import io
+	import tokenize
 
-	while original_tokens:
-		token = original_tokens.popleft()
+	# The tokenizer gives positions as (line, column); this converts them to offsets in the source.
+	line_starts = [0]
+	line_starts.extend(match.end() for match in re.finditer('\n', source))
 
-		if token.name == "OP" and token.src == '=':
-			next_token = original_tokens.popleft()
-			if next_token.name == "NL":
-				while True:
+	replacements: List[Tuple[Tuple[int, int], str]] = []
+	tokens = tokenize.generate_tokens(io.StringIO(source).readline)
+	previous_token_end = (1, 0)
 
-					# TODO: handle spaces around equals (e.g. in function signature)
-					# Look ahead until there's a non-whitespace token.
-					next_token = original_tokens.popleft()
-					if next_token.name in {"UNIMPORTANT_WS", "NL"}:
-						pass
-					else:
-						break
+	for token in tokens:
+		if token.type == tokenize.OP and token.string == '=':
+			next_token = next(tokens)
+			found_newline = False
 
-			tokens.append(token)
-			tokens.append(next_token)
+			# Look ahead until there's a token other than a newline.
+			while next_token.type == tokenize.NL:
+				found_newline = True
+				next_token = next(tokens)
 
-		else:
-			tokens.append(token)
+			if (
+					found_newline and next_token.type != tokenize.COMMENT
+					and _overlaps_lines(formate_lines, token.start[0], next_token.start[0])
+					):
+				space = '' if token.start == previous_token_end else ' '
+				start = line_starts[token.end[0] - 1] + token.end[1]
+				end = line_starts[next_token.start[0] - 1] + next_token.start[1]
+				replacements.append(((start, end), space))
+
+			token = next_token
+
+		previous_token_end = token.end
 
-	return tokenize_rt.tokens_to_src(tokens)
+	return _apply_replacements(source, replacements)
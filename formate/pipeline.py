@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+#
+#  pipeline.py
+"""
+Resolved hooks which can be shared between files.
+
+.. versionadded:: 1.3.0
+"""
+#
+#  Copyright © 2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+# stdlib
+from typing import Dict, List, Mapping, Set
+
+# this package
+from formate.classes import Hook
+from formate.config import get_hooks_for_filetype, parse_hooks
+
+__all__ = ("Pipeline", )
+
+
+class Pipeline:
+	"""
+	The resolved, priority-sorted hooks for a ``formate`` configuration.
+
+	Resolving hooks requires scanning the installed entry points,
+	so a single :class:`~.Pipeline` should be created and shared between all the files being reformatted.
+
+	:param hooks: The hooks to run, as returned by :func:`~.parse_hooks`.
+
+	.. autosummary-widths:: 1/2
+	"""
+
+	#: The hooks to run, sorted by priority.
+	hooks: List[Hook]
+
+	def __init__(self, hooks: List[Hook]):
+		self.hooks = hooks
+		self._hooks_for_filetype: Dict[str, List[Hook]] = {}
+
+	@classmethod
+	def from_config(cls, config: Mapping) -> "Pipeline":
+		"""
+		Construct a :class:`~.Pipeline` from the hooks selected by the user.
+
+		:param config: The ``formate`` configuration, parsed from a TOML file (or similar).
+		"""
+
+		return cls(parse_hooks(config))
+
+	@property
+	def filetypes(self) -> Set[str]:
+		"""
+		The extensions of the filetypes supported by any of the hooks.
+
+		.. versionadded:: 1.3.0
+		"""
+
+		return {filetype for hook in self.hooks for filetype in hook.supported_filetypes}
+
+	def get_hooks_for_filetype(self, filetype: str) -> List[Hook]:
+		"""
+		Returns the hooks which support the given filetype.
+
+		The result is computed once for each filetype.
+
+		:param filetype: The file extension, e.g. ``".py"``.
+
+		:raises: :exc:`~.NoHooksError` if no hooks are configured.
+		:raises: :exc:`~.NoSupportedHooksError` if no hooks support the filetype.
+		"""
+
+		if filetype not in self._hooks_for_filetype:
+			self._hooks_for_filetype[filetype] = get_hooks_for_filetype(filetype, self.hooks)
+
+		return self._hooks_for_filetype[filetype]
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+#
+#  profiling.py
+"""
+Measure the time taken by each hook.
+
+.. versionadded:: 1.3.0
+"""
+#
+#  Copyright © 2021 Dominic Davis-Foster <dominic@davis-foster.co.uk>
+#
+#  Permission is hereby granted, free of charge, to any person obtaining a copy
+#  of this software and associated documentation files (the "Software"), to deal
+#  in the Software without restriction, including without limitation the rights
+#  to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+#  copies of the Software, and to permit persons to whom the Software is
+#  furnished to do so, subject to the following conditions:
+#
+#  The above copyright notice and this permission notice shall be included in all
+#  copies or substantial portions of the Software.
+#
+#  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+#  EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+#  MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+#  IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM,
+#  DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+#  OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE
+#  OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+# stdlib
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional
+
+# 3rd party
+import attrs
+from attr_utils.serialise import serde
+from domdf_python_tools.paths import PathPlus
+from domdf_python_tools.typing import PathLike
+
+if TYPE_CHECKING:
+	# stdlib
+	import cProfile
+
+__all__ = ("HookCall", "HookSummary", "HookProfiler", "profile_hooks")
+
+
+@serde
+@attrs.define
+class HookCall:
+	"""
+	The time taken by a single call to a hook.
+	"""
+
+	#: The name of the hook.
+	hook: str
+
+	#: The name of the file being reformatted.
+	filename: str
+
+	#: The wall time taken by the hook, in seconds.
+	time: float
+
+	#: The size of the source passed to the hook, in bytes.
+	bytes_in: int
+
+	#: The size of the source returned by the hook, in bytes.
+	bytes_out: int
+
+
+@serde
+@attrs.define
+class HookSummary:
+	"""
+	The total time taken by all the calls to a hook.
+	"""
+
+	#: The name of the hook.
+	hook: str
+
+	#: The number of times the hook was called.
+	calls: int = 0
+
+	#: The total wall time taken by the hook, in seconds.
+	time: float = 0.0
+
+	#: The total size of the source passed to the hook, in bytes.
+	bytes_in: int = 0
+
+	#: The total size of the source returned by the hook, in bytes.
+	bytes_out: int = 0
+
+
+def _size(source: str) -> int:
+	return len(source.encode("UTF-8", errors="surrogatepass"))
+
+
+class HookProfiler:
+	"""
+	Records the time taken by each call to a hook, within a :func:`~.profile_hooks` block.
+
+	Consecutive hooks which are applied together by a :class:`~.FusedRewriter`
+	are recorded as a single hook, with their names joined by ``+``.
+
+	:param cprofile: Whether to also run each hook under :mod:`cProfile`.
+		This gives a breakdown of where the time is spent within each hook, but makes the hooks slower.
+
+	.. autosummary-widths:: 1/2
+	"""
+
+	#: The calls made to each hook, in the order they were made.
+	calls: List[HookCall]
+
+	#: Whether each hook is also run under :mod:`cProfile`.
+	cprofile: bool
+
+	def __init__(self, cprofile: bool = False):
+		self.calls = []
+		self.cprofile = cprofile
+		self._profiles: Dict[str, "cProfile.Profile"] = {}
+
+	def call(self, hook: str, filename: PathLike, func: Callable[[str], str], source: str) -> str:
+		"""
+		Call the given function with ``source``, recording the time it takes.
+
+		:param hook: The name of the hook.
+		:param filename: The name of the file being reformatted.
+		:param func: The function to call.
+		:param source: The source to reformat.
+
+		:returns: The value returned by ``func``.
+		"""
+
+		if self.cprofile:
+			# stdlib
+			import cProfile
+
+			if hook not in self._profiles:
+				self._profiles[hook] = cProfile.Profile()
+
+			profile = self._profiles[hook]
+			start = time.perf_counter()
+			profile.enable()
+			try:
+				reformatted_source = func(source)
+			finally:
+				profile.disable()
+		else:
+			start = time.perf_counter()
+			reformatted_source = func(source)
+
+		elapsed = time.perf_counter() - start
+
+		self.calls.append(HookCall(hook, os.fspath(filename), elapsed, _size(source), _size(reformatted_source)))
+		return reformatted_source
+
+	def summary(self) -> List[HookSummary]:
+		"""
+		Returns the total time taken by each hook, with the slowest hook first.
+		"""
+
+		summaries: Dict[str, HookSummary] = {}
+
+		for call in self.calls:
+			if call.hook not in summaries:
+				summaries[call.hook] = HookSummary(call.hook)
+
+			summary = summaries[call.hook]
+			summary.calls += 1
+			summary.time += call.time
+			summary.bytes_in += call.bytes_in
+			summary.bytes_out += call.bytes_out
+
+		return sorted(summaries.values(), key=lambda s: s.time, reverse=True)
+
+	def format_summary(self) -> str:
+		"""
+		Returns the output of :meth:`~.summary` as a table.
+		"""
+
+		rows = [["Hook", "Calls", "Total (s)", "Mean (ms)", "Bytes in", "Bytes out"]]
+
+		for summary in self.summary():
+			rows.append([
+					summary.hook,
+					str(summary.calls),
+					f"{summary.time:.3f}",
+					f"{summary.time * 1000 / summary.calls:.2f}",
+					str(summary.bytes_in),
+					str(summary.bytes_out),
+					])
+
+		widths = [max(len(row[column]) for row in rows) for column in range(len(rows[0]))]
+
+		lines = []
+		for name, *cells in rows:
+			padded_cells = (cell.rjust(width) for cell, width in zip(cells, widths[1:]))
+			lines.append("  ".join([name.ljust(widths[0]), *padded_cells]))
+
+		return '\n'.join(lines)
+
+	def dump(self, directory: PathLike) -> None:
+		"""
+		Write the recorded calls, and the summary, to :file:`hooks.json` in the given directory.
+
+		If :attr:`~.cprofile` is :py:obj:`True`, the :mod:`cProfile` statistics for each hook are also written,
+		to :file:`{<hook name>}.pstats`. These can be read with :class:`pstats.Stats`.
+
+		:param directory:
+		"""
+
+		directory = PathPlus(directory)
+		directory.maybe_make(parents=True)
+
+		data: Dict[str, Any] = {
+				"hooks": [summary.to_dict() for summary in self.summary()],
+				"calls": [call.to_dict() for call in self.calls],
+				}
+		directory.joinpath("hooks.json").dump_json(data, indent=2)
+
+		for hook, profile in self._profiles.items():
+			profile.dump_stats(os.fspath(directory / f"{hook}.pstats"))
+
+
+# The profiler recording calls to hooks, if profiling is active.
+_active_profiler: "contextvars.ContextVar[Optional[HookProfiler]]"
+_active_profiler = contextvars.ContextVar("_active_profiler", default=None)
+
+
+@contextmanager
+def profile_hooks(profiler: HookProfiler) -> Iterator[HookProfiler]:
+	"""
+	Context manager within which calls to hooks are recorded by ``profiler``.
+
+	:param profiler:
+	"""
+
+	token = _active_profiler.set(profiler)
+
+	try:
+		yield profiler
+	finally:
+		_active_profiler.reset(token)
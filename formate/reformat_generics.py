@@ -41,6 +41,8 @@ Example output, with a line length of ``100``:
 
 # stdlib
 import ast
+import bisect
+import re
 import sys
 import typing
 from collections.abc import Collection
@@ -48,11 +50,13 @@ from io import StringIO
 from textwrap import indent as indent_string
 
 # 3rd party
-import astatine
-import asttokens
 from domdf_python_tools.stringlist import DelimitedList, StringList
 from domdf_python_tools.words import TAB
 
+# this package
+from formate.config import applies_if, wants_global_config
+from formate.utils import parse_source
+
 __all__ = ("reformat_generics", "Generic", "List")
 
 collection_types = {"Union", "List", "Tuple", "Set", "Dict", "Callable", "Optional", "Literal"}
@@ -91,24 +95,38 @@ class Generic:
 	def __init__(self, name: str, elements: typing.Sequence[typing.Union[str, "Generic", "List"]]):
 		self.name = str(name)
 		self.elements: DelimitedList[typing.Union[str, Generic, List]] = DelimitedList(elements)
+		self._cached_width: typing.Optional[int] = None
 
 	def __repr__(self) -> str:
 		return f"{self.name}[{self.elements:, }]"
 
-	def format(self, line_offset: int = 0) -> str:  # noqa: A003  # pylint: disable=redefined-builtin
+	def _width(self) -> int:
+		# The length of the Generic when written on one line.
+		# This is calculated the first time it is needed, so the elements must not be modified afterwards.
+
+		if self._cached_width is None:
+			self._cached_width = len(self.name) + 2 + _elements_length(self.elements)
+
+		return self._cached_width
+
+	def format(self, line_offset: int = 0, line_length: int = 110, indent_width: int = 4) -> str:  # noqa: A003  # pylint: disable=redefined-builtin
 		"""
 		Formats the :class:`~.Generic`.
 
-		:param line_offset:
+		:param line_offset: The column the :class:`~.Generic` starts at.
+		:param line_length: The maximum length of a line.
+		:param indent_width: The width of each level of indentation.
+
+		.. versionchanged:: 1.3.0  Added the ``line_length`` and ``indent_width`` arguments.
 		"""
 
-		if line_offset + len(repr(self)) > 110:
+		if line_offset + self._width() > line_length:
 			# Line too long as is
 			elements: DelimitedList[str] = DelimitedList()
-			offset_plus_4 = line_offset + 4
+			nested_offset = line_offset + indent_width
 			for element in self.elements:
 				if isinstance(element, Generic):
-					elements.append(indent_string(element.format(offset_plus_4), '\t'))
+					elements.append(indent_string(element.format(nested_offset, line_length, indent_width), '\t'))
 				else:
 					elements.append(indent_string(str(element), '\t'))
 			return f"{self.name}[\n{elements:,\n}\n	]"
@@ -125,10 +143,33 @@ class List:
 
 	def __init__(self, elements: typing.Sequence[typing.Union[str, Generic, "List"]]):
 		self.elements = DelimitedList(elements)
+		self._cached_width: typing.Optional[int] = None
 
 	def __repr__(self) -> str:
 		return f"[{self.elements:, }]"
 
+	def _width(self) -> int:
+		# The length of the List when written on one line.
+		# This is calculated the first time it is needed, so the elements must not be modified afterwards.
+
+		if self._cached_width is None:
+			self._cached_width = 2 + _elements_length(self.elements)
+
+		return self._cached_width
+
+
+def _elements_length(elements: typing.Sequence[typing.Union[str, Generic, List]]) -> int:
+	# The length of the elements when joined with ", ".
+	total = 2 * (len(elements) - 1) if elements else 0
+
+	for element in elements:
+		if isinstance(element, (Generic, List)):
+			total += element._width()
+		else:
+			total += len(str(element))
+
+	return total
+
 
 class Visitor(ast.NodeVisitor):
 	in_class = False
@@ -211,6 +252,9 @@ class UnionVisitor(ast.NodeVisitor):
 		self.structure.append(f"{parts:.}.{node.attr}")
 
 	def visit_Subscript(self, node: ast.Subscript) -> None:
+		# 3rd party
+		import astatine
+
 		union = Generic(
 				'.'.join(astatine.get_attribute_name(node.value)),
 				UnionVisitor().visit(get_slice_value(node.slice)),
@@ -267,6 +311,9 @@ class UnionVisitor(ast.NodeVisitor):
 		return self.structure
 
 
+# Tabs are expanded if the configured indent is not a tab.
+@applies_if(lambda source: '[' in source or '\t' in source)
+@wants_global_config
 def reformat_generics(
 		source: str,
 		formate_global_config: typing.Optional[typing.Mapping] = None,
@@ -282,6 +329,13 @@ def reformat_generics(
 
 	:returns: The reformatted source.
 
+	.. versionchanged:: 1.3.0
+
+		Long generics are split to fit within the ``line_length`` keyword argument,
+		falling back to the global configuration and then to 110 characters.
+		When measuring lines tabs count as four columns if the ``indent`` is a tab,
+		or as the width of the ``indent`` otherwise.
+
 	.. raw:: latex
 
 		\clearpage
@@ -290,25 +344,27 @@ def reformat_generics(
 	offset = 0
 	buf = StringIO()
 	visitor = Visitor()
-	atok = asttokens.ASTTokens(source, parse=True)
+	atok = parse_source(source)
 	tree = atok.tree
 	assert tree is not None
 
 	indent = (formate_global_config or {}).get("indent", kwargs.get("indent", TAB))
+	line_length = kwargs.get("line_length", (formate_global_config or {}).get("line_length", 110))
+	indent_width = 4 if indent == TAB else len(indent)
+
+	# The offsets of the start of each line, for finding the column each generic starts at.
+	line_starts = [0]
+	line_starts.extend(match.end() for match in re.finditer('\n', source))
 
 	try:
 		for union_node, union_obj, in_class in visitor.visit(tree):
 			text_range = atok.get_text_range(union_node)
 			buf.write(source[offset:text_range[0]])
 
-			reversed_line = source[offset:text_range[0]][::-1]
-
-			if '\n' in reversed_line:
-				line_offset = reversed_line.index('\n')
-			else:
-				line_offset = 0
+			line_start = line_starts[bisect.bisect_right(line_starts, text_range[0]) - 1]
+			line_offset = len(source[line_start:text_range[0]].expandtabs(indent_width))
 
-			formatted_obj = StringList(union_obj.format(line_offset))
+			formatted_obj = StringList(union_obj.format(line_offset, line_length, indent_width))
 
 			if in_class and len(formatted_obj) > 1:
 				buf.write(formatted_obj[0])
@@ -28,32 +28,61 @@ Utility functions.
 
 # stdlib
 import ast
+import contextvars
+import fnmatch
 import os
 import pathlib
 import re
+import stat
 import sys
+import tempfile
 from contextlib import contextmanager
 from itertools import starmap
-from operator import itemgetter
-from typing import TYPE_CHECKING, Dict, Iterator, List, Tuple, TypeVar
+from operator import attrgetter, itemgetter
+from typing import (
+		TYPE_CHECKING,
+		AbstractSet,
+		Any,
+		Dict,
+		Iterable,
+		Iterator,
+		List,
+		Optional,
+		Pattern,
+		Sequence,
+		Tuple,
+		Type,
+		TypeVar
+		)
 
 # 3rd party
-import asttokens
-import click
-from consolekit import terminal_colours
-from consolekit.tracebacks import TracebackHandler
 from domdf_python_tools.import_tools import discover_entry_points_by_name
+from domdf_python_tools.paths import PathPlus
 from domdf_python_tools.typing import PathLike
 
 # this package
 from formate.classes import EntryPoint, Hook
-from formate.exceptions import HookNotFoundError
+from formate.exceptions import HookNotFoundError, OverlappingReplacementsError
 
 if TYPE_CHECKING:
-	# stdlib
-	from typing import NoReturn
-
-__all__ = ("import_entry_points", "normalize", "syntaxerror_for_file", "Rewriter", "SyntaxTracebackHandler")
+	# 3rd party
+	import asttokens
+
+__all__ = (
+		"import_entry_points",
+		"normalize",
+		"syntaxerror_for_file",
+		"parse_cache",
+		"parse_source",
+		"Rewriter",
+		"FusedRewriter",
+		"SyntaxTracebackHandler",
+		"compile_exclude_patterns",
+		"is_excluded",
+		"iter_files",
+		"atomic_write",
+		"fsync_paths",
+		)
 
 _normalize_pattern = re.compile(r"[-_.]+")
 
@@ -101,12 +130,71 @@ def import_entry_points(hooks: List[Hook]) -> Dict[str, EntryPoint]:
 	return {e.name: e for e in (starmap(EntryPoint, entry_points.items()))}
 
 
+# The most recently parsed source, if a parse cache is active.
+_parse_cache: "contextvars.ContextVar[Optional[Dict[str, asttokens.ASTTokens]]]"
+_parse_cache = contextvars.ContextVar("_parse_cache", default=None)
+
+
+@contextmanager
+def parse_cache() -> Iterator[None]:
+	"""
+	Context manager within which :func:`~.parse_source` reuses the result of parsing the same source.
+
+	This is used by :func:`formate.call_hooks`, so consecutive hooks which leave the source unchanged
+	don't each have to tokenize and parse it again.
+	If a parse cache is already active it continues to be used.
+
+	.. versionadded:: 1.3.0
+	"""
+
+	if _parse_cache.get() is not None:
+		yield
+		return
+
+	token = _parse_cache.set({})
+
+	try:
+		yield
+	finally:
+		_parse_cache.reset(token)
+
+
+def parse_source(source: str) -> "asttokens.ASTTokens":
+	"""
+	Tokenize the given source and parse it into an Abstract Syntax Tree.
+
+	Within a :func:`~.parse_cache` block the result for the most recently parsed source is reused.
+	The tree may therefore be shared between hooks, and must not be modified.
+
+	.. versionadded:: 1.3.0
+
+	:param source:
+	"""
+
+	# 3rd party
+	import asttokens
+
+	cache = _parse_cache.get()
+
+	if cache is None:
+		return asttokens.ASTTokens(source, parse=True)
+
+	if source not in cache:
+		# Hooks are called in turn, so only the latest source is ever needed again.
+		cache.clear()
+		cache[source] = asttokens.ASTTokens(source, parse=True)
+
+	return cache[source]
+
+
 class Rewriter(ast.NodeVisitor):
 	"""
 	ABC for rewriting Python source files from an AST and a token stream.
 
 	:param source: The original source.
 
+	.. versionchanged:: 1.3.0  The source is parsed with :func:`~.parse_source`.
+
 	.. autosummary-widths:: 8/16
 	"""
 
@@ -114,7 +202,7 @@ class Rewriter(ast.NodeVisitor):
 	source: str
 
 	#: The tokenized source.
-	tokens: asttokens.ASTTokens
+	tokens: "asttokens.ASTTokens"
 
 	replacements: List[Tuple[Tuple[int, int], str]]
 	"""
@@ -126,9 +214,13 @@ class Rewriter(ast.NodeVisitor):
 
 	def __init__(self, source: str):
 		self.source = source
-		self.tokens = asttokens.ASTTokens(source, parse=True)
+		self.tokens = parse_source(source)
 		self.replacements: List[Tuple[Tuple[int, int], str]] = []
 
+		# The node currently being visited by a FusedRewriter, which takes care of visiting its children.
+		self._fused_node: Optional[ast.AST] = None
+		self._visit_children = False
+
 		assert self.tokens.tree is not None
 
 	def rewrite(self) -> str:
@@ -136,21 +228,23 @@ class Rewriter(ast.NodeVisitor):
 		Rewrite the source and return the new source.
 
 		:returns: The reformatted source.
+
+		:raises: :exc:`~.OverlappingReplacementsError` if any of the recorded replacements overlap.
+
+		.. versionchanged:: 1.3.0  The replacements are applied in a single pass over the source.
 		"""
 
 		tree = self.tokens.tree
 		assert tree is not None
 		self.visit(tree)
 
-		reformatted_source = self.source
+		return _apply_replacements(self.source, self.replacements)
 
-		# Work from the bottom up
-		for (start, end), replacement in sorted(self.replacements, key=itemgetter(0), reverse=True):
-			source_before = reformatted_source[:start]
-			source_after = reformatted_source[end:]
-			reformatted_source = ''.join([source_before, replacement, source_after])
-
-		return reformatted_source
+	def generic_visit(self, node: ast.AST) -> None:  # noqa: D102
+		if node is self._fused_node:
+			self._visit_children = True
+		else:
+			super().generic_visit(node)
 
 	def record_replacement(self, text_range: Tuple[int, int], new_source: str) -> None:
 		"""
@@ -163,20 +257,103 @@ class Rewriter(ast.NodeVisitor):
 		self.replacements.append((text_range, new_source))
 
 
-class SyntaxTracebackHandler(TracebackHandler):
-	"""
-	Subclass of :class:`consolekit.tracebacks.TracebackHandler` to additionally handle :exc:`SyntaxError`.
+def _apply_replacements(source: str, replacements: List[Tuple[Tuple[int, int], str]]) -> str:
+	chunks: List[str] = []
+	previous_range = (0, 0)
+
+	# Work from the top down, copying the unchanged source between each replacement.
+	for text_range, replacement in sorted(replacements, key=itemgetter(0)):
+		if text_range[0] < previous_range[1]:
+			raise OverlappingReplacementsError(previous_range, text_range)
+
+		chunks.append(source[previous_range[1]:text_range[0]])
+		chunks.append(replacement)
+		previous_range = text_range
+
+	chunks.append(source[previous_range[1]:])
+
+	return ''.join(chunks)
+
+
+class FusedRewriter:
+	r"""
+	Apply several :class:`~.Rewriter`\s to the source with a single parse and a single traversal of the tree.
+
+	The replacements recorded by all the rewriters are applied together.
+	If the replacements from different rewriters overlap the rewriters are instead applied one after another,
+	each to the output of the previous one.
+
+	.. versionadded:: 1.3.0
+
+	:param source: The original source.
+	:param rewriters: The :class:`~.Rewriter` subclasses to apply, in order.
 	"""
 
-	@staticmethod
-	def handle_SyntaxError(e: SyntaxError) -> "NoReturn":  # noqa: D102
-		click.echo(terminal_colours.Fore.RED(f"Fatal: {e.__class__.__name__}: {e}"), err=True)
-		sys.exit(126)
+	#: The original source.
+	source: str
+
+	def __init__(self, source: str, rewriters: Sequence[Type[Rewriter]]):
+		self.source = source
+		self._rewriter_types = list(rewriters)
+
+		with parse_cache():
+			self._rewriters = [rewriter(source) for rewriter in self._rewriter_types]
+
+	def _visit(self, node: ast.AST, rewriters: List[Rewriter]) -> None:
+		method_name = "visit_" + node.__class__.__name__
+		visit_children = []
 
-	@staticmethod
-	def handle_HookNotFoundError(e: HookNotFoundError) -> "NoReturn":  # noqa: D102
-		click.echo(terminal_colours.Fore.RED(f"Fatal: Hook not found: {e}"), err=True)
-		sys.exit(126)
+		for rewriter in rewriters:
+			rewriter._fused_node = node
+			rewriter._visit_children = False
+			getattr(rewriter, method_name, rewriter.generic_visit)(node)
+			rewriter._fused_node = None
+
+			# Only visit the node's children for rewriters which asked to.
+			if rewriter._visit_children:
+				visit_children.append(rewriter)
+
+		if visit_children:
+			for child in ast.iter_child_nodes(node):
+				self._visit(child, visit_children)
+
+	def rewrite(self) -> str:
+		"""
+		Rewrite the source and return the new source.
+
+		:returns: The reformatted source.
+		"""
+
+		tree = self._rewriters[0].tokens.tree
+		assert tree is not None
+		self._visit(tree, self._rewriters)
+
+		replacements = [r for rewriter in self._rewriters for r in rewriter.replacements]
+
+		try:
+			return _apply_replacements(self.source, replacements)
+		except OverlappingReplacementsError:
+			pass
+
+		reformatted_source = _apply_replacements(self.source, self._rewriters[0].replacements)
+
+		with parse_cache():
+			for rewriter_type in self._rewriter_types[1:]:
+				reformatted_source = rewriter_type(reformatted_source).rewrite()
+
+		return reformatted_source
+
+
+def __getattr__(name: str) -> Any:
+	# SyntaxTracebackHandler is only needed by the command line interface,
+	# so consolekit (which is slow to import) is only imported when it is first used.
+
+	if name == "SyntaxTracebackHandler":
+		# this package
+		from formate._tracebacks import SyntaxTracebackHandler
+		return SyntaxTracebackHandler
+
+	raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 @contextmanager
@@ -201,6 +378,178 @@ def syntaxerror_for_file(filename: PathLike) -> Iterator:
 		raise e
 
 
+def compile_exclude_patterns(patterns: Iterable[str]) -> Optional[Pattern[str]]:
+	"""
+	Combine the given shell-style wildcard patterns into a single regular expression.
+
+	.. versionadded:: 1.3.0
+
+	:param patterns:
+
+	:returns: The compiled expression, or :py:obj:`None` if no patterns were given.
+	"""
+
+	patterns = [f"(?:{fnmatch.translate(pattern)})" for pattern in patterns]
+
+	if not patterns:
+		return None
+
+	return re.compile('|'.join(patterns))
+
+
+def is_excluded(path: PathLike, exclude: Optional[Pattern[str]]) -> bool:
+	"""
+	Returns whether the given path is excluded from formatting.
+
+	A path is excluded if either the whole path or its final component matches ``exclude``.
+
+	.. versionadded:: 1.3.0
+
+	:param path:
+	:param exclude: The pattern returned by :func:`~.compile_exclude_patterns`.
+	"""
+
+	if exclude is None:
+		return False
+
+	path = os.fspath(path)
+	return exclude.match(path) is not None or exclude.match(os.path.basename(path)) is not None
+
+
+# Directories which are never searched for files to reformat.
+_vcs_directories = frozenset({".git", ".hg", ".svn"})
+
+
+def iter_files(
+		directory: PathLike,
+		filetypes: AbstractSet[str],
+		exclude: Optional[Pattern[str]] = None,
+		ignored: AbstractSet[str] = frozenset(),
+		) -> Iterator[PathPlus]:
+	"""
+	Recursively find the files to reformat in ``directory``, in alphabetical order.
+
+	Excluded and ignored directories are not searched, nor are version control directories such as :file:`.git`.
+	Symbolic links to directories are not followed.
+
+	.. versionadded:: 1.3.0
+
+	:param directory:
+	:param filetypes: The extensions of the files to include, e.g. ``{".py", ".pyi"}``.
+	:param exclude: The pattern returned by :func:`~.compile_exclude_patterns`.
+	:param ignored: Paths to skip, e.g. from :func:`formate.git.get_ignored_paths`.
+		The paths must be normalised and start with ``directory``.
+	"""
+
+	with os.scandir(os.fspath(directory)) as it:
+		entries = sorted(it, key=attrgetter("name"))
+
+	for entry in entries:
+		if is_excluded(entry.path, exclude) or os.path.normpath(entry.path) in ignored:
+			continue
+
+		if entry.is_dir(follow_symlinks=False):
+			if entry.name not in _vcs_directories:
+				yield from iter_files(entry.path, filetypes, exclude, ignored)
+		elif os.path.splitext(entry.name)[1] in filetypes and entry.is_file():
+			yield PathPlus(entry.path)
+
+
+def atomic_write(path: PathLike, data: bytes, fsync: bool = False) -> bool:
+	"""
+	Replace the content of the file at ``path`` with ``data``, unless it already has that content.
+
+	The data is written to a temporary file in the same directory, which is then moved over the original file.
+	Other processes therefore see either the old or the new content, never a partially written file.
+	The permissions of the original file are preserved.
+
+	.. versionadded:: 1.3.0
+
+	:param path:
+	:param data:
+	:param fsync: Whether to flush the new content to disk before replacing the original file.
+		When writing many files, :func:`~.fsync_paths` can instead be called once they have all been written.
+
+	:returns: Whether the file was written to.
+	"""
+
+	# Replace the target of a symbolic link, not the link itself.
+	path = os.path.realpath(path)
+
+	try:
+		with open(path, "rb") as fp:
+			if fp.read() == data:
+				return False
+
+			mode = stat.S_IMODE(os.fstat(fp.fileno()).st_mode)
+	except FileNotFoundError:
+		# Nothing to replace, so the file can be written to directly with the default permissions.
+		with open(path, "wb") as fp:
+			fp.write(data)
+
+			if fsync:
+				fp.flush()
+				os.fsync(fp.fileno())
+
+		return True
+
+	directory, filename = os.path.split(path)
+	fd, temp_path = tempfile.mkstemp(prefix=f".{filename}.", suffix=".tmp", dir=directory)
+
+	try:
+		with os.fdopen(fd, "wb") as fp:
+			fp.write(data)
+
+			if fsync:
+				fp.flush()
+				os.fsync(fp.fileno())
+
+		os.chmod(temp_path, mode)
+		os.replace(temp_path, path)
+	except BaseException:
+		if os.path.exists(temp_path):
+			os.unlink(temp_path)
+		raise
+
+	return True
+
+
+def fsync_paths(paths: Iterable[PathLike]) -> None:
+	"""
+	Flush the given files, and the directories containing them, to disk.
+
+	This allows files written by :func:`~.atomic_write` (including by other processes) to be flushed in one go,
+	rather than waiting for each file to be flushed in turn as it is written.
+	Directories are only flushed on platforms which support it.
+
+	.. versionadded:: 1.3.0
+
+	:param paths:
+	"""
+
+	directories = set()
+
+	for path in paths:
+		# Opened read-only, as the files may not be writable (atomic_write keeps the original file's permissions).
+		fd = os.open(path, os.O_RDONLY)
+		try:
+			os.fsync(fd)
+		finally:
+			os.close(fd)
+
+		directories.add(os.path.dirname(os.path.abspath(path)))
+
+	if not hasattr(os, "O_DIRECTORY"):  # pragma: no cover (!Windows)
+		return
+
+	for directory in directories:
+		fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)  # type: ignore[attr-defined,unused-ignore]
+		try:
+			os.fsync(fd)
+		finally:
+			os.close(fd)
+
+
 _P = TypeVar("_P", bound=pathlib.Path)
 
 
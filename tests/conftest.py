@@ -1 +1,19 @@
+# 3rd party
+import pytest
+from domdf_python_tools.paths import PathPlus
+
 pytest_plugins = ("coincidence", )
+
+
+@pytest.fixture(autouse=True)
+def formate_cache_dir(tmp_path_factory: pytest.TempPathFactory, monkeypatch) -> PathPlus:
+	# Don't write to the user's cache directory during the tests.
+	cache_dir = PathPlus(tmp_path_factory.mktemp("formate_cache"))
+	monkeypatch.setenv("FORMATE_CACHE_DIR", str(cache_dir))
+	return cache_dir
+
+
+@pytest.fixture(autouse=True)
+def no_formate_socket(monkeypatch) -> None:
+	# Don't send requests to a daemon the user may have running.
+	monkeypatch.delenv("FORMATE_SOCKET", raising=False)
@@ -0,0 +1,194 @@
+# stdlib
+import asyncio
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+# 3rd party
+import pytest
+import yapf.yapflib.style  # type: ignore[import-untyped]
+from consolekit.terminal_colours import strip_ansi
+from domdf_python_tools.paths import PathPlus, in_directory
+
+# this package
+import formate.aio
+from formate.aio import FormatResult, format_files
+from formate.classes import FormateConfigDict
+from formate.exceptions import HookNotFoundError
+
+config: FormateConfigDict = {"hooks": {"dynamic_quotes": 10}, "config": {"indent": '\t'}}
+
+
+def collect(*args, **kwargs) -> List[FormatResult]:
+
+	async def run() -> List[FormatResult]:
+		return [result async for result in format_files(*args, **kwargs)]
+
+	return asyncio.run(run())
+
+
+@pytest.fixture()
+def files(tmp_pathplus: PathPlus) -> List[str]:
+	(tmp_pathplus / "code.py").write_text("print('hello world')\n")
+	(tmp_pathplus / "unchanged.py").write_text('print("hello world")\n')
+	(tmp_pathplus / "README.rst").write_text("Hello world\n")
+	(tmp_pathplus / "latin1.py").write_bytes("print('héllo world')\n".encode("latin-1"))
+
+	return [
+			(tmp_pathplus / "code.py").as_posix(),
+			(tmp_pathplus / "unchanged.py").as_posix(),
+			(tmp_pathplus / "README.rst").as_posix(),
+			(tmp_pathplus / "latin1.py").as_posix(),
+			]
+
+
+def test_format_files(tmp_pathplus: PathPlus, files: List[str]):
+	results = collect(files, config)
+
+	assert sorted((PathPlus(result.filename).name, result.status) for result in results) == [
+			("README.rst", "unsupported"),
+			("code.py", "reformatted"),
+			("latin1.py", "encoding"),
+			("unchanged.py", "unchanged"),
+			]
+	assert all(result.detail is None for result in results if result.status != "encoding")
+	assert (tmp_pathplus / "code.py").read_text() == 'print("hello world")\n'
+
+
+def test_format_files_check(tmp_pathplus: PathPlus, files: List[str]):
+	results = collect(files[:2], config, show_diff=True, check=True)
+
+	result = {PathPlus(result.filename).name: result for result in results}["code.py"]
+	assert result.status == "reformatted"
+	assert result.detail is not None
+	assert '+print("hello world")' in strip_ansi(result.detail).splitlines()
+
+	assert (tmp_pathplus / "code.py").read_text() == "print('hello world')\n"
+
+
+def test_format_files_process_pool(tmp_pathplus: PathPlus, files: List[str]):
+	with ProcessPoolExecutor(max_workers=2) as executor:
+		results = collect(files, config, executor)
+
+	assert len(results) == 4
+	assert (tmp_pathplus / "code.py").read_text() == 'print("hello world")\n'
+
+
+def test_format_files_max_concurrency(tmp_pathplus: PathPlus, monkeypatch):
+	filenames = []
+	for idx in range(8):
+		(tmp_pathplus / f"code_{idx}.py").write_text("print('hello world')\n")
+		filenames.append(f"code_{idx}.py")
+
+	lock = threading.Lock()
+	running: List[int] = [0]
+	most_running: List[int] = [0]
+	original_format_file = formate.aio._format_file
+
+	def _format_file(*args) -> Tuple[str, Optional[str]]:
+		with lock:
+			running[0] += 1
+			most_running[0] = max(most_running[0], running[0])
+
+		try:
+			return original_format_file(*args)
+		finally:
+			with lock:
+				running[0] -= 1
+
+	monkeypatch.setattr(formate.aio, "_format_file", _format_file)
+
+	with ThreadPoolExecutor(max_workers=8) as executor, in_directory(tmp_pathplus):
+		results = collect(filenames, config, executor, max_concurrency=2)
+
+	assert sorted(result.filename for result in results) == filenames
+	assert most_running[0] <= 2
+
+
+def test_format_files_cancel(tmp_pathplus: PathPlus):
+	filenames = []
+	for idx in range(5):
+		(tmp_pathplus / f"code_{idx}.py").write_text("print('hello world')\n")
+		filenames.append(f"code_{idx}.py")
+
+	async def run() -> List[FormatResult]:
+		results = []
+		iterator = format_files(filenames, config, executor, max_concurrency=1)
+		async for result in iterator:
+			results.append(result)
+			break
+
+		await iterator.aclose()
+		return results
+
+	with ThreadPoolExecutor(max_workers=1) as executor, in_directory(tmp_pathplus):
+		results = asyncio.run(run())
+
+	assert results == [FormatResult("code_0.py", "reformatted")]
+
+	# Only the first file was submitted to the executor.
+	assert [(tmp_pathplus / filename).read_text() for filename in filenames] == [
+			'print("hello world")\n',
+			*["print('hello world')\n"] * 4,
+			]
+
+
+def test_format_files_syntax_error(tmp_pathplus: PathPlus):
+	(tmp_pathplus / "code.py").write_text("def foo(:\n\tprint('hello world')\n")
+
+	with pytest.raises(SyntaxError, match=r"invalid syntax \(code\.py, line 1\)"), in_directory(tmp_pathplus):
+		collect(["code.py"], config)
+
+
+def test_format_files_hook_not_found(tmp_pathplus: PathPlus):
+	with pytest.raises(HookNotFoundError, match="No such hook 'foo'"):
+		collect([(tmp_pathplus / "code.py").as_posix()], {"hooks": {"foo": 10}})
+
+	with pytest.raises(ValueError, match="'max_concurrency' must be at least 1."):
+		collect([(tmp_pathplus / "code.py").as_posix()], config, max_concurrency=0)
+
+
+def test_format_files_yapf_threads(tmp_pathplus: PathPlus, monkeypatch):
+	# yapf's style is global, so files reformatted at the same time in different threads
+	# must not pick up each other's style.
+	original_set_global_style = yapf.yapflib.style.SetGlobalStyle
+
+	def set_global_style(style) -> None:
+		original_set_global_style(style)
+		# Give the other threads a chance to run while the style is set.
+		time.sleep(0.001)
+
+	monkeypatch.setattr(yapf.yapflib.style, "SetGlobalStyle", set_global_style)
+
+	tab_config: FormateConfigDict = {"hooks": {"yapf": 10}, "config": {"indent": '\t', "line_length": 115}}
+	space_config: FormateConfigDict = {"hooks": {"yapf": 10}, "config": {"indent": "    ", "line_length": 40}}
+
+	source = "def foo(a, b):\n    if a:\n        return [a, b, 'hello world', 'goodbye world', 'hello']\n"
+	tab_expected = "def foo(a, b):\n\tif a:\n\t\treturn [a, b, 'hello world', 'goodbye world', 'hello']\n"
+	space_expected = (
+			"def foo(a, b):\n    if a:\n        return [\n            a, b, 'hello world',\n"
+			"            'goodbye world', 'hello'\n        ]\n"
+			)
+
+	tab_filenames = []
+	space_filenames = []
+	for idx in range(20):
+		(tmp_pathplus / f"tab_{idx}.py").write_text(source)
+		tab_filenames.append(f"tab_{idx}.py")
+		(tmp_pathplus / f"space_{idx}.py").write_text(source)
+		space_filenames.append(f"space_{idx}.py")
+
+	async def run() -> None:
+
+		async def consume(filenames: List[str], config: FormateConfigDict) -> None:
+			async for _ in format_files(filenames, config, executor, max_concurrency=4):
+				pass
+
+		await asyncio.gather(consume(tab_filenames, tab_config), consume(space_filenames, space_config))
+
+	with ThreadPoolExecutor(max_workers=8) as executor, in_directory(tmp_pathplus):
+		asyncio.run(run())
+
+	assert {(tmp_pathplus / filename).read_text() for filename in tab_filenames} == {tab_expected}
+	assert {(tmp_pathplus / filename).read_text() for filename in space_filenames} == {space_expected}
@@ -0,0 +1,122 @@
+# 3rd party
+import pytest
+from consolekit.testing import CliRunner, Result
+from domdf_python_tools.paths import PathPlus, in_directory
+
+# this package
+import formate
+from formate.__main__ import main
+from formate.cache import Cache, get_default_cache_dir, get_fingerprint
+from formate.config import load_toml, parse_hooks
+
+example_formate_toml = PathPlus(__file__).parent / "example_formate.toml"
+
+
+def test_get_default_cache_dir(monkeypatch, tmp_pathplus: PathPlus):
+	monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_pathplus))
+	assert get_default_cache_dir() == tmp_pathplus / "formate"
+
+	monkeypatch.delenv("XDG_CACHE_HOME")
+	assert get_default_cache_dir() == PathPlus.home() / ".cache" / "formate"
+
+
+def test_get_fingerprint(monkeypatch):
+	config = load_toml(example_formate_toml)
+	hooks = parse_hooks(config)
+
+	fingerprint = get_fingerprint(config, hooks)
+	assert fingerprint == get_fingerprint(config, hooks)
+
+	# Changing the configuration changes the fingerprint
+	config["config"] = {**config["config"], "line_length": 80}
+	assert get_fingerprint(config, hooks) != fingerprint
+
+	# As does changing the version of formate
+	config = load_toml(example_formate_toml)
+	monkeypatch.setattr(formate, "__version__", "0.0.0")
+	assert get_fingerprint(config, hooks) != fingerprint
+
+
+def test_get_fingerprint_config_files(tmp_pathplus: PathPlus):
+	(tmp_pathplus / "subdir").mkdir()
+	(tmp_pathplus / ".style.yapf").write_lines(["[style]", "based_on_style = pep8"])
+	(tmp_pathplus / ".isort.cfg").write_lines(["[settings]", "line_length = 80"])
+
+	config = {
+			"hooks": {
+					"yapf": {"priority": 10, "kwargs": {"yapf_style": ".style.yapf"}},
+					"isort": {"priority": 20, "kwargs": {"isort_config_file": "../.isort.cfg"}},
+					},
+			}
+	hooks = parse_hooks(config)
+
+	with in_directory(tmp_pathplus / "subdir"):
+		fingerprint = get_fingerprint(config, hooks)
+		assert get_fingerprint(config, hooks) == fingerprint
+
+		# The style file is found in the parent directory, as by the yapf hook.
+		(tmp_pathplus / ".style.yapf").write_lines(["[style]", "based_on_style = pep8", "indent_width = 2"])
+		yapf_fingerprint = get_fingerprint(config, hooks)
+		assert yapf_fingerprint != fingerprint
+
+		(tmp_pathplus / ".isort.cfg").write_lines(["[settings]", "line_length = 100"])
+		assert get_fingerprint(config, hooks) not in {fingerprint, yapf_fingerprint}
+
+
+def test_cache(tmp_pathplus: PathPlus):
+	cache = Cache(tmp_pathplus / "cache", "abcdefg")
+
+	assert not cache.is_unchanged("code.py", b"print('hello world')\n")
+
+	cache.mark_unchanged("code.py", b"print('hello world')\n")
+	assert cache.is_unchanged("code.py", b"print('hello world')\n")
+
+	# Different content or a different file is not in the cache.
+	assert not cache.is_unchanged("code.py", b"print('hello world')\n\n")
+	assert not cache.is_unchanged("other.py", b"print('hello world')\n")
+
+	# Nor is a different configuration.
+	assert not Cache(tmp_pathplus / "cache", "hijklmn").is_unchanged("code.py", b"print('hello world')\n")
+
+	# Marking twice is harmless
+	cache.mark_unchanged("code.py", b"print('hello world')\n")
+	assert cache.is_unchanged("code.py", b"print('hello world')\n")
+
+
+@pytest.mark.parametrize("jobs", ['1', '2'])
+def test_cli_cache(tmp_pathplus: PathPlus, monkeypatch, jobs: str):
+	(tmp_pathplus / "formate.toml").write_text(example_formate_toml.read_text())
+	(tmp_pathplus / "code.py").write_text("print('hello world')\n")
+	(tmp_pathplus / "code2.py").write_text('print("hello world")\n')
+
+	cache_dir = tmp_pathplus / "cache"
+	args = ["code.py", "code2.py", "--cache-dir", cache_dir.as_posix(), "--jobs", jobs, "-vv"]
+
+	with in_directory(tmp_pathplus):
+		runner = CliRunner(mix_stderr=False)
+		result: Result = runner.invoke(main, args=args)
+
+	assert result.exit_code == 1
+	assert result.stdout == "Reformatting code.py\nChecking code2.py\n"
+
+	# code2.py has been recorded as unchanged, so it shouldn't be reformatted again.
+	def run(self) -> bool:
+		assert self.filename == "code.py"
+		return False
+
+	monkeypatch.setattr(formate.Reformatter, "run", run)
+
+	with in_directory(tmp_pathplus):
+		runner = CliRunner(mix_stderr=False)
+		result = runner.invoke(main, args=args, catch_exceptions=False)
+
+	assert result.exit_code == 0
+	assert result.stdout == "Checking code.py\nChecking code2.py\n"
+
+	# Unless the cache is disabled
+	with in_directory(tmp_pathplus):
+		runner = CliRunner(mix_stderr=False)
+		result = runner.invoke(main, args=[*args, "--no-cache"])
+
+	assert result.exit_code == 1
+	assert "assert 'code2.py' == 'code.py'" in result.stderr
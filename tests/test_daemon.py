@@ -0,0 +1,177 @@
+# stdlib
+import os
+import socket
+import threading
+from typing import Iterator
+
+# 3rd party
+import pytest
+from consolekit.testing import CliRunner, Result
+from domdf_python_tools.paths import PathPlus, in_directory
+
+if not hasattr(socket, "AF_UNIX"):
+	pytest.skip("Requires Unix sockets", allow_module_level=True)
+
+# this package
+from formate.__main__ import main  # noqa: E402
+from formate.daemon import FormateDaemon, send_request  # noqa: E402
+
+formate_toml = """\
+[hooks]
+dynamic_quotes = 10
+
+[config]
+indent = "\t"
+"""
+
+
+@pytest.fixture()
+def daemon(tmp_pathplus: PathPlus) -> Iterator[FormateDaemon]:
+	server = FormateDaemon(tmp_pathplus / "formate.sock")
+	thread = threading.Thread(target=server.serve_forever)
+	thread.start()
+
+	try:
+		yield server
+	finally:
+		server.shutdown()
+		thread.join()
+		server.server_close()
+
+	assert not server.socket_path.exists()
+
+
+def test_daemon(tmp_pathplus: PathPlus, daemon: FormateDaemon):
+	(tmp_pathplus / "formate.toml").write_text(formate_toml)
+	(tmp_pathplus / "code.py").write_text("print('hello world')\n")
+	(tmp_pathplus / "unchanged.py").write_text('print("hello world")\n')
+
+	runner = CliRunner(mix_stderr=False)
+
+	with in_directory(tmp_pathplus):
+		result: Result = runner.invoke(
+				main,
+				args=["code.py", "unchanged.py", "--socket", "formate.sock", "-vv", "--no-colour", "--diff"],
+				)
+
+	assert result.exit_code == 1
+	assert result.stdout.splitlines() == [
+			"Reformatting code.py",
+			"--- code.py\t(original)",
+			"+++ code.py\t(reformatted)",
+			"@@ -1,2 +1,2 @@",
+			"-print('hello world')",
+			'+print("hello world")',
+			'',
+			"Checking unchanged.py",
+			]
+	assert (tmp_pathplus / "code.py").read_text() == 'print("hello world")\n'
+
+
+def test_daemon_syntax_error(tmp_pathplus: PathPlus, daemon: FormateDaemon):
+	(tmp_pathplus / "formate.toml").write_text(formate_toml)
+	(tmp_pathplus / "code.py").write_text("def foo(:\n")
+
+	runner = CliRunner(mix_stderr=False)
+
+	with in_directory(tmp_pathplus):
+		result: Result = runner.invoke(main, args=["code.py", "--socket", "formate.sock", "--no-colour"])
+
+	assert result.exit_code == 126
+	assert result.stderr == "Fatal: SyntaxError: invalid syntax (code.py, line 1)\n"
+
+
+def test_daemon_config_reload(tmp_pathplus: PathPlus, daemon: FormateDaemon):
+	config_file = tmp_pathplus / "formate.toml"
+	config_file.write_text(formate_toml)
+
+	config, pipeline, fingerprint = daemon.load_config(config_file)
+	assert [hook.name for hook in pipeline.hooks] == ["dynamic-quotes"]
+
+	# The configuration is only loaded again if the file is modified.
+	assert daemon.load_config(config_file)[1] is pipeline
+
+	config_file.write_text("[hooks]\nsquish_stubs = 10\n")
+	os.utime(config_file, ns=(0, 0))
+
+	config, pipeline, new_fingerprint = daemon.load_config(config_file)
+	assert [hook.name for hook in pipeline.hooks] == ["squish-stubs"]
+	assert new_fingerprint != fingerprint
+
+
+def test_daemon_hook_not_found(tmp_pathplus: PathPlus, daemon: FormateDaemon):
+	(tmp_pathplus / "formate.toml").write_text("[hooks]\nfoo = 10\n")
+
+	request = {
+			"cwd": os.fspath(tmp_pathplus),
+			"config_file": "formate.toml",
+			"files": ["code.py"],
+			"show_diff": False,
+			"cache_dir": None,
+			}
+
+	assert list(send_request(daemon.socket_path, request)) == [{
+			"error": "HookNotFoundError",
+			"message": "No such hook 'foo'. Is it installed?",
+			"hook": "foo",
+			}]
+
+
+def test_daemon_already_running(daemon: FormateDaemon):
+	with pytest.raises(FileExistsError, match="A formate daemon is already listening on .*formate.sock"):
+		FormateDaemon(daemon.socket_path)
+
+
+def test_daemon_stale_socket(tmp_pathplus: PathPlus):
+	server = FormateDaemon(tmp_pathplus / "formate.sock")
+	server.socket.close()
+
+	# The socket file is left behind but nothing is listening on it.
+	assert server.socket_path.exists()
+
+	with FormateDaemon(server.socket_path) as new_server:
+		assert new_server.socket_path.exists()
+
+
+def test_daemon_not_running(tmp_pathplus: PathPlus):
+	(tmp_pathplus / "formate.toml").write_text(formate_toml)
+	(tmp_pathplus / "code.py").write_text("print('hello world')\n")
+
+	runner = CliRunner(mix_stderr=False)
+
+	with in_directory(tmp_pathplus):
+		result: Result = runner.invoke(main, args=["code.py", "--socket", "formate.sock", "-vv", "--no-colour"])
+
+	# The files are reformatted directly instead.
+	assert result.exit_code == 1
+	assert result.stdout.splitlines() == [
+			"Unable to connect to the formate daemon ([Errno 2] No such file or directory); reformatting files directly.",
+			"Reformatting code.py",
+			]
+	assert (tmp_pathplus / "code.py").read_text() == 'print("hello world")\n'
+
+
+def test_daemon_check_fail_fast(tmp_pathplus: PathPlus, daemon: FormateDaemon):
+	(tmp_pathplus / "formate.toml").write_text(formate_toml)
+	(tmp_pathplus / "unchanged.py").write_text('print("hello world")\n')
+	(tmp_pathplus / "code_a.py").write_text("print('hello world')\n")
+	(tmp_pathplus / "code_b.py").write_text("print('hello world')\n")
+
+	request = {
+			"cwd": os.fspath(tmp_pathplus),
+			"config_file": os.fspath(tmp_pathplus / "formate.toml"),
+			"files": ["unchanged.py", "code_a.py", "code_b.py"],
+			"show_diff": False,
+			"cache_dir": None,
+			"check": True,
+			"fail_fast": True,
+			}
+
+	responses = list(send_request(daemon.socket_path, request))
+	assert responses == [
+			{"status": "unchanged", "diff": None, "message": None},
+			{"status": "reformatted", "diff": None, "message": None},
+			]
+
+	assert (tmp_pathplus / "code_a.py").read_text() == "print('hello world')\n"
+	assert (tmp_pathplus / "code_b.py").read_text() == "print('hello world')\n"
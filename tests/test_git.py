@@ -0,0 +1,156 @@
+# stdlib
+import os
+import shutil
+import subprocess  # nosec: B404
+
+# 3rd party
+import pytest
+from consolekit.testing import CliRunner, Result
+from domdf_python_tools.paths import PathPlus, in_directory
+
+# this package
+from formate.__main__ import main
+from formate.git import get_changed_files, get_ignored_paths
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+
+def git(*args: str) -> None:
+	subprocess.run(["git", *args], check=True, stdout=subprocess.DEVNULL)  # nosec: B603,B607
+
+
+@pytest.fixture()
+def git_repo(tmp_pathplus: PathPlus) -> PathPlus:
+	(tmp_pathplus / "formate.toml").write_lines([
+			"[hooks]",
+			"newline_after_equals = 10",
+			"dynamic_quotes = 20",
+			])
+
+	(tmp_pathplus / "code.py").write_lines([
+			"a = foo(x=",
+			"\t\t1)",
+			"b = 2",
+			"c = foo(y=",
+			"\t\t3)",
+			])
+	(tmp_pathplus / "unchanged.py").write_text("print('hello world')\n")
+	(tmp_pathplus / "deleted.py").write_text("print('hello world')\n")
+
+	with in_directory(tmp_pathplus):
+		git("init", "--quiet")
+		git("config", "user.name", "formate")
+		git("config", "user.email", "formate@example.com")
+		git("add", "--all")
+		git("commit", "--quiet", "-m", "Initial commit")
+
+	return tmp_pathplus
+
+
+def test_get_changed_files(git_repo: PathPlus):
+	(git_repo / "code.py").write_lines([
+			"a = foo(x=",
+			"\t\t1)",
+			"b = 3",
+			"c = foo(y=",
+			"\t\t3)",
+			"d = 4",
+			])
+	(git_repo / "deleted.py").unlink()
+	(git_repo / "new file.py").write_text("print('hello world')\n")
+	(git_repo / "subdirectory").mkdir()
+
+	with in_directory(git_repo / "subdirectory"):
+		changed_files = get_changed_files("HEAD")
+
+	assert changed_files == {
+			git_repo.resolve() / "code.py": [(3, 3), (6, 6)],
+			git_repo.resolve() / "new file.py": None,
+			}
+
+	with in_directory(git_repo), pytest.raises(ValueError, match="not-a-revision"):
+		get_changed_files("not-a-revision")
+
+
+def test_get_changed_files_not_utf8(git_repo: PathPlus):
+	(git_repo / "latin1.py").write_bytes("s = 'héllo'\n".encode("latin-1"))
+	(git_repo / "form_feed.py").write_text("\x0c\n")
+
+	with in_directory(git_repo):
+		git("add", "--all")
+		git("commit", "--quiet", "-m", "Add files")
+
+	(git_repo / "latin1.py").write_bytes("s = 'héllo'\nt = 'wörld'\n".encode("latin-1"))
+	(git_repo / "form_feed.py").write_text("\x0c\n\x0c@@ -9 +9 @@\n")
+
+	with in_directory(git_repo):
+		changed_files = get_changed_files("HEAD")
+
+	assert changed_files == {
+			git_repo.resolve() / "latin1.py": [(2, 2)],
+			git_repo.resolve() / "form_feed.py": [(2, 2)],
+			}
+
+
+def test_get_ignored_paths(git_repo: PathPlus, tmp_path_factory):
+	(git_repo / ".gitignore").write_lines(["venv/", "*.pyc"])
+	(git_repo / "venv" / "lib").maybe_make(parents=True)
+	(git_repo / "venv" / "lib" / "site.py").touch()
+	(git_repo / "src").mkdir()
+	(git_repo / "src" / "code.py").touch()
+	(git_repo / "src" / "code.pyc").touch()
+
+	with in_directory(git_repo):
+		assert get_ignored_paths('.') == {"venv", os.path.join("src", "code.pyc")}
+		assert get_ignored_paths("src") == {os.path.join("src", "code.pyc")}
+
+	assert get_ignored_paths(tmp_path_factory.mktemp("not_a_repo")) == set()
+
+
+def test_cli_changed_since(git_repo: PathPlus):
+	(git_repo / "code.py").write_lines([
+			"a = foo(x=",
+			"\t\t1)",
+			"b = 'hello world'",
+			"c = foo(y=",
+			"\t\t3)",
+			])
+
+	with in_directory(git_repo):
+		runner = CliRunner(mix_stderr=False)
+		result: Result = runner.invoke(main, args=["--changed-since", "HEAD", "--lines", "--no-colour", "-v"])
+
+	assert result.exit_code == 1
+	assert result.stdout == "Reformatting code.py\n"
+
+	# Only the changed lines are reformatted by the hooks which support it.
+	assert (git_repo / "code.py").read_lines() == [
+			"a = foo(x=",
+			"\t\t1)",
+			'b = "hello world"',
+			"c = foo(y=",
+			"\t\t3)",
+			'',
+			]
+
+	(git_repo / "code.py").write_lines(["a = foo(x=", "\t\t1)", "b = 4", "c = foo(y=3)"])
+
+	with in_directory(git_repo):
+		result = runner.invoke(main, args=["--changed-since", "HEAD", "--no-colour", "-v"])
+
+	assert result.exit_code == 1
+	assert result.stdout == "Reformatting code.py\n"
+	assert (git_repo / "code.py").read_lines() == ["a = foo(x=1)", "b = 4", "c = foo(y=3)", '']
+
+
+def test_cli_changed_since_errors(git_repo: PathPlus):
+	with in_directory(git_repo):
+		runner = CliRunner(mix_stderr=False)
+
+		result: Result = runner.invoke(main, args=["--lines"])
+		assert result.exit_code == 2
+		assert "--lines can only be used with --changed-since." in result.stderr
+
+		result = runner.invoke(main, args=["--changed-since", "not-a-revision"])
+		assert result.exit_code == 2
+		assert "Unable to find the files changed since 'not-a-revision'" in result.stderr
@@ -0,0 +1,95 @@
+# stdlib
+import os
+import subprocess
+import sys
+from typing import Dict, Tuple
+
+# 3rd party
+import pytest
+from domdf_python_tools.paths import PathPlus, in_directory
+
+# Modules only needed by some hooks, which shouldn't be imported until those hooks run.
+hook_dependencies = ("isort", "yapf", "asttokens", "astatine")
+
+# Modules only needed by the command line interface, which shouldn't be imported by ``import formate``.
+cli_dependencies = ("click", "consolekit")
+
+# Import times depend on the machine and how busy it is, so they are only checked if a budget is given,
+# as the total time in milliseconds for all the modules imported by ``python -m formate --version``.
+# This is about 600ms, most of which is spent in consolekit, attr_utils and domdf_python_tools.
+import_time_budget = os.environ.get("FORMATE_IMPORT_TIME_BUDGET")
+
+
+def get_import_times(*args: str) -> Dict[str, Tuple[int, bool]]:
+	"""
+	Run Python with the given arguments and return the cumulative import time of each module,
+	and whether it was imported directly rather than by another module.
+	"""
+
+	process = subprocess.run(
+			[sys.executable, "-X", "importtime", *args],
+			stdout=subprocess.PIPE,
+			stderr=subprocess.PIPE,
+			universal_newlines=True,
+			check=True,
+			)
+
+	import_times = {}
+
+	for line in process.stderr.splitlines():
+		if not line.startswith("import time:") or "self [us]" in line:
+			continue
+
+		_, cumulative_time, module = line[len("import time:"):].split('|')
+
+		# Modules imported by other modules are indented further.
+		import_times[module.strip()] = (int(cumulative_time), not module.startswith("  "))
+
+	return import_times
+
+
+@pytest.mark.parametrize(
+		"args, not_imported",
+		[
+				pytest.param(["-m", "formate", "--version"], hook_dependencies, id="cli"),
+				pytest.param(["-c", "import formate"], hook_dependencies + cli_dependencies, id="import"),
+				],
+		)
+def test_import_time(args, not_imported):
+	import_times = get_import_times(*args)
+
+	assert "formate" in import_times
+
+	for module in not_imported:
+		assert module not in import_times
+
+
+@pytest.mark.skipif(import_time_budget is None, reason="FORMATE_IMPORT_TIME_BUDGET is not set")
+def test_import_time_budget():
+	import_times = get_import_times("-m", "formate", "--version")
+
+	# The cumulative times of the modules imported directly, which include the modules they import.
+	total_time = sum(cumulative_time for cumulative_time, top_level in import_times.values() if top_level)
+	assert total_time < int(import_time_budget or 0) * 1000
+
+
+def test_import_time_aio(tmp_pathplus: PathPlus):
+	(tmp_pathplus / "code.py").write_text("print('hello world')\n")
+
+	script = "; ".join([
+			"import asyncio",
+			"import formate.daemon",
+			"from formate.aio import format_files",
+			"results = format_files(['code.py'], {'hooks': {'dynamic_quotes': 10}})",
+			"asyncio.run(results.__anext__())",
+			])
+
+	with in_directory(tmp_pathplus):
+		import_times = get_import_times("-c", script)
+
+	# Reformatting files doesn't need the command line interface.
+	assert "formate.aio" in import_times
+	for module in cli_dependencies:
+		assert module not in import_times
+
+	assert (tmp_pathplus / "code.py").read_text() == 'print("hello world")\n'
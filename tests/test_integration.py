@@ -1,4 +1,5 @@
 # stdlib
+import pickle
 import re
 import shutil
 from typing import List, Mapping, Union, no_type_check
@@ -15,10 +16,13 @@ from domdf_python_tools.typing import PathLike
 
 # this package
 import formate
-from formate import Reformatter, reformat_file
+from formate import Reformatter, format_source, reformat_file
 from formate.__main__ import main
+from formate.cache import Cache, get_fingerprint
 from formate.classes import EntryPoint, Hook
-from formate.config import formats_filetypes, load_toml, wants_filename
+from formate.config import NoSupportedHooksError, formats_filetypes, load_toml, wants_filename
+from formate.exceptions import NotIdempotentError
+from formate.pipeline import Pipeline
 
 path_sub = re.compile(r" .*/pytest-of-.*/pytest-\d+")
 
@@ -173,6 +177,43 @@ def test_reformatter_class(
 	advanced_file_regression.check_file(tmp_pathplus / "code.py")
 
 
+@pytest.mark.usefixtures("demo_environment")
+def test_format_source(
+		tmp_pathplus: PathPlus,
+		advanced_file_regression: AdvancedFileRegressionFixture,
+		):
+
+	config = load_toml(tmp_pathplus / "formate.toml")
+	pipeline = Pipeline.from_config(config)
+	source = (tmp_pathplus / "code.py").read_text()
+	(tmp_pathplus / "code.py").unlink()
+
+	reformatted_source, changed = format_source(source, "code.py", pipeline)
+	assert changed
+	advanced_file_regression.check(reformatted_source, extension="._py_")
+
+	# The pipeline can be reused, and reformatting again changes nothing.
+	assert format_source(reformatted_source, "code.py", pipeline) == (reformatted_source, False)
+
+	# The filesystem is never touched.
+	assert not (tmp_pathplus / "code.py").exists()
+
+	with pytest.raises(NoSupportedHooksError):
+		format_source(source, "code.c", pipeline)
+
+	with pytest.raises(SyntaxError) as e:
+		format_source("print('hello world'\n", "code.py", pipeline)
+
+	assert e.value.filename == "code.py"
+
+	# Syntax errors are reported even when no hook needs to parse the source.
+	pipeline = Pipeline.from_config({"hooks": {"dynamic_quotes": 10, "ellipsis-reformat": 20}})
+	assert format_source("x = 1\n", "code.py", pipeline) == ("x = 1\n", False)
+
+	with pytest.raises(SyntaxError):
+		format_source("x = (\n", "code.py", pipeline)
+
+
 @pytest.mark.usefixtures("demo_environment")
 def test_reformatter_class_non_python_hook(
 		tmp_pathplus: PathPlus,
@@ -199,6 +240,87 @@ def test_reformatter_class_non_python_hook(
 	assert r.to_string() == "Result of format-foo\n"
 
 
+def make_upper(source: str) -> str:
+	return source.upper()
+
+
+def add_comment(source: str) -> str:
+	return source + "# reformatted\n"
+
+
+upper_hook = Hook(name="make-upper", entry_point=EntryPoint("make-upper", make_upper))
+comment_hook = Hook(name="add-comment", entry_point=EntryPoint("add-comment", add_comment))
+
+
+def test_reformatter_verify_idempotent(tmp_pathplus: PathPlus):
+	(tmp_pathplus / "code.py").write_text("x = 'a'\n")
+
+	r = Reformatter(tmp_pathplus / "code.py", {}, pipeline=Pipeline([upper_hook]))
+	assert r.run(verify_idempotent=True)
+	assert r.to_string() == "X = 'A'\n"
+
+	r = Reformatter(tmp_pathplus / "code.py", {}, pipeline=Pipeline([comment_hook, upper_hook]))
+	assert r.run()
+
+	with pytest.raises(NotIdempotentError) as e:
+		r.run(verify_idempotent=True)
+
+	assert str(e.value) == f"{r.filename} is not stable: the 'add-comment' hook changed the output when run again."
+	assert e.value.hook == "add-comment"
+
+	# The result of the first pass is kept.
+	assert r.to_string() == "X = 'A'\n# REFORMATTED\n"
+
+	unpickled = pickle.loads(pickle.dumps(e.value))  # nosec: B301
+	assert isinstance(unpickled, NotIdempotentError)
+	assert str(unpickled) == str(e.value)
+
+
+@pytest.mark.usefixtures("demo_environment")
+def test_cli_verify_idempotent(tmp_pathplus: PathPlus, monkeypatch):
+
+	hooks: List[Hook] = [upper_hook]
+	monkeypatch.setattr(Pipeline, "from_config", classmethod(lambda cls, config: cls(hooks)))
+
+	(tmp_pathplus / "code.py").write_text("x = 'a'\n")
+	args = ["code.py", "--no-colour", "--verify-idempotent", "--cache-dir", "cache", "--jobs", '1']
+
+	with in_directory(tmp_pathplus):
+		runner = CliRunner(mix_stderr=False)
+		result: Result = runner.invoke(main, args=[*args, "--verbose"])
+
+	assert result.exit_code == 1
+	assert result.stdout == "Reformatting code.py\n"
+	assert result.stderr == ''
+
+	# The reformatted file is known to be stable, so later runs skip it.
+	config = load_toml(tmp_pathplus / "formate.toml")
+	cache = Cache(tmp_pathplus / "cache", get_fingerprint(config, hooks))
+	assert cache.is_unchanged(tmp_pathplus / "code.py", b"X = 'A'\n")
+
+	hooks[:] = [comment_hook, upper_hook]
+	(tmp_pathplus / "code.py").write_text("y = 'b'\n")
+
+	with in_directory(tmp_pathplus):
+		result = runner.invoke(main, args=args)
+
+	assert result.exit_code == 1
+	assert result.stderr == "code.py is not stable: the 'add-comment' hook changed the output when run again.\n"
+	assert (tmp_pathplus / "code.py").read_text() == "Y = 'B'\n# REFORMATTED\n"
+	assert not cache.is_unchanged(tmp_pathplus / "code.py", b"Y = 'B'\n# REFORMATTED\n")
+
+	# The diff is shown as well as the message.
+	(tmp_pathplus / "code.py").write_text("z = 'c'\n")
+
+	with in_directory(tmp_pathplus):
+		result = runner.invoke(main, args=[*args, "--diff"])
+
+	assert result.exit_code == 1
+	assert result.stderr == "code.py is not stable: the 'add-comment' hook changed the output when run again.\n"
+	assert "-z = 'c'" in result.stdout.splitlines()
+	assert "+Z = 'C'" in result.stdout.splitlines()
+
+
 @pytest.mark.usefixtures("demo_environment")
 def test_cli(
 		tmp_pathplus: PathPlus,
@@ -455,3 +577,354 @@ def test_cli_no_config_click8(
 	assert result.exit_code == 2
 
 	check_out(result, advanced_data_regression)
+
+
+@pytest.mark.usefixtures("demo_environment")
+@pytest.mark.parametrize("jobs", ['1', '2'])
+def test_cli_jobs(
+		tmp_pathplus: PathPlus,
+		advanced_data_regression: AdvancedDataRegressionFixture,
+		jobs: str,
+		):
+
+	result: Result
+
+	code = (tmp_pathplus / "code.py").read_text()
+
+	for name in ("code_a.py", "code_b.py", "code_c.py"):
+		(tmp_pathplus / name).write_text(code)
+
+	(tmp_pathplus / "code_d.py").write_text("print('hello world')\n")
+	(tmp_pathplus / "a_dir").mkdir()
+
+	with in_directory(tmp_pathplus):
+		runner = CliRunner(mix_stderr=False)
+		result = runner.invoke(
+				main,
+				args=[
+						"code_a.py",
+						"code_d.py",
+						"a_dir",
+						"code_b.py",
+						"code_c.py",
+						"--no-colour",
+						"--diff",
+						"--verbose",
+						"-v",
+						"--jobs",
+						jobs,
+						],
+				)
+
+	assert result.exit_code == 1
+
+	for name in ("code_a.py", "code_b.py", "code_c.py"):
+		assert (tmp_pathplus / name).read_text() == (tmp_pathplus / "code_a.py").read_text()
+
+	assert (tmp_pathplus / "code_a.py").read_text() != code
+	assert (tmp_pathplus / "code_d.py").read_text() == 'print("hello world")\n'
+
+	# The output should be the same regardless of the number of jobs.
+	check_out(result, advanced_data_regression)
+
+	with in_directory(tmp_pathplus):
+		runner = CliRunner(mix_stderr=False)
+		result = runner.invoke(main, args=["code_a.py", "code_b.py", "code_c.py", "code_d.py", "--jobs", jobs])
+
+	assert result.exit_code == 0
+	assert not result.stdout
+
+
+@pytest.mark.usefixtures("demo_environment")
+def test_cli_jobs_syntax_error(tmp_pathplus: PathPlus):
+
+	(tmp_pathplus / "code_a.py").write_text("print('hello world'\n")
+	(tmp_pathplus / "code_b.py").write_text("print('hello world')\n")
+
+	with in_directory(tmp_pathplus):
+		runner = CliRunner(mix_stderr=False)
+		result: Result = runner.invoke(main, args=["code_a.py", "code_b.py", "--no-colour", "--jobs", '2'])
+
+	assert result.exit_code == 126
+	assert result.stderr.startswith("Fatal: SyntaxError: ")
+	assert "code_a.py" in result.stderr
+
+
+@pytest.mark.usefixtures("demo_environment")
+def test_cli_stdin(
+		tmp_pathplus: PathPlus,
+		advanced_file_regression: AdvancedFileRegressionFixture,
+		):
+
+	source = (tmp_pathplus / "code.py").read_text()
+	(tmp_pathplus / "code.py").unlink()
+
+	with in_directory(tmp_pathplus):
+		runner = CliRunner(mix_stderr=False)
+		result: Result = runner.invoke(main, args=['-', "--no-colour"], input=source)
+
+	assert result.exit_code == 0
+	assert not result.stderr
+
+	# Nothing is written to disk.
+	assert not list(tmp_pathplus.glob("*.py"))
+
+	advanced_file_regression.check(result.stdout, extension="._py_")
+
+
+@pytest.mark.usefixtures("demo_environment")
+def test_cli_stdin_filename(tmp_pathplus: PathPlus, monkeypatch):
+
+	filenames = []
+
+	@formats_filetypes(".foo")
+	@wants_filename
+	def format_foo(source: str, formate_filename: PathLike) -> str:
+		filenames.append(formate_filename)
+		return source.upper()
+
+	def parse_hooks(config: Mapping) -> List[Hook]:
+		return [Hook(name="format-foo", entry_point=EntryPoint("format-foo", format_foo))]
+
+	monkeypatch.setattr(formate.pipeline, "parse_hooks", parse_hooks)
+
+	with in_directory(tmp_pathplus):
+		runner = CliRunner(mix_stderr=False)
+		result: Result = runner.invoke(main, args=['-', "--stdin-filename", "code.foo"], input="hello world\n")
+
+		assert result.exit_code == 0
+		assert result.stdout == "HELLO WORLD\n"
+		assert filenames == ["code.foo"]
+
+		# Unsupported filetypes are passed through unchanged.
+		result = runner.invoke(main, args=['-', "--stdin-filename", "code.bar"], input="hello world\n")
+
+		assert result.exit_code == 0
+		assert result.stdout == "hello world\n"
+
+	assert not (tmp_pathplus / "code.foo").exists()
+
+
+@pytest.mark.usefixtures("demo_environment")
+def test_cli_stdin_check(tmp_pathplus: PathPlus, monkeypatch):
+
+	with in_directory(tmp_pathplus):
+		runner = CliRunner(mix_stderr=False)
+		result: Result = runner.invoke(main, args=['-', "--no-colour", "--check"], input="print('hello world')\n")
+
+		assert result.exit_code == 1
+		assert result.stdout == ''
+
+		result = runner.invoke(main, args=['-', "--no-colour", "--check"], input='print("hello world")\n')
+
+		assert result.exit_code == 0
+		assert result.stdout == ''
+
+		# The diff is written instead of the source.
+		result = runner.invoke(main, args=['-', "--no-colour", "--diff"], input="print('hello world')\n")
+
+		assert result.exit_code == 0
+		assert "-print('hello world')" in result.stdout.splitlines()
+		assert '+print("hello world")' in result.stdout.splitlines()
+
+		result = runner.invoke(main, args=['-', "--no-colour", "--diff"], input='print("hello world")\n')
+
+		assert result.exit_code == 0
+		assert result.stdout == ''
+
+		monkeypatch.setattr(Pipeline, "from_config", classmethod(lambda cls, config: cls([comment_hook])))
+		result = runner.invoke(main, args=['-', "--no-colour", "--verify-idempotent"], input="x = 1\n")
+
+		assert result.exit_code == 1
+		assert result.stdout == "x = 1\n# reformatted\n"
+		assert result.stderr == (
+				"<stdin>.py is not stable: the 'add-comment' hook changed the output when run again.\n"
+				)
+
+
+@pytest.mark.usefixtures("demo_environment")
+def test_cli_stdin_syntax_error(tmp_pathplus: PathPlus):
+
+	with in_directory(tmp_pathplus):
+		runner = CliRunner(mix_stderr=False)
+		result: Result = runner.invoke(main, args=['-', "--no-colour"], input="print('hello world'\n")
+
+	assert result.exit_code == 126
+	assert not result.stdout
+	assert result.stderr.startswith("Fatal: SyntaxError: ")
+	assert "<stdin>.py" in result.stderr
+
+
+@pytest.mark.usefixtures("demo_environment")
+def test_cli_stdin_with_files(tmp_pathplus: PathPlus):
+
+	with in_directory(tmp_pathplus):
+		runner = CliRunner(mix_stderr=False)
+		result: Result = runner.invoke(main, args=['-', "code.py"], input="print('hello world')\n")
+
+	assert result.exit_code == 2
+	assert "Standard input ('-') cannot be reformatted together with other files." in result.stderr
+
+
+@pytest.mark.usefixtures("demo_environment")
+def test_cli_directory(tmp_pathplus: PathPlus):
+
+	source = (tmp_pathplus / "code.py").read_text()
+
+	for filename in ["src/pkg/code.py", "src/pkg/code_pb2.py", "src/venv/code.py", "excluded.py"]:
+		(tmp_pathplus / filename).parent.maybe_make(parents=True)
+		(tmp_pathplus / filename).write_text(source)
+
+	(tmp_pathplus / "src" / "README.rst").write_text("Hello world\n")
+
+	with in_directory(tmp_pathplus):
+		runner = CliRunner(mix_stderr=False)
+		result: Result = runner.invoke(
+				main,
+				args=[
+						"src",
+						"excluded.py",
+						"--no-colour",
+						"--verbose",
+						"--exclude",
+						"venv",
+						"*_pb2.py",
+						"excluded.py",
+						],
+				)
+
+	assert result.exit_code == 1
+	assert result.stdout == "Reformatting src/pkg/code.py\n"
+
+	assert (tmp_pathplus / "src" / "pkg" / "code.py").read_text() != source
+
+	for filename in ["src/pkg/code_pb2.py", "src/venv/code.py", "excluded.py"]:
+		assert (tmp_pathplus / filename).read_text() == source
+
+
+@pytest.mark.usefixtures("demo_environment")
+def test_cli_profile(tmp_pathplus: PathPlus):
+
+	with in_directory(tmp_pathplus):
+		runner = CliRunner(mix_stderr=False)
+		result: Result = runner.invoke(main, args=["code.py", "--no-colour", "--profile-dir", "profile"])
+
+	assert result.exit_code == 1
+	assert not result.stdout
+
+	lines = result.stderr.splitlines()
+	assert lines[0].split() == ["Hook", "Calls", "Total", "(s)", "Mean", "(ms)", "Bytes", "in", "Bytes", "out"]
+
+	# The source contains no ellipses or noqa comments, so those hooks are skipped.
+	assert sorted(line.split()[0] for line in lines[1:]) == [
+			"dynamic-quotes+collections-import-rewrite",
+			"isort",
+			"reformat-generics",
+			"yapf",
+			]
+
+	assert (tmp_pathplus / "profile" / "hooks.json").is_file()
+	assert (tmp_pathplus / "profile" / "yapf.pstats").is_file()
+
+
+@pytest.mark.usefixtures("demo_environment")
+def test_cli_check(tmp_pathplus: PathPlus):
+
+	source = (tmp_pathplus / "code.py").read_text()
+
+	with in_directory(tmp_pathplus):
+		runner = CliRunner(mix_stderr=False)
+
+		result: Result = runner.invoke(main, args=["code.py", "--no-colour", "--check", "--verbose"])
+		assert result.exit_code == 1
+		assert result.stdout == "Would reformat code.py\n"
+
+		result = runner.invoke(main, args=["code.py", "--no-colour", "--check", "--diff"])
+		assert result.exit_code == 1
+		assert result.stdout.startswith("--- code.py\t(original)\n+++ code.py\t(reformatted)\n")
+
+	# The file is never written to.
+	assert (tmp_pathplus / "code.py").read_text() == source
+
+	with in_directory(tmp_pathplus):
+		result = runner.invoke(main, args=["code.py", "--no-colour"])
+		assert result.exit_code == 1
+
+		result = runner.invoke(main, args=["code.py", "--no-colour", "--check", "--verbose", "--verbose"])
+		assert result.exit_code == 0
+		assert result.stdout == "Checking code.py\n"
+
+
+@pytest.mark.usefixtures("demo_environment")
+@pytest.mark.parametrize("check", [pytest.param([], id="write"), pytest.param(["--check"], id="check")])
+def test_cli_fail_fast(tmp_pathplus: PathPlus, check: List[str]):
+
+	source = (tmp_pathplus / "code.py").read_text()
+	(tmp_pathplus / "code_b.py").write_text(source)
+
+	with in_directory(tmp_pathplus):
+		runner = CliRunner(mix_stderr=False)
+		result: Result = runner.invoke(
+				main,
+				args=["code.py", "code_b.py", "--no-colour", "--fail-fast", "--jobs", '1', "-v", *check],
+				)
+
+	assert result.exit_code == 1
+	assert result.stdout.splitlines() == ["Would reformat code.py" if check else "Reformatting code.py"]
+
+	assert ((tmp_pathplus / "code.py").read_text() == source) == bool(check)
+	assert (tmp_pathplus / "code_b.py").read_text() == source
+
+
+@pytest.mark.usefixtures("demo_environment")
+def test_cli_fail_fast_jobs(tmp_pathplus: PathPlus, monkeypatch):
+
+	flushed: List[List[PathLike]] = []
+	monkeypatch.setattr(formate.utils, "fsync_paths", flushed.append)
+
+	source = (tmp_pathplus / "code.py").read_text()
+	filenames = [f"code_{letter}.py" for letter in "abcdefgh"]
+
+	for filename in filenames:
+		(tmp_pathplus / filename).write_text(source)
+
+	with in_directory(tmp_pathplus):
+		runner = CliRunner(mix_stderr=False)
+		result: Result = runner.invoke(
+				main,
+				args=[*filenames, "--no-colour", "--fail-fast", "--fsync", "--jobs", '2', "-v"],
+				)
+
+	assert result.exit_code == 1
+
+	# Files are only submitted to the workers about one at a time,
+	# and every file which was written to is reported and flushed to disk.
+	written = [filename for filename in filenames if (tmp_pathplus / filename).read_text() != source]
+	assert "code_a.py" in written
+	assert len(written) <= 2
+	assert result.stdout.splitlines() == [f"Reformatting {filename}" for filename in written]
+	assert flushed == [[PathPlus(filename) for filename in written]]
+
+
+@pytest.mark.usefixtures("demo_environment")
+def test_cli_fsync(tmp_pathplus: PathPlus, monkeypatch):
+
+	flushed: List[List[PathLike]] = []
+	monkeypatch.setattr(formate.utils, "fsync_paths", flushed.append)
+
+	source = (tmp_pathplus / "code.py").read_text()
+	(tmp_pathplus / "unchanged.py").write_text("x = 1\n")
+
+	with in_directory(tmp_pathplus):
+		runner = CliRunner(mix_stderr=False)
+
+		result: Result = runner.invoke(main, args=["code.py", "unchanged.py", "--no-colour", "--check", "--fsync"])
+		assert result.exit_code == 1
+		assert flushed == []
+
+		result = runner.invoke(main, args=["code.py", "unchanged.py", "--no-colour", "--fsync", "--jobs", '2'])
+		assert result.exit_code == 1
+
+	# Only the files which were written to are flushed, once all of them have been reformatted.
+	assert flushed == [[PathPlus("code.py")]]
+	assert (tmp_pathplus / "code.py").read_text() != source
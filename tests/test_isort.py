@@ -1,9 +1,13 @@
+# stdlib
+import os
+
 # 3rd party
 from coincidence.regressions import AdvancedFileRegressionFixture
+from domdf_python_tools.paths import PathPlus
 from domdf_python_tools.stringlist import StringList
 
 # this package
-from formate import isort_hook
+from formate import _get_isort_config, isort_hook
 
 
 def test_isort_stubs(advanced_file_regression: AdvancedFileRegressionFixture):
@@ -28,3 +32,32 @@ def test_isort_skip_file(advanced_file_regression: AdvancedFileRegressionFixture
 			])
 
 	assert isort_hook(str(source), "code.py") == source
+
+
+def test_isort_config_cached(tmp_pathplus: PathPlus):
+	kwargs = {"known_third_party": ["natsort"], "remove_redundant_aliases": True}
+
+	config = _get_isort_config({"line_length": 80}, kwargs, stub=False)
+	assert config.line_length == 80
+	assert _get_isort_config({"line_length": 80}, kwargs, stub=False) is config
+
+	# Stubs have their own configuration, which keeps redundant aliases.
+	stub_config = _get_isort_config({"line_length": 80}, kwargs, stub=True)
+	assert stub_config is not config
+	assert stub_config is _get_isort_config({"line_length": 80}, kwargs, stub=True)
+	assert not stub_config.remove_redundant_aliases
+	assert stub_config.line_length == 80
+	assert stub_config.known_third_party == config.known_third_party
+
+	assert _get_isort_config({"line_length": 100}, kwargs, stub=False).line_length == 100
+
+	# Changes to the settings file are picked up.
+	settings_file = tmp_pathplus / ".isort.cfg"
+	settings_file.write_lines(["[settings]", "line_length = 60"])
+	config = _get_isort_config(None, {"isort_config_file": settings_file}, stub=False)
+	assert config.line_length == 60
+	assert _get_isort_config(None, {"isort_config_file": settings_file}, stub=False) is config
+
+	settings_file.write_lines(["[settings]", "line_length = 70"])
+	os.utime(settings_file, ns=(0, 0))
+	assert _get_isort_config(None, {"isort_config_file": settings_file}, stub=False).line_length == 70
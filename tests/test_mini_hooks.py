@@ -291,3 +291,51 @@ def foo():
 """
 
 	assert newline_after_equals(src) == src
+
+
+def test_noqa_reformat_lines():
+	code = [
+			"def foo():",
+			'\t"""Does something,"""',
+			"\t# noqa: D400",
+			'',
+			"def bar():",
+			'\t"""Does something else,"""',
+			"\t# noqa: D400",
+			]
+
+	expected = [
+			"def foo():",
+			'\t"""Does something,"""',
+			"\t# noqa: D400",
+			'',
+			"def bar():",
+			'\t"""Does something else,"""  # noqa: D400',
+			]
+
+	assert noqa_reformat('\n'.join(code), formate_lines=[(7, 7)]) == '\n'.join(expected)
+	assert noqa_reformat('\n'.join(code), formate_lines=[]) == '\n'.join(code)
+
+
+def test_newline_after_equals_lines():
+	src = "a = foo(x=\n\t\t1)\nb = foo(y=\n\t\t2)\n"
+
+	assert newline_after_equals(src) == "a = foo(x=1)\nb = foo(y=2)\n"
+	assert newline_after_equals(src, formate_lines=[(4, 4)]) == "a = foo(x=\n\t\t1)\nb = foo(y=2)\n"
+	assert newline_after_equals(src, formate_lines=[]) == src
+
+
+def test_newline_after_equals_spaces():
+	src = "def foo(\n\t\tvalue: int =\n\t\t\t1,\n\t\tother=\n\t\t\t2,\n\t\t): ...\n"
+	assert newline_after_equals(src) == "def foo(\n\t\tvalue: int = 1,\n\t\tother=2,\n\t\t): ...\n"
+
+	# Trailing whitespace after the equals sign, and blank lines before the value.
+	assert newline_after_equals("foo(x = \n\n\t1)\n") == "foo(x = 1)\n"
+	assert newline_after_equals("foo(x=\r\n\t1)\r\n") == "foo(x=1)\r\n"
+
+	# Comments are left where they are.
+	src = "foo(\n\tx=  # the value\n\t1,\n\ty=\n\t# the other value\n\t2,\n\t)\n"
+	assert newline_after_equals(src) == src
+
+	src = "foo('''a =\nb''', x=\n\t'héllo')\n"
+	assert newline_after_equals(src) == "foo('''a =\nb''', x='héllo')\n"
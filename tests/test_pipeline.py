@@ -0,0 +1,64 @@
+# stdlib
+from typing import Mapping
+
+# 3rd party
+import pytest
+from domdf_python_tools.paths import PathPlus
+
+# this package
+import formate
+from formate import Reformatter
+from formate.classes import FormateConfigDict
+from formate.config import NoHooksError, NoSupportedHooksError
+from formate.pipeline import Pipeline
+
+config: FormateConfigDict = {
+		"hooks": {
+				"dynamic_quotes": 10,
+				"collections-import-rewrite": 20,
+				"squish_stubs": 80,
+				},
+		"config": {"indent": '\t', "line_length": 115},
+		}
+
+
+def test_pipeline():
+	pipeline = Pipeline.from_config(config)
+
+	hook_names = [hook.name for hook in pipeline.hooks]
+	assert hook_names == ["dynamic-quotes", "collections-import-rewrite", "squish-stubs"]
+
+	py_hooks = pipeline.get_hooks_for_filetype(".py")
+	assert [hook.name for hook in py_hooks] == ["dynamic-quotes", "collections-import-rewrite"]
+
+	pyi_hooks = pipeline.get_hooks_for_filetype(".pyi")
+	assert [hook.name for hook in pyi_hooks] == ["dynamic-quotes", "collections-import-rewrite", "squish-stubs"]
+
+	# The lookup is only performed once per filetype.
+	assert pipeline.get_hooks_for_filetype(".py") is py_hooks
+
+	with pytest.raises(NoSupportedHooksError, match=r"No supported hooks for this file type \(.c\)"):
+		pipeline.get_hooks_for_filetype(".c")
+
+	with pytest.raises(NoHooksError, match="No hooks configured"):
+		Pipeline([]).get_hooks_for_filetype(".py")
+
+
+def test_reformatter_shared_pipeline(tmp_pathplus: PathPlus, monkeypatch):
+	pipeline = Pipeline.from_config(config)
+
+	def parse_hooks(config: Mapping):
+		raise AssertionError("Hooks should not be resolved again.")
+
+	monkeypatch.setattr(formate, "parse_hooks", parse_hooks)
+
+	(tmp_pathplus / "code.py").write_text("from collections import Iterable\nprint('hello world')\n")
+	(tmp_pathplus / "code.pyi").write_text("def foo() -> str: ...\n\n\n\ndef bar() -> int: ...\n")
+
+	r = Reformatter(tmp_pathplus / "code.py", config, pipeline=pipeline)
+	assert r.run()
+	assert r.to_string() == 'from collections.abc import Iterable\nprint("hello world")\n'
+
+	r = Reformatter(tmp_pathplus / "code.pyi", config, pipeline=pipeline)
+	assert r.run()
+	assert r.to_string() == "def foo() -> str: ...\ndef bar() -> int: ...\n"
@@ -0,0 +1,88 @@
+# stdlib
+import pstats
+
+# 3rd party
+from domdf_python_tools.paths import PathPlus
+
+# this package
+from formate import call_hooks
+from formate.config import parse_hooks
+from formate.profiling import HookCall, HookProfiler, HookSummary, profile_hooks
+
+
+def test_profile_hooks():
+	hooks = parse_hooks({
+			"hooks": {
+					"dynamic_quotes": 10,
+					"collections-import-rewrite": 20,
+					"reformat-generics": 30,
+					"noqa-reformat": 40,
+					},
+			})
+
+	source = "from collections import Iterable\nx: List[int] = []\nprint('hello world')  # noqa: T201\n"
+	profiler = HookProfiler()
+
+	# Calls are only recorded within the block.
+	call_hooks(hooks, source, "code.py")
+	assert profiler.calls == []
+
+	with profile_hooks(profiler):
+		assert call_hooks(hooks, source, "code.py") == (
+				"from collections.abc import Iterable\nx: List[int] = []\nprint(\"hello world\")  # noqa: T201\n"
+				)
+		call_hooks(hooks, source, "other.py")
+
+	call_hooks(hooks, source, "code.py")
+
+	assert [(call.hook, call.filename) for call in profiler.calls] == [
+			("dynamic-quotes+collections-import-rewrite", "code.py"),
+			("reformat-generics", "code.py"),
+			("noqa-reformat", "code.py"),
+			("dynamic-quotes+collections-import-rewrite", "other.py"),
+			("reformat-generics", "other.py"),
+			("noqa-reformat", "other.py"),
+			]
+
+	assert profiler.calls[0].bytes_in == 86
+	assert profiler.calls[0].bytes_out == 90
+	assert all(call.time >= 0 for call in profiler.calls)
+
+
+def test_summary():
+	profiler = HookProfiler()
+	profiler.calls = [
+			HookCall("isort", "a.py", 0.5, 10, 12),
+			HookCall("yapf", "a.py", 1.0, 12, 12),
+			HookCall("isort", "b.py", 1.5, 20, 20),
+			]
+
+	assert profiler.summary() == [
+			HookSummary("isort", calls=2, time=2.0, bytes_in=30, bytes_out=32),
+			HookSummary("yapf", calls=1, time=1.0, bytes_in=12, bytes_out=12),
+			]
+
+	assert profiler.format_summary().split('\n') == [
+			"Hook   Calls  Total (s)  Mean (ms)  Bytes in  Bytes out",
+			"isort      2      2.000    1000.00        30         32",
+			"yapf       1      1.000    1000.00        12         12",
+			]
+
+
+def test_dump(tmp_pathplus: PathPlus):
+	hooks = parse_hooks({"hooks": {"dynamic_quotes": 10, "noqa-reformat": 20}})
+	profiler = HookProfiler(cprofile=True)
+
+	with profile_hooks(profiler):
+		call_hooks(hooks, "print('hello world')  # noqa: T201\n", "code.py")
+
+	profiler.dump(tmp_pathplus / "profile")
+
+	data = (tmp_pathplus / "profile" / "hooks.json").load_json()
+	assert [summary["hook"] for summary in data["hooks"]] == [summary.hook for summary in profiler.summary()]
+	assert [call["hook"] for call in data["calls"]] == ["dynamic-quotes", "noqa-reformat"]
+	assert data["calls"][0]["filename"] == "code.py"
+
+	stats = pstats.Stats(str(tmp_pathplus / "profile" / "dynamic-quotes.pstats"))
+	assert any(function == "dynamic_quotes" for _, _, function in stats.stats)  # type: ignore[attr-defined]
+	assert (tmp_pathplus / "profile" / "noqa-reformat.pstats").is_file()
@@ -1,10 +1,18 @@
+# stdlib
+import ast
+from typing import Union
+
 # 3rd party
 import pytest
 from coincidence.regressions import AdvancedFileRegressionFixture
+from domdf_python_tools.paths import PathPlus
 from domdf_python_tools.stringlist import StringList
 
 # this package
-from formate.reformat_generics import reformat_generics
+from formate import call_hooks
+from formate.config import load_toml
+from formate.pipeline import Pipeline
+from formate.reformat_generics import Generic, List, Visitor, reformat_generics
 
 example_1 = """
 _ConvertibleType = Union[
@@ -107,3 +115,83 @@ def test_generics_functions(advanced_file_regression: AdvancedFileRegressionFixt
 			])
 
 	advanced_file_regression.check(reformat_generics(str(code)), extension="._py")
+
+
+def test_generics_same_line():
+	# The second generic starts partway along the line, so it is too long even though it would fit on its own.
+	long_tuple = f"Tuple[{', '.join(['int'] * 18)}]"
+	code = f"x: Dict[str, int] = cast({long_tuple}, y)\n"
+
+	assert reformat_generics(code).split('\n') == [
+			"x: Dict[str, int] = cast(Tuple[",
+			*["\tint,"] * 17,
+			"\tint",
+			"\t], y)",
+			'',
+			]
+
+	assert reformat_generics(f"x = cast({long_tuple}, y)\n") == f"x = cast({long_tuple}, y)\n"
+
+
+def test_generic_width():
+	code = 'Dict[str, Union[Callable[[Optional[str], int], Any], Literal[True, None, "hello"], List[typing.Any]]]'
+	union = Visitor().visit(ast.parse(code))[0][1]
+
+	def check_length(obj: Union[Generic, List]) -> None:
+		assert obj._width() == len(repr(obj))
+		for element in obj.elements:
+			if isinstance(element, (Generic, List)):
+				check_length(element)
+
+	check_length(union)
+	assert repr(union) == code
+	assert Generic("Tuple", [])._width() == len("Tuple[]")
+
+
+def test_generics_line_length():
+	names = ["int", "str", "bytes", "float", "complex", "bool", "None", "Decimal", "Fraction", "object", "type"]
+	names.extend(["list", "dict", "set", "frozenset"])
+
+	# 115 characters long
+	code = f"x = Union[{', '.join(names)}]\n"
+
+	assert reformat_generics(code).startswith("x = Union[\n\tint,\n")
+	assert reformat_generics(code, line_length=115) == code
+	assert reformat_generics(code, formate_global_config={"line_length": 115}) == code
+
+	# The hook's own line_length takes precedence over the global configuration.
+	reformatted = reformat_generics(code, formate_global_config={"line_length": 115}, line_length=100)
+	assert reformatted.startswith("x = Union[\n\tint,\n")
+	assert reformat_generics(code, formate_global_config={"line_length": 100}, line_length=115) == code
+
+	# 110 characters long, with tabs four columns wide.
+	code = f"class Foo:\n\tattr: Union[{', '.join(names[:-1])}]\n"
+	assert reformat_generics(code, formate_global_config={"line_length": 110}) == code
+	reformatted = reformat_generics(code, formate_global_config={"line_length": 108})
+	assert reformatted.startswith("class Foo:\n\tattr: Union[\n")
+
+	expected = code.replace('\t', "  ")
+	assert reformat_generics(code, formate_global_config={"line_length": 108, "indent": "  "}) == expected
+
+
+def test_generics_fixed_point():
+	config = load_toml(PathPlus(__file__).parent / "example_formate.toml")
+	hooks = Pipeline.from_config(config).get_hooks_for_filetype(".py")
+
+	names = ["int", "str", "bytes", "float", "complex", "bool", "None", "Decimal", "Fraction", "object", "type"]
+	names.extend(["list", "dict", "set", "frozenset", "tuple", "range"])
+
+	source = StringList()
+	for count in range(12, 18):
+		union = f"Union[{', '.join(names[:count])}]"
+		source.append(f"x{count} = {union}")
+		source.blankline(ensure_single=True)
+		source.append(f"y{count}: Dict[str, {union}] = {{}}")
+		source.blankline(ensure_single=True)
+		source.append(f"class C{count}:")
+		source.append(f"\tattr: {union}")
+		source.append(f"\tother: Optional[{union}] = None")
+		source.blankline(ensure_single=True)
+
+	reformatted = call_hooks(hooks, str(source), "code.py")
+	assert call_hooks(hooks, reformatted, "code.py") == reformatted
@@ -1,17 +1,41 @@
 # stdlib
 import ast
+import os
+import pickle
+import stat
+from typing import Callable
 
 # 3rd party
+import asttokens
 import pytest
 from coincidence.regressions import AdvancedDataRegressionFixture
 from coincidence.selectors import max_version, min_version, not_pypy, only_pypy
+from domdf_python_tools.paths import PathPlus, in_directory
 
 # this package
-from formate import yapf_hook
-from formate.classes import Hook
-from formate.exceptions import HookNotFoundError
+from formate import _remap_lines, call_hooks, yapf_hook
+from formate.classes import EntryPoint, Hook
+from formate.config import applies_if, parse_hooks
+from formate.dynamic_quotes import QuoteRewriter, dynamic_quotes
+from formate.ellipses import EllipsisRewriter, ellipsis_reformat
+from formate.exceptions import HookNotFoundError, OverlappingReplacementsError
+from formate.imports import CollectionsABCRewriter, rewrite_collections_abc_imports
+from formate.mini_hooks import newline_after_equals, noqa_reformat
 from formate.reformat_generics import reformat_generics
-from formate.utils import import_entry_points, normalize, syntaxerror_for_file
+from formate.utils import (
+		FusedRewriter,
+		Rewriter,
+		atomic_write,
+		compile_exclude_patterns,
+		fsync_paths,
+		import_entry_points,
+		is_excluded,
+		iter_files,
+		normalize,
+		parse_cache,
+		parse_source,
+		syntaxerror_for_file
+		)
 
 
 @pytest.mark.parametrize(
@@ -61,6 +85,12 @@ def test_import_entry_points_not_found():
 
 	assert e.value.hook is hooks[0]
 
+	# Must survive being passed back from a worker process
+	unpickled = pickle.loads(pickle.dumps(e.value))  # nosec: B301
+	assert isinstance(unpickled, HookNotFoundError)
+	assert str(unpickled) == "No such hook 'i-dont-exist'. Is it installed?"
+	assert unpickled.hook == hooks[0]
+
 
 def test_syntaxerror_for_file():
 
@@ -128,3 +158,332 @@ def test_syntaxerror_for_file_f_string(
 			"offset": exc.offset,
 			"text": exc.text,
 			})
+
+
+def test_parse_source():
+	source = "print('hello world')\n"
+
+	atok = parse_source(source)
+	assert atok.text == source
+	assert isinstance(atok.tree, ast.Module)
+
+	# Without a cache the source is parsed every time.
+	assert parse_source(source) is not atok
+
+	with parse_cache():
+		atok = parse_source(source)
+		assert parse_source(source) is atok
+		assert parse_source(source[:-1]) is not atok
+
+		# Only the most recent source is kept.
+		assert parse_source(source) is not atok
+
+	assert parse_source(source) is not parse_source(source)
+
+
+def test_call_hooks_parse_cache(monkeypatch):
+	parsed = []
+	original_asttokens = asttokens.ASTTokens
+
+	def counting_asttokens(source: str, parse: bool):
+		parsed.append(source)
+		return original_asttokens(source, parse=parse)
+
+	monkeypatch.setattr(asttokens, "ASTTokens", counting_asttokens)
+
+	hooks = parse_hooks({
+			"hooks": {
+					"collections-import-rewrite": 10,
+					"ellipsis-reformat": 20,
+					"reformat-generics": 30,
+					"dynamic_quotes": 40,
+					},
+			})
+
+	source = "def foo() -> Dict[str, int]:\n\t...\n\nprint('hello world')\n"
+	result = call_hooks(hooks, source, "code.py")
+	assert result == "def foo() -> Dict[str, int]: ...\n\nprint(\"hello world\")\n"
+
+	# The source is only parsed again after it is changed by ellipsis_reformat
+	assert parsed == [source, "def foo() -> Dict[str, int]: ...\n\nprint('hello world')\n"]
+
+
+fused_rewriter_sources = [
+		pytest.param(
+				"from collections import Iterable, Counter\nprint('hello world')\n\n"
+				"class F:\n\t'''Docstring'''\n\n\tdef foo(self) -> str:\n\t\t...\n",
+				id="no_overlap",
+				),
+		pytest.param(
+				"def foo(a: str = 'hello world'):\n\t...\n\nclass Bar:\n\tx: str = 'abc'\n",
+				id="overlap",
+				),
+		pytest.param("print('hello world')\n", id="single"),
+		pytest.param("print(\"hello world\")\n", id="unchanged"),
+		]
+
+
+@pytest.mark.parametrize("source", fused_rewriter_sources)
+def test_fused_rewriter(source: str):
+	rewriters = [QuoteRewriter, CollectionsABCRewriter, EllipsisRewriter]
+
+	expected = source
+	for rewriter in rewriters:
+		expected = rewriter(expected).rewrite()
+
+	assert FusedRewriter(source, rewriters).rewrite() == expected
+
+
+def test_fused_rewriter_single_parse(monkeypatch):
+	parsed = []
+	original_asttokens = asttokens.ASTTokens
+
+	def counting_asttokens(source: str, parse: bool):
+		parsed.append(source)
+		return original_asttokens(source, parse=parse)
+
+	monkeypatch.setattr(asttokens, "ASTTokens", counting_asttokens)
+
+	source = "from collections import Iterable\nprint('hello world')\n\ndef foo() -> str:\n\t...\n"
+	rewriters = [QuoteRewriter, CollectionsABCRewriter, EllipsisRewriter]
+
+	expected = "from collections.abc import Iterable\nprint(\"hello world\")\n\ndef foo() -> str: ...\n"
+	assert FusedRewriter(source, rewriters).rewrite() == expected
+	assert parsed == [source]
+
+
+def test_call_hooks_fused(monkeypatch):
+	calls = []
+	original_rewrite = FusedRewriter.rewrite
+
+	def rewrite(self) -> str:
+		calls.append(self._rewriter_types)
+		return original_rewrite(self)
+
+	monkeypatch.setattr(FusedRewriter, "rewrite", rewrite)
+
+	hooks = parse_hooks({
+			"hooks": {
+					"dynamic_quotes": 10,
+					"collections-import-rewrite": 20,
+					"reformat-generics": 30,
+					"ellipsis-reformat": 40,
+					},
+			})
+
+	source = "from collections import Iterable\nprint('hello world')\n\ndef foo() -> str:\n\t...\n"
+	expected = "from collections.abc import Iterable\nprint(\"hello world\")\n\ndef foo() -> str: ...\n"
+	assert call_hooks(hooks, source, "code.py") == expected
+
+	# reformat-generics splits up the rewriters, so ellipsis-reformat is called on its own.
+	assert calls == [[QuoteRewriter, CollectionsABCRewriter]]
+
+
+class NameRewriter(Rewriter):
+
+	def visit_Name(self, node: ast.Name) -> None:
+		self.record_replacement(self.tokens.get_text_range(node), node.id.upper())
+
+
+class OverlappingRewriter(NameRewriter):
+
+	def visit_Call(self, node: ast.Call) -> None:
+		self.record_replacement(self.tokens.get_text_range(node), "call()")
+		self.generic_visit(node)
+
+
+def test_rewriter():
+	source = "a = b + c\nprint(d)\n" * 1000
+	assert NameRewriter(source).rewrite() == "A = B + C\nPRINT(D)\n" * 1000
+
+	assert NameRewriter('').rewrite() == ''
+
+
+def test_rewriter_overlapping():
+	with pytest.raises(
+			OverlappingReplacementsError,
+			match="Cannot replace characters 4-12 as they overlap with the replacement for characters 4-9.",
+			) as exc_info:
+		OverlappingRewriter("a = print(b)\n").rewrite()
+
+	assert exc_info.value.first == (4, 9)
+	assert exc_info.value.second == (4, 12)
+
+
+def test_is_excluded():
+	exclude = compile_exclude_patterns(["venv", "*_pb2.py", "src/generated/*"])
+	assert exclude is not None
+
+	assert is_excluded("venv", exclude)
+	assert is_excluded("src/venv", exclude)
+	assert is_excluded("src/code_pb2.py", exclude)
+	assert is_excluded("src/generated/code.py", exclude)
+	assert not is_excluded("src/code.py", exclude)
+	assert not is_excluded("src/venv_utils.py", exclude)
+
+	assert compile_exclude_patterns([]) is None
+	assert not is_excluded("src/code.py", None)
+
+
+def test_iter_files(tmp_pathplus: PathPlus):
+	for filename in [
+			"code.py",
+			"stub.pyi",
+			"README.rst",
+			"pkg/__init__.py",
+			"pkg/sub/module.py",
+			"pkg/module_pb2.py",
+			"venv/lib/site.py",
+			"build/lib/code.py",
+			".git/hooks/hook.py",
+			]:
+		(tmp_pathplus / filename).parent.maybe_make(parents=True)
+		(tmp_pathplus / filename).touch()
+
+	(tmp_pathplus / "link").symlink_to(tmp_pathplus / "pkg")
+
+	with in_directory(tmp_pathplus):
+		files = iter_files(
+				'.',
+				{".py", ".pyi"},
+				compile_exclude_patterns(["venv", "*_pb2.py"]),
+				{"build"},
+				)
+
+		assert [os.path.normpath(file) for file in files] == [
+				"code.py",
+				os.path.join("pkg", "__init__.py"),
+				os.path.join("pkg", "sub", "module.py"),
+				"stub.pyi",
+				]
+
+
+def test_atomic_write(tmp_pathplus: PathPlus):
+	target = tmp_pathplus / "code.py"
+
+	# Files which don't exist yet are created.
+	assert atomic_write(target, b"print('hello world')\n")
+	assert target.read_bytes() == b"print('hello world')\n"
+
+	target.chmod(0o751)
+	os.utime(target, ns=(0, 0))
+
+	# Files which are already up to date aren't touched.
+	assert not atomic_write(target, b"print('hello world')\n")
+	assert target.stat().st_mtime_ns == 0
+
+	assert atomic_write(target, b'print("hello world")\n')
+	assert target.read_bytes() == b'print("hello world")\n'
+	assert stat.S_IMODE(target.stat().st_mode) == 0o751
+	assert target.stat().st_mtime_ns != 0
+
+	# Symlinks are followed rather than replaced.
+	link = tmp_pathplus / "link.py"
+	link.symlink_to(target)
+	assert atomic_write(link, b"pass\n", fsync=True)
+	assert link.is_symlink()
+	assert target.read_bytes() == b"pass\n"
+
+	# No temporary files are left behind.
+	assert sorted(p.name for p in tmp_pathplus.iterdir()) == ["code.py", "link.py"]
+
+	fsync_paths([target, link])
+
+	# Files which aren't writable can still be flushed.
+	target.chmod(0o444)
+	fsync_paths([target])
+
+
+def test_call_hooks_applies_if():
+	calls = []
+
+	@applies_if(lambda source: "hello" in source)
+	def make_upper(source: str) -> str:
+		calls.append(source)
+		return source.upper()
+
+	hook = Hook(name="make-upper", entry_point=EntryPoint("make-upper", make_upper))
+	assert hook.is_applicable("hello world")
+	assert not hook.is_applicable("goodbye world")
+
+	assert call_hooks([hook], "hello world\n", "code.py") == "HELLO WORLD\n"
+	assert call_hooks([hook], "goodbye world\n", "code.py") == "goodbye world\n"
+	assert calls == ["hello world\n"]
+
+	# The check is made on the source as reformatted by the previous hooks.
+	assert call_hooks([hook, hook], "hello world\n", "code.py") == "HELLO WORLD\n"
+	assert calls == ["hello world\n", "hello world\n"]
+
+
+def test_call_hooks_applies_if_after_fused():
+
+	@applies_if(lambda source: '"' in source)
+	def make_upper(source: str) -> str:
+		return source.upper()
+
+	hooks = [
+			*parse_hooks({"hooks": {"dynamic_quotes": 10}}),
+			Hook(name="make-upper", entry_point=EntryPoint("make-upper", make_upper)),
+			]
+
+	# The check for the second hook sees the double quotes added by dynamic_quotes.
+	assert call_hooks(hooks, "x = 'abc'\n", "code.py") == 'X = "ABC"\n'
+
+
+def test_call_hooks_lines_moved():
+	hooks = parse_hooks({
+			"hooks": {
+					"isort": {"priority": 10, "kwargs": {"import_heading_stdlib": "stdlib"}},
+					"yapf": 20,
+					},
+			"config": {"indent": '\t', "line_length": 115},
+			})
+
+	# isort adds a heading above the import, so the changed lines move down by one before yapf sees them.
+	source = "import os\n\nx = f(a=\n1)\ny = f(b=\n2)\n"
+	result = call_hooks(hooks, source, "code.py", [(3, 4)])
+	assert result == "# stdlib\nimport os\n\nx = f(a=1)\ny = f(b=\n2)\n"
+
+
+@pytest.mark.parametrize(
+		"lines, reformatted_source, expected",
+		[
+				pytest.param([(2, 3)], "a\nb\nc\nd\n", [(2, 3)], id="unchanged"),
+				pytest.param([(2, 3)], "z\na\nb\nc\nd\n", [(3, 4)], id="insert_before"),
+				pytest.param([(2, 3)], "a\nb\nz\nc\nd\n", [(2, 4)], id="insert_within"),
+				pytest.param([(2, 3)], "a\nb\nc\nz\nd\n", [(2, 3)], id="insert_after"),
+				pytest.param([(2, 3)], "b\nc\nd\n", [(1, 2)], id="delete_before"),
+				pytest.param([(2, 3)], "a\nc\nd\n", [(2, 2)], id="delete_within"),
+				pytest.param([(2, 3)], "a\nd\n", [], id="delete_all"),
+				pytest.param([(2, 3)], "a\nx\ny\nz\nd\n", [(2, 4)], id="replace"),
+				pytest.param([(1, 1), (4, 4)], "z\na\nb\nc\nd\n", [(2, 2), (5, 5)], id="multiple"),
+				]
+		)
+def test_remap_lines(lines, reformatted_source: str, expected):
+	assert _remap_lines(lines, "a\nb\nc\nd\n", reformatted_source) == expected
+
+
+@pytest.mark.parametrize(
+		"hook",
+		[
+				dynamic_quotes,
+				ellipsis_reformat,
+				newline_after_equals,
+				noqa_reformat,
+				reformat_generics,
+				rewrite_collections_abc_imports,
+				],
+		)
+@pytest.mark.parametrize(
+		"source",
+		[
+				"print(1)\n",
+				"x = 1\ny = (\n\t2)\n",
+				"def foo() -> int: pass\n",
+				"import collection\nfrom typing import List\n",
+				],
+		)
+def test_applies_if_builtin_hooks(hook: Callable[[str], str], source: str):
+	# Sources the check rejects must be left unchanged by the hook.
+	if not hook.applies_if(source):  # type: ignore[attr-defined]
+		assert hook(source) == source
@@ -1,8 +1,12 @@
+# stdlib
+import os
+
 # 3rd party
 from coincidence.regressions import AdvancedFileRegressionFixture
-from domdf_python_tools.paths import PathPlus
+from domdf_python_tools.paths import PathPlus, in_directory
 
 # this package
+import formate
 from formate import yapf_hook
 
 
@@ -44,3 +48,58 @@ def test_tuple():
 """.replace('⸴', ',')
 
 	assert yapf_hook(src, yapf_style=PathPlus(__file__).parent.parent.joinpath(".style.yapf").as_posix()) == src
+
+
+def test_style_cached(tmp_pathplus: PathPlus, monkeypatch):
+	calls = []
+	_find_from_parents = formate._find_from_parents
+
+	def find_from_parents(path: PathPlus) -> PathPlus:
+		calls.append(path)
+		return _find_from_parents(path)
+
+	monkeypatch.setattr(formate, "_find_from_parents", find_from_parents)
+
+	(tmp_pathplus / "style.yapf").write_lines(["[style]", "based_on_style = pep8", "column_limit = 40"])
+	(tmp_pathplus / "subdir").mkdir()
+
+	src = "foo(aaaaaaaaaaaaaaaaaaaa, bbbbbbbbbbbbbbbbbbbbbb)\n"
+
+	with in_directory(tmp_pathplus / "subdir"):
+		expected = "foo(aaaaaaaaaaaaaaaaaaaa,\n    bbbbbbbbbbbbbbbbbbbbbb)\n"
+		assert yapf_hook(src, yapf_style="style.yapf") == expected
+		assert yapf_hook(src, yapf_style="style.yapf") == expected
+
+		# The style file is only searched for once.
+		assert calls == [PathPlus("style.yapf")]
+
+		# Changes to the style file are picked up.
+		(tmp_pathplus / "style.yapf").write_lines(["[style]", "based_on_style = pep8", "column_limit = 79"])
+		os.utime(tmp_pathplus / "style.yapf", ns=(0, 0))
+		assert yapf_hook(src, yapf_style="style.yapf") == src
+
+	# As are changes to the global configuration.
+	assert yapf_hook(src, based_on_style="pep8") == src
+	assert yapf_hook(
+			src,
+			based_on_style="pep8",
+			formate_global_config={"line_length": 40},
+			) == "foo(aaaaaaaaaaaaaaaaaaaa,\n    bbbbbbbbbbbbbbbbbbbbbb)\n"
+
+
+def test_deeply_nested():
+	src = "value = " + "foo(" * 200 + "bar,\n\t\t" + ", ".join(')' * 200) + '\n'
+	expected = "value = " + "foo(" * 200 + "bar,\n\t\t" + ')' * 200 + '\n'
+	assert formate._fix_yapf_nested_commas(src) == expected
+
+	# Only runs of closing brackets at the start of a line are changed.
+	src = "foo(bar), baz()\nfoo(\n\tbar), ), )\n\t), )"
+	assert formate._fix_yapf_nested_commas(src) == "foo(bar), baz()\nfoo(\n\tbar), ), )\n\t))"
+
+
+def test_lines():
+	src = "a = [1,2]\nb = [3,4]\n"
+
+	assert yapf_hook(src) == "a = [1, 2]\nb = [3, 4]\n"
+	assert yapf_hook(src, formate_lines=[(2, 2)]) == "a = [1,2]\nb = [3, 4]\n"
+	assert yapf_hook(src, formate_lines=[]) == src